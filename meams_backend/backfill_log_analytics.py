@@ -0,0 +1,27 @@
+"""
+Build the hourly activity counters behind /api/logs/analytics from the
+log entries written before they existed.
+
+Usage (from the meams_backend directory):
+    python backfill_log_analytics.py
+
+Safe to re-run: counters for hours that still have raw entries are
+recomputed from them, other hours are left alone.
+"""
+import asyncio
+
+from database import connect_async_db, close_db
+from services.log_service import rebuild_activity_counters
+
+
+async def main():
+    connect_async_db()
+    try:
+        counters = await rebuild_activity_counters()
+        print(f"✅ {counters} hourly activity counters")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+"""
+Add search index fields (search_words/search_terms) to existing log entries
+so they are found by the indexed log search.
+
+Usage (from the meams_backend directory):
+    python backfill_log_search.py [--batch-size 1000]
+
+Safe to re-run: only entries without search_terms are updated.
+"""
+import argparse
+import asyncio
+
+from database import connect_async_db, close_db
+from services.log_service import backfill_search_index
+
+
+async def main(batch_size: int):
+    connect_async_db()
+    try:
+        updated = await backfill_search_index(batch_size=batch_size)
+        print(f"✅ Indexed {updated} log entries")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the log search index")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
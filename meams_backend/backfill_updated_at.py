@@ -0,0 +1,34 @@
+"""
+Give existing supplies, equipment and accounts an updated_at so delta
+exports include them.
+
+Usage (from the meams_backend directory):
+    python backfill_updated_at.py
+
+Documents without updated_at get their created_at (or 1970-01-01 when that
+is missing too). Safe to re-run: documents that have one are not touched.
+"""
+from datetime import datetime
+
+from database import connect_db, close_db, get_database
+
+COLLECTIONS = ["supplies", "equipment", "accounts"]
+
+
+def main():
+    connect_db()
+    try:
+        db = get_database()
+        for name in COLLECTIONS:
+            # null also matches a missing field
+            result = db[name].update_many(
+                {"updated_at": None},
+                [{"$set": {"updated_at": {"$ifNull": ["$created_at", datetime(1970, 1, 1)]}}}]
+            )
+            print(f"✅ {name}: set updated_at on {result.modified_count} documents")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    main()
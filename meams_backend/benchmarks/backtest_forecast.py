@@ -0,0 +1,274 @@
+"""
+Rolling-origin backtest of the forecasting models.
+
+Usage (from the meams_backend directory):
+    python -m benchmarks.backtest_forecast [--source synthetic] [--months 24,36,60]
+        [--series 10] [--horizon 3] [--origins 6] [--workers 1]
+        [--models sarima_stepwise,baseline,...] [--output backtest_report.json]
+
+Each series is cut at several forecast origins (one month apart, ending
+`--horizon` months before its last month); every model forecasts the
+following months from the data before the origin and is scored against
+what actually happened. Sources are synthetic series (one configuration per
+--months length, to see how fit time grows with history), the historical
+supplies/equipment collections, or the per-item issue series.
+
+Per configuration (source, history length, model) the report holds MAPE,
+RMSE, MAE, interval coverage, wall time, SARIMA fits performed and which
+method produced the forecasts. It is printed and written as JSON, so
+forecasting changes can be compared on speed and accuracy.
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from processing import (
+    BASELINE_METHODS,
+    BASELINE_Z,
+    baseline_forecasts,
+    forecast_items,
+    generate_sarima_forecast,
+    shutdown_search_pool
+)
+
+SEASONAL_PERIOD = 12
+
+
+def _sarima_model(order_search):
+    """The dashboard path: generate_sarima_forecast per series"""
+    def run(train, horizon, args):
+        forecast, lower, upper = (np.zeros((len(train), horizon)) for _ in range(3))
+        methods, fits = Counter(), 0
+        index = pd.date_range("2000-01-01", periods=train.shape[1], freq="MS")
+        for row, values in enumerate(train):
+            frame, info = generate_sarima_forecast(
+                pd.DataFrame({"date": index, "quantity": values}), n_periods=horizon,
+                seasonal_period=SEASONAL_PERIOD, order_search=order_search, return_model=True,
+                time_budget=args.time_budget, workers=args.workers
+            )
+            forecast[row], lower[row], upper[row] = (
+                frame[column].to_numpy(dtype=float) for column in ("quantity", "lower_bound", "upper_bound")
+            )
+            methods[info["method"]] += 1
+            fits += info.get("fits", 0)
+        return forecast, lower, upper, np.ones(len(train), dtype=bool), methods, fits
+    return run
+
+
+def _item_sarima_model(train, horizon, args):
+    """The per-item path: short SARIMA candidate lists with baseline fallback"""
+    results = forecast_items(dict(enumerate(train)), n_periods=horizon, seasonal_period=SEASONAL_PERIOD,
+                             workers=args.workers)
+    rows = [results[row] for row in range(len(train))]
+    return (
+        np.array([fit["forecast"] for fit in rows]),
+        np.array([fit["lower_bound"] for fit in rows]),
+        np.array([fit["upper_bound"] for fit in rows]),
+        np.ones(len(train), dtype=bool),
+        Counter(fit["method"] for fit in rows),
+        sum(fit.get("fits", 0) for fit in rows)
+    )
+
+
+def _baseline_model(train, horizon, args):
+    """Baseline forecasters with per-series method selection"""
+    fit = baseline_forecasts(train, horizon, SEASONAL_PERIOD, starts=first_nonzero(train))
+    return (fit["forecast"], fit["lower_bound"], fit["upper_bound"],
+            np.ones(len(train), dtype=bool), Counter(fit["method"].tolist()), 0)
+
+
+def _single_baseline_model(name):
+    """One baseline forecaster on its own; series it cannot handle are skipped"""
+    def run(train, horizon, args):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            forecast, sigma, eligible = BASELINE_METHODS[name](
+                train, first_nonzero(train), horizon, SEASONAL_PERIOD
+            )
+        forecast = np.clip(np.nan_to_num(forecast), 0, None)
+        sigma = np.nan_to_num(sigma)
+        return (forecast, np.clip(forecast - BASELINE_Z * sigma, 0, None), forecast + BASELINE_Z * sigma,
+                eligible, Counter({name: int(eligible.sum())}), 0)
+    return run
+
+
+MODELS = {
+    "sarima_grid": _sarima_model("grid"),
+    "sarima_stepwise": _sarima_model("stepwise"),
+    "item_sarima": _item_sarima_model,
+    "baseline": _baseline_model,
+    **{name: _single_baseline_model(name) for name in BASELINE_METHODS},
+}
+DEFAULT_MODELS = ["sarima_stepwise", "baseline", *BASELINE_METHODS]
+
+
+def first_nonzero(values):
+    nonzero = values != 0
+    return np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), 0)
+
+
+def synthetic_series(count: int, months: int, seed: int = 7) -> np.ndarray:
+    """Monthly demand of a few shapes: seasonal with trend, intermittent, level shift"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(months)
+    series = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            values = (rng.uniform(50, 150) + rng.uniform(-0.5, 1.0) * t
+                      + rng.uniform(5, 30) * np.sin(2 * np.pi * (t + rng.integers(12)) / 12)
+                      + rng.normal(0, rng.uniform(2, 8), months))
+        elif kind == 1:
+            values = rng.poisson(rng.uniform(0.3, 1.5), months) * rng.integers(1, 20)
+        else:
+            values = rng.uniform(20, 60) + np.where(t >= months // 2, rng.uniform(-15, 30), 0) \
+                + rng.normal(0, 4, months)
+        series.append(np.clip(values, 0, None))
+    return np.array(series, dtype=float)
+
+
+def load_sources(args):
+    """[(source, matrix of equal-length series)]"""
+    if args.source == "synthetic":
+        return [("synthetic", synthetic_series(args.series, months, args.seed)) for months in args.months]
+
+    from database import (
+        get_historical_supplies_forecast_collection,
+        get_historical_equipment_forecast_collection
+    )
+    if args.source == "items":
+        from processing import monthly_issue_matrix
+        from services.item_forecast_service import load_issue_transactions
+        transactions, _ = load_issue_transactions()
+        matrix = monthly_issue_matrix(transactions)
+        busiest = matrix.sum(axis=1).sort_values(ascending=False).index[:args.series]
+        return [("items", matrix.loc[busiest].to_numpy())] if len(busiest) else []
+
+    from benchmarks.compare_order_search import load_monthly_series
+    collection_fn = {
+        "supplies": get_historical_supplies_forecast_collection,
+        "equipment": get_historical_equipment_forecast_collection,
+    }[args.source]
+    series = load_monthly_series(collection_fn, args.year)
+    return [(args.source, series.to_numpy()[None, :])] if len(series) else []
+
+
+def _metrics(actual, forecast, lower, upper):
+    errors = forecast - actual
+    nonzero = actual != 0
+    return {
+        "mape": float(np.mean(np.abs(errors[nonzero] / actual[nonzero])) * 100) if nonzero.any() else None,
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mae": float(np.mean(np.abs(errors))),
+        "coverage": float(np.mean((actual >= lower) & (actual <= upper)))
+    }
+
+
+def backtest(model_name, matrix, args):
+    """Score one model on every origin of a matrix of series. Returns the report entry."""
+    months = matrix.shape[1]
+    last = months - args.horizon
+    origins = [origin for origin in range(last - args.origins + 1, last + 1) if origin >= args.min_train]
+
+    collected = {key: [] for key in ("actual", "forecast", "lower", "upper")}
+    methods, fits, skipped, seconds = Counter(), 0, 0, 0.0
+    for origin in origins:
+        train, actual = matrix[:, :origin], matrix[:, origin:origin + args.horizon]
+        started = time.perf_counter()
+        forecast, lower, upper, scored, used, model_fits = MODELS[model_name](train, args.horizon, args)
+        seconds += time.perf_counter() - started
+        methods.update(used)
+        fits += model_fits
+        skipped += int((~scored).sum())
+        for key, values in zip(collected, (actual, forecast, lower, upper)):
+            collected[key].append(values[scored])
+
+    forecasts = sum(len(values) for values in collected["actual"])
+    entry = {
+        "model": model_name,
+        "months": months,
+        "series": len(matrix),
+        "origins": len(origins),
+        "forecasts": forecasts,
+        "skipped": skipped,
+        "seconds": round(seconds, 4),
+        "seconds_per_forecast": round(seconds / forecasts, 6) if forecasts else None,
+        "fits": fits,
+        "methods": dict(methods),
+        "mape": None, "rmse": None, "mae": None, "coverage": None
+    }
+    if forecasts:
+        entry.update(_metrics(*(np.concatenate(collected[key]) for key in collected)))
+    return entry
+
+
+def _format(value, width, digits=2):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecasting models")
+    parser.add_argument("--source", choices=["synthetic", "supplies", "equipment", "items"], default="synthetic")
+    parser.add_argument("--months", default="24,36,60",
+                        help="Comma-separated synthetic history lengths, one configuration each")
+    parser.add_argument("--series", type=int, default=10, help="Synthetic series (or busiest items) to use")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--year", type=int, default=None, help="Only use one year of a historical collection")
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--origins", type=int, default=6)
+    parser.add_argument("--min-train", type=int, default=6, help="Skip origins with fewer months before them")
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS),
+                        help=f"Comma-separated models out of: {', '.join(MODELS)}")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="SARIMA time budget per forecast (SARIMA_TIME_BUDGET by default)")
+    parser.add_argument("--output", default="backtest_report.json")
+    args = parser.parse_args()
+
+    args.months = [int(months) for months in args.months.split(",")]
+    models = [name.strip() for name in args.models.split(",") if name.strip()]
+    unknown = [name for name in models if name not in MODELS]
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    if args.source != "synthetic":
+        from database import connect_db
+        connect_db()
+    configurations = []
+    try:
+        print(f"{'source':<10} {'months':>6} {'model':<16} {'fcsts':>6} {'fits':>6} {'seconds':>9} "
+              f"{'mape %':>8} {'rmse':>9} {'cover':>6}  methods")
+        for source, matrix in load_sources(args):
+            for model_name in models:
+                entry = {"source": source, **backtest(model_name, matrix, args)}
+                configurations.append(entry)
+                print(f"{source:<10} {entry['months']:>6} {model_name:<16} {entry['forecasts']:>6} "
+                      f"{entry['fits']:>6} {entry['seconds']:>9.2f} {_format(entry['mape'], 8)} "
+                      f"{_format(entry['rmse'], 9)} {_format(entry['coverage'], 6)}  {entry['methods']}")
+    finally:
+        shutdown_search_pool()
+        if args.source != "synthetic":
+            from database import close_db
+            close_db()
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "settings": {
+            "source": args.source, "months": args.months, "series": args.series, "seed": args.seed,
+            "year": args.year, "horizon": args.horizon, "origins": args.origins,
+            "min_train": args.min_train, "workers": args.workers, "time_budget": args.time_budget,
+            "models": models
+        },
+        "configurations": configurations
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: streamed CSV vs write-only XLSX (and Parquet) export.
+
+Usage (from the meams_backend directory):
+    python -m benchmarks.bench_export [--rows 100000] [--skip-seed] [--parquet]
+
+Seeds a separate `supplies_benchmark` collection with synthetic supplies,
+then exports it through the same code paths as /api/export/supplies. Prints
+wall time, output size and peak Python memory (tracemalloc) per format; the
+peak should stay flat as --rows grows.
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import openpyxl
+
+from database import connect_db, connect_async_db, close_db, get_database, get_async_database
+from services.export_service import (
+    SUPPLY_EXPORT_COLUMNS,
+    column_header,
+    document_rows,
+    stream_csv,
+    build_xlsx_export
+)
+
+COLLECTION = "supplies_benchmark"
+CATEGORIES = ["Office", "Cleaning", "Laboratory", "Electrical", "Medical", "IT"]
+NAMES = ["bond paper", "ballpen", "printer toner", "whiteboard marker", "extension cord",
+         "alcohol", "gloves", "test tubes", "mouse", "keyboard"]
+
+
+def seed(collection, rows: int, batch_size: int = 10000):
+    collection.drop()
+    rng = random.Random(11)
+    start = datetime(2020, 1, 1)
+    written = 0
+    while written < rows:
+        batch = []
+        for i in range(written, min(written + batch_size, rows)):
+            batch.append({
+                "name": f"{rng.choice(NAMES)} {i}",
+                "description": "Synthetic benchmark supply, quoted, with \"commas\"",
+                "category": rng.choice(CATEGORIES),
+                "quantity": rng.randint(0, 500),
+                "supplier": f"Supplier {rng.randint(1, 50)}",
+                "location": f"Room {rng.randint(100, 450)}",
+                "status": rng.choice(["available", "low stock", "out of stock"]),
+                "itemCode": f"SUP-{i:07d}",
+                "date": start + timedelta(days=rng.randint(0, 1800))
+            })
+        collection.insert_many(batch, ordered=False)
+        written += len(batch)
+        print(f"seeded {written}/{rows}", end="\r")
+    print()
+
+
+async def export_csv(collection):
+    size = 0
+    rows = document_rows(collection, SUPPLY_EXPORT_COLUMNS)
+    async for chunk in stream_csv(column_header(SUPPLY_EXPORT_COLUMNS), rows):
+        size += len(chunk)
+    return size
+
+
+async def export_xlsx(collection):
+    rows = document_rows(collection, SUPPLY_EXPORT_COLUMNS)
+    spool, _ = await build_xlsx_export(column_header(SUPPLY_EXPORT_COLUMNS), rows, "Supplies")
+    spool.seek(0, 2)
+    size = spool.tell()
+    spool.close()
+    return size
+
+
+async def export_parquet(collection):
+    from services.columnar_export import SUPPLY_COLUMNAR_SCHEMA, build_columnar_export
+    spool, _ = await build_columnar_export(collection, SUPPLY_COLUMNAR_SCHEMA, "parquet")
+    spool.seek(0, 2)
+    size = spool.tell()
+    spool.close()
+    return size
+
+
+async def run(formats):
+    connect_async_db()
+    collection = get_async_database()[COLLECTION]
+    print(f"{'format':<8} {'seconds':>8} {'size MB':>9} {'peak MB':>9}")
+    for name, export in formats:
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = await export(collection)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:<8} {elapsed:>8.2f} {size / 1e6:>9.2f} {peak / 1e6:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the export formats")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an existing supplies_benchmark collection")
+    parser.add_argument("--parquet", action="store_true", help="Also time the Parquet export (needs pyarrow)")
+    args = parser.parse_args()
+
+    connect_db()
+    try:
+        if not args.skip_seed:
+            seed(get_database()[COLLECTION], args.rows)
+
+        formats = [("csv", export_csv), ("xlsx", export_xlsx)]
+        if args.parquet:
+            formats.append(("parquet", export_parquet))
+        print(f"openpyxl {openpyxl.__version__}, lxml {'on' if openpyxl.LXML else 'off'}")
+        asyncio.run(run(formats))
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: regex scan vs indexed token search over a large audit log.
+
+Usage (from the meams_backend directory):
+    python -m benchmarks.bench_log_search [--entries 2000000] [--skip-seed]
+
+Seeds a separate `logs_benchmark` collection with synthetic entries
+(indexed like the real logs collection), then runs the same searches with
+the old case-insensitive $regex $or and with the search_terms index, each
+combined with a 30-day date range. Prints wall time, documents examined
+and the winning index (from explaining the same pipelines) for both.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING
+
+from database import connect_db, close_db, get_database
+from services.log_service import build_search_index, build_logs_query, ranked_search_pipeline, SEARCH_FIELDS
+
+COLLECTION = "logs_benchmark"
+USERS = [f"user{i:03d}" for i in range(200)] + ["admin", "staff"]
+ACTIONS = [
+    "Viewed LCC analysis.", "Updated supply.", "Added supply.", "Deleted equipment.",
+    "Uploaded equipment image.", "Exported logs.", "Bulk imported supplies.",
+    "Logged in.", "Logged out.", "Updated profile.", "Reported equipment issue."
+]
+ITEMS = ["bond paper", "ballpen", "projector", "laptop", "aircon unit", "printer toner",
+         "whiteboard marker", "extension cord", "office chair", "microscope"]
+SEARCHES = ["projector", "toner", "deleted equipment", "bulk", "micro"]
+
+
+def seed(collection, entries: int, batch_size: int = 10000):
+    collection.drop()
+    start = datetime.utcnow() - timedelta(days=365)
+    rng = random.Random(7)
+    written = 0
+    while written < entries:
+        batch = []
+        for _ in range(min(batch_size, entries - written)):
+            timestamp = start + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            entry = {
+                "timestamp": timestamp,
+                "username": rng.choice(USERS),
+                "action": rng.choice(ACTIONS),
+                "details": f"Item: {rng.choice(ITEMS)} (SUP-{rng.randint(10000, 99999)})",
+                "ip_address": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                "formatted_timestamp": timestamp.strftime("%m/%d/%Y - %H:%M:%S")
+            }
+            entry["search_words"], entry["search_terms"] = build_search_index(entry)
+            batch.append(entry)
+        collection.insert_many(batch, ordered=False)
+        written += len(batch)
+        print(f"seeded {written}/{entries}", end="\r")
+    print()
+    collection.create_index([("timestamp", DESCENDING)])
+    collection.create_index([("username", ASCENDING)])
+    collection.create_index([("search_terms", ASCENDING), ("timestamp", DESCENDING)])
+
+
+def regex_query(search: str, date_query: dict) -> dict:
+    return {
+        "timestamp": date_query,
+        "$or": [{field: {"$regex": search, "$options": "i"}} for field in SEARCH_FIELDS]
+    }
+
+
+def regex_pipeline(search: str, date_query: dict) -> list:
+    return [{"$match": regex_query(search, date_query)}, {"$sort": {"timestamp": -1}}, {"$limit": 1000}]
+
+
+def explain_stats(collection, pipeline: list) -> tuple:
+    """(documents examined, index used) of an aggregation pipeline"""
+    explain = collection.database.command(
+        "explain", {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+        verbosity="executionStats"
+    )
+    # The query stage is the first pipeline stage unless the whole pipeline was pushed down
+    cursor = explain["stages"][0]["$cursor"] if "stages" in explain else explain
+    stats = cursor.get("executionStats", {})
+    plan = str(cursor.get("queryPlanner", {}).get("winningPlan", {}))
+    index = "search_terms" if "search_terms" in plan else "timestamp" if "timestamp_" in plan else "COLLSCAN"
+    return stats.get("totalDocsExamined"), index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audit log search")
+    parser.add_argument("--entries", type=int, default=2_000_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an existing logs_benchmark collection")
+    args = parser.parse_args()
+
+    connect_db()
+    try:
+        collection = get_database()[COLLECTION]
+        if not args.skip_seed:
+            seed(collection, args.entries)
+
+        date_to = datetime.utcnow()
+        date_from = date_to - timedelta(days=30)
+
+        print(f"{'search':<20} {'mode':<7} {'seconds':>8} {'results':>8} {'examined':>10}  index")
+        for search in SEARCHES:
+            query, terms = build_logs_query(
+                date_from.strftime("%Y-%m-%d"), date_to.strftime("%Y-%m-%d"), None, search
+            )
+
+            started = time.perf_counter()
+            regex_results = list(collection.aggregate(regex_pipeline(search, query["timestamp"])))
+            regex_time = time.perf_counter() - started
+            examined, index = explain_stats(collection, regex_pipeline(search, query["timestamp"]))
+            print(f"{search:<20} {'regex':<7} {regex_time:>8.3f} {len(regex_results):>8} {examined!s:>10}  {index}")
+
+            started = time.perf_counter()
+            pipeline = ranked_search_pipeline(query, terms, limit=1000)
+            token_results = list(collection.aggregate(pipeline))
+            token_time = time.perf_counter() - started
+            examined, index = explain_stats(collection, pipeline)
+            print(f"{search:<20} {'tokens':<7} {token_time:>8.3f} {len(token_results):>8} {examined!s:>10}  {index}")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    main()
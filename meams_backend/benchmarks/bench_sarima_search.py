@@ -0,0 +1,64 @@
+"""
+Benchmark: serial vs process-pool SARIMA order grid search.
+
+Usage (from the meams_backend directory):
+    python -m benchmarks.bench_sarima_search [--workers 4] [--repeat 3]
+
+Fits the full 144-candidate grid on a synthetic 4-year monthly series with
+both paths, checks that they pick the same order and prints the speedup.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing import find_best_sarima_order, get_search_pool, shutdown_search_pool
+
+
+def make_series(years: int = 4, seed: int = 42) -> pd.Series:
+    """Seasonal monthly demand with trend and noise"""
+    rng = np.random.default_rng(seed)
+    months = years * 12
+    index = pd.date_range("2021-01-01", periods=months, freq="MS")
+    season = 20 * np.sin(2 * np.pi * np.arange(months) / 12)
+    trend = np.linspace(100, 130, months)
+    return pd.Series(trend + season + rng.normal(0, 5, months), index=index)
+
+
+def time_search(data, workers: int, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = find_best_sarima_order(data, workers=workers)
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_series()
+
+    # Start the workers outside the timed runs; the server keeps the pool alive
+    get_search_pool(args.workers)
+    find_best_sarima_order(data, max_p=0, max_d=0, max_q=0, max_P=0, max_D=0, max_Q=0, workers=args.workers)
+
+    serial_result, serial_time = time_search(data, 1, args.repeat)
+    parallel_result, parallel_time = time_search(data, args.workers, args.repeat)
+    shutdown_search_pool()
+
+    print(f"serial:             {serial_time:8.2f}s  order={serial_result}")
+    print(f"parallel ({args.workers} workers): {parallel_time:8.2f}s  order={parallel_result}")
+    print(f"speedup:            {serial_time / parallel_time:8.2f}x")
+
+    if serial_result != parallel_result:
+        raise SystemExit("Parallel search picked a different order than the serial search")
+
+
+if __name__ == "__main__":
+    main()
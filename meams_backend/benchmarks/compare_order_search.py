@@ -0,0 +1,86 @@
+"""
+Compare SARIMA order search modes on the historical forecast collections.
+
+Usage (from the meams_backend directory):
+    python -m benchmarks.compare_order_search [--year 2024] [--workers 1]
+        [--max-p 2 --max-q 2 --max-P 1 --max-Q 1]
+
+For each collection (historical_supplies_forecast,
+historical_equipment_forecast) the monthly series is searched with the
+exhaustive grid and the stepwise mode; fits performed, wall time, chosen
+order and final AIC are printed side by side.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from database import (
+    connect_db,
+    close_db,
+    get_historical_supplies_forecast_collection,
+    get_historical_equipment_forecast_collection
+)
+from processing import search_sarima_order, shutdown_search_pool
+
+COLLECTIONS = {
+    "supplies": get_historical_supplies_forecast_collection,
+    "equipment": get_historical_equipment_forecast_collection,
+}
+
+
+def load_monthly_series(collection_fn, year=None) -> pd.Series:
+    """Monthly quantity series of a historical collection"""
+    raw_data = list(collection_fn().find({}, {"_id": 0, "date": 1, "quantity": 1}))
+    if not raw_data:
+        return pd.Series(dtype=float)
+
+    df = pd.DataFrame(raw_data)
+    df["date"] = pd.to_datetime(df["date"])
+    df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
+    if year:
+        df = df[df["date"].dt.year == year]
+    return df.set_index("date")["quantity"].resample("MS").sum().asfreq("MS").fillna(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare grid and stepwise SARIMA order search")
+    parser.add_argument("--year", type=int, default=None, help="Only use one year of history")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-p", type=int, default=2)
+    parser.add_argument("--max-d", type=int, default=1)
+    parser.add_argument("--max-q", type=int, default=2)
+    parser.add_argument("--max-P", type=int, default=1)
+    parser.add_argument("--max-D", type=int, default=1)
+    parser.add_argument("--max-Q", type=int, default=1)
+    args = parser.parse_args()
+
+    bounds = {
+        "max_p": args.max_p, "max_d": args.max_d, "max_q": args.max_q,
+        "max_P": args.max_P, "max_D": args.max_D, "max_Q": args.max_Q,
+    }
+
+    connect_db()
+    try:
+        print(f"{'collection':<10} {'method':<9} {'fits':>5} {'seconds':>9} {'aic':>11}  order")
+        for label, collection_fn in COLLECTIONS.items():
+            series = load_monthly_series(collection_fn, args.year)
+            if len(series) < 12:
+                print(f"{label:<10} skipped: only {len(series)} months of history")
+                continue
+
+            for method in ("grid", "stepwise"):
+                started = time.perf_counter()
+                result = search_sarima_order(series, method=method, workers=args.workers, **bounds)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{label:<10} {method:<9} {result['fits']:>5} {elapsed:>9.2f} {result['aic']:>11.2f}  "
+                    f"{result['order']}x{result['seasonal_order']}"
+                )
+    finally:
+        shutdown_search_pool()
+        close_db()
+
+
+if __name__ == "__main__":
+    main()
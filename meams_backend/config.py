@@ -44,8 +44,88 @@ EMAIL_FROM_NAME = "MEAMS"  # Separate name field for Brevo API
 
 # File Upload Settings
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_DOCUMENT_SIZE = 25 * 1024 * 1024  # 25MB
 ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/jpg', 'image/gif']
 
+# Blob Storage (item images and documents)
+# "gridfs" stores blobs in MongoDB GridFS, "local" in a directory on disk
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "gridfs")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "blob_store")
+BLOB_BUCKET_NAME = "blobs"
+BLOB_CHUNK_SIZE = 255 * 1024  # 255KB (GridFS default chunk size)
+
+# Bulk Import
+# Number of write operations sent per bulk_write batch
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+MAX_BULK_IMPORT_BATCH_SIZE = 10000
+
+# Forecasting
+# SARIMA order search: "grid" (exhaustive) or "stepwise"
+SARIMA_ORDER_SEARCH = os.getenv("SARIMA_ORDER_SEARCH", "grid")
+# Worker processes for the SARIMA order grid search (1 = serial search)
+SARIMA_SEARCH_WORKERS = int(os.getenv("SARIMA_SEARCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Seconds a single candidate fit may take in a worker before it is skipped
+SARIMA_FIT_TIMEOUT = float(os.getenv("SARIMA_FIT_TIMEOUT", "30"))
+# Seconds the SARIMA order search may run for one series; it is stopped there
+# and the baseline forecasters (seasonal naive, moving average, Holt-Winters)
+# are used instead (0 = no limit)
+SARIMA_TIME_BUDGET = float(os.getenv("SARIMA_TIME_BUDGET", "120"))
+# Per-item forecasts: "baseline" (vectorized over all items at once) or "sarima"
+ITEM_FORECAST_METHOD = os.getenv("ITEM_FORECAST_METHOD", "baseline")
+# Seconds a "sarima" per-item run may take; items not fitted by then get a baseline
+ITEM_FORECAST_TIME_BUDGET = float(os.getenv("ITEM_FORECAST_TIME_BUDGET", "1800"))
+
+# Background forecast refresh
+# Seconds between checks of the historical data for changes
+FORECAST_REFRESH_INTERVAL = int(os.getenv("FORECAST_REFRESH_INTERVAL", "300"))
+# Horizon precomputed at startup (the dashboard default)
+FORECAST_DEFAULT_PERIODS = 12
+MAX_FORECAST_PERIODS = 60
+# How long one worker may hold a series while refitting it
+FORECAST_REFRESH_LEASE_SECONDS = 600
+# Months of history (ending at the latest month with data) a model is fitted on
+FORECAST_WINDOW_MONTHS = int(os.getenv("FORECAST_WINDOW_MONTHS", "36"))
+# New months are appended to the fitted model; a full refit (order search
+# and all) happens once the fit is this many days old...
+FORECAST_FULL_REFIT_DAYS = int(os.getenv("FORECAST_FULL_REFIT_DAYS", "30"))
+# ...or when the one-step error on the new months exceeds the fit's by this factor
+FORECAST_DEGRADATION_RATIO = float(os.getenv("FORECAST_DEGRADATION_RATIO", "1.5"))
+
+# Exports
+# Rows encoded per chunk written to a streamed CSV response
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+# Documents fetched per cursor batch while exporting
+EXPORT_CURSOR_BATCH_SIZE = 1000
+# Rows per Arrow record batch in Parquet/Arrow exports
+EXPORT_RECORD_BATCH_ROWS = int(os.getenv("EXPORT_RECORD_BATCH_ROWS", "10000"))
+# Full-data ZIPs stay in memory up to this size, then spill to a temp file
+EXPORT_SPOOL_MAX_SIZE = int(os.getenv("EXPORT_SPOOL_MAX_SIZE", str(16 * 1024 * 1024)))
+
+# Delta exports
+# Changes newer than this are left for the next sync so in-flight writes are not skipped
+DELTA_EXPORT_LAG_SECONDS = int(os.getenv("DELTA_EXPORT_LAG_SECONDS", "5"))
+MAX_DELTA_PAGE_SIZE = 5000
+
+# Audit Log Writer
+LOG_PAGE_SIZE = 1000  # default and maximum rows per /api/logs page
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+# What to do when the queue is full: "block", "drop_newest" or "drop_oldest"
+LOG_OVERFLOW_POLICY = os.getenv("LOG_OVERFLOW_POLICY", "block")
+LOG_ENQUEUE_TIMEOUT = float(os.getenv("LOG_ENQUEUE_TIMEOUT", "2.0"))  # seconds, for "block"
+# Ranked log search only ranks this many of the newest matching entries
+LOG_SEARCH_MAX_CANDIDATES = int(os.getenv("LOG_SEARCH_MAX_CANDIDATES", "10000"))
+
+# Audit Log Retention
+# Raw entries older than this many days are rolled up, archived and removed (0 keeps them forever)
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "180"))
+LOG_RETENTION_INTERVAL = int(os.getenv("LOG_RETENTION_INTERVAL", "3600"))  # seconds between runs
+# How long one worker may hold a day while rolling it up and archiving it
+LOG_RETENTION_LEASE_SECONDS = 1800
+# Directory for gzipped JSON Lines archives of removed entries ("" removes without archiving)
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "log_archive")
+
 # Hardcoded Users (for backward compatibility)
 HARDCODED_USERS = {
     "admin": {"password": "password123", "role": "admin"},
@@ -1,11 +1,19 @@
 """
 MongoDB database connection and collection references
+
+Request handlers use the async (Motor) client through the get_async_*
+helpers so a slow round trip never blocks the event loop. The synchronous
+pymongo client is kept for index creation, scripts and work that already
+runs off the event loop (forecasting).
 """
 from pymongo import MongoClient, ASCENDING, DESCENDING
+from motor.motor_asyncio import AsyncIOMotorClient
 from config import MONGODB_URL, DATABASE_NAME
 
 client = None
 db = None
+async_client = None
+async_db = None
 
 def connect_db():
     """Initialize database connection"""
@@ -29,12 +37,30 @@ def create_indexes():
         db.supplies.create_index([("category", ASCENDING)])
         db.supplies.create_index([("status", ASCENDING)])
         db.supplies.create_index([("created_at", DESCENDING)])
+        # Keyset pagination: (sort field, _id) and filter + created_at
+        db.supplies.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+        db.supplies.create_index([("itemCode", ASCENDING), ("_id", ASCENDING)])
+        db.supplies.create_index([("category", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        db.supplies.create_index([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        for field in ("name", "quantity", "category", "status"):
+            db.supplies.create_index([(field, ASCENDING), ("_id", ASCENDING)])
         
         # Equipment indexes
         db.equipment.create_index([("itemCode", ASCENDING)])
         db.equipment.create_index([("category", ASCENDING)])
         db.equipment.create_index([("status", ASCENDING)])
         db.equipment.create_index([("created_at", DESCENDING)])
+        db.equipment.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+        db.equipment.create_index([("itemCode", ASCENDING), ("_id", ASCENDING)])
+        db.equipment.create_index([("category", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        db.equipment.create_index([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        for field in ("name", "amount", "category", "status"):
+            db.equipment.create_index([(field, ASCENDING), ("_id", ASCENDING)])
+        
+        # Delta exports: changes in (updated_at, _id) order, deletions as tombstones
+        for collection in (db.supplies, db.equipment, db.accounts):
+            collection.create_index([("updated_at", ASCENDING), ("_id", ASCENDING)])
+        db.tombstones.create_index([("collection", ASCENDING), ("deleted_at", ASCENDING), ("_id", ASCENDING)])
         
         # Accounts indexes
         db.accounts.create_index([("username", ASCENDING)], unique=True)
@@ -43,11 +69,54 @@ def create_indexes():
         # Logs indexes
         db.logs.create_index([("timestamp", DESCENDING)])
         db.logs.create_index([("username", ASCENDING)])
+        # Keyset pagination: newest first, optionally per user
+        db.logs.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)])
+        db.logs.create_index([("username", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+        # Token search combined with the date range
+        db.logs.create_index([("search_terms", ASCENDING), ("timestamp", DESCENDING)])
+        
+        # Log rollups (one document per period, user and action)
+        db.log_rollups_daily.create_index([("day", ASCENDING), ("username", ASCENDING), ("action", ASCENDING)], unique=True)
+        db.log_rollups_daily.create_index([("username", ASCENDING), ("day", ASCENDING)])
+        db.log_rollups_monthly.create_index([("month", ASCENDING), ("username", ASCENDING), ("action", ASCENDING)], unique=True)
+        
+        # Hourly activity counters maintained by the log writer
+        db.log_activity.create_index([("hour", ASCENDING), ("username", ASCENDING), ("action", ASCENDING)], unique=True)
+        db.log_activity.create_index([("username", ASCENDING), ("hour", ASCENDING)])
+        
+        # Per-item demand forecasts (one document per supply, _id = supply id)
+        db.item_forecasts.create_index([("itemCode", ASCENDING), ("_id", ASCENDING)])
+        
+        # Persisted forecast models (one per series, shared by every horizon);
+        # per-horizon results from older versions are dropped with their index
+        if "label_1_n_periods_1" in db.forecast_results.index_information():
+            db.forecast_results.drop_index("label_1_n_periods_1")
+            db.forecast_results.delete_many({})
+        db.forecast_results.create_index([("label", ASCENDING)], unique=True)
         
         print("Database indexes created successfully")
     except Exception as e:
         print(f"Error creating indexes: {e}")
 
+def connect_async_db():
+    """Initialize async database connection (call from within the event loop)"""
+    global async_client, async_db
+    async_client = AsyncIOMotorClient(MONGODB_URL)
+    async_db = async_client[DATABASE_NAME]
+    return async_db
+
+def close_db():
+    """Close both database clients"""
+    global client, db, async_client, async_db
+    if async_client is not None:
+        async_client.close()
+        async_client = None
+        async_db = None
+    if client is not None:
+        client.close()
+        client = None
+        db = None
+
 def get_database():
     """Get database instance"""
     global db
@@ -67,8 +136,74 @@ def get_accounts_collection():
 def get_logs_collection():
     return get_database().logs
 
+def get_item_forecasts_collection():
+    return get_database().item_forecasts
+
+def get_log_rollups_daily_collection():
+    return get_database().log_rollups_daily
+
+def get_log_rollups_monthly_collection():
+    return get_database().log_rollups_monthly
+
+def get_log_retention_collection():
+    return get_database().log_retention
+
+def get_log_usernames_collection():
+    return get_database().log_usernames
+
 def get_historical_supplies_forecast_collection():
     return get_database().historical_supplies_forecast
 
 def get_historical_equipment_forecast_collection():
-    return get_database().historical_equipment_forecast
\ No newline at end of file
+    return get_database().historical_equipment_forecast
+
+def get_forecast_results_collection():
+    return get_database().forecast_results
+
+# Async collection accessors (Motor) - use these from async request handlers
+
+def get_async_database():
+    """Get async database instance"""
+    global async_db
+    if async_db is None:
+        async_db = connect_async_db()
+    return async_db
+
+def get_async_supplies_collection():
+    return get_async_database().supplies
+
+def get_async_equipment_collection():
+    return get_async_database().equipment
+
+def get_async_accounts_collection():
+    return get_async_database().accounts
+
+def get_async_logs_collection():
+    return get_async_database().logs
+
+def get_async_log_usernames_collection():
+    return get_async_database().log_usernames
+
+def get_async_log_activity_collection():
+    return get_async_database().log_activity
+
+def get_async_log_rollups_daily_collection():
+    return get_async_database().log_rollups_daily
+
+def get_async_log_rollups_monthly_collection():
+    return get_async_database().log_rollups_monthly
+
+def get_async_item_forecasts_collection():
+    return get_async_database().item_forecasts
+
+def get_async_tombstones_collection():
+    return get_async_database().tombstones
+
+def get_async_bug_reports_collection():
+    return get_async_database().bug_reports
+
+def get_async_historical_supplies_forecast_collection():
+    return get_async_database().historical_supplies_forecast
+
+def get_async_historical_equipment_forecast_collection():
+    return get_async_database().historical_equipment_forecast
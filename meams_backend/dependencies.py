@@ -4,7 +4,7 @@ Shared dependencies for FastAPI endpoints - SECURE VERSION
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from services.auth_service import verify_token
-from database import get_accounts_collection
+from database import get_async_accounts_collection
 from config import HARDCODED_USERS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -32,8 +32,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             return token  # Hardcoded users are always valid
         
         # Check database users
-        accounts_collection = get_accounts_collection()
-        user = accounts_collection.find_one({"username": username})
+        accounts_collection = get_async_accounts_collection()
+        user = await accounts_collection.find_one({"username": username})
         
         if not user:
             raise HTTPException(
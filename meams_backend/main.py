@@ -1,7 +1,10 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from config import API_TITLE, API_VERSION, ALLOWED_ORIGINS
-from database import connect_db
+from database import connect_db, connect_async_db, close_db
+from services.forecast_scheduler import start_forecast_scheduler, stop_forecast_scheduler
+from services.log_service import start_log_writer, stop_log_writer, get_log_writer_stats
+from services.log_retention import start_log_retention, stop_log_retention
 from routers import help_support
 import time
 
@@ -14,6 +17,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
+    expose_headers=["Content-Disposition", "X-Export-Summary"],
 )
 
 @app.middleware("http")
@@ -37,10 +41,21 @@ async def add_process_time_header(request: Request, call_next):
 @app.on_event("startup")
 async def startup_event():
     connect_db()
+    connect_async_db()
+    start_log_writer()
+    start_forecast_scheduler()
+    start_log_retention()
     print("=" * 50)
     print("MEAMS API Started Successfully")
     print("=" * 50)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_log_retention()
+    await stop_forecast_scheduler()
+    await stop_log_writer()
+    close_db()
+
 # Import all routers
 from routers import (
     auth, supplies, equipment, profile, 
@@ -74,13 +89,14 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    from database import client
+    from database import get_async_database
     from datetime import datetime
     try:
-        client.admin.command('ping')
+        await get_async_database().client.admin.command('ping')
         return {
             "status": "healthy",
             "database": "connected",
+            "log_writer": get_log_writer_stats(),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
@@ -168,7 +184,7 @@ async def test_email_config():
 @app.post("/test-forgot-password")
 async def test_forgot_password(email: str):
     """Quick test of forgot password flow with Resend"""
-    from database import get_accounts_collection
+    from database import get_async_accounts_collection
     from services.email_service import send_password_reset_email
     from config import FRONTEND_URL
     import secrets
@@ -179,16 +195,16 @@ async def test_forgot_password(email: str):
     print(f"TESTING FORGOT PASSWORD FOR: {email}")
     print(f"{'='*70}")
     
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Check if user exists
-    user = accounts_collection.find_one({"email": email})
+    user = await accounts_collection.find_one({"email": email})
     
     if not user:
         print(f"❌ No user found with email: {email}")
         
         # Show available emails in database
-        all_users = list(accounts_collection.find({}, {"email": 1, "username": 1, "name": 1}))
+        all_users = await accounts_collection.find({}, {"email": 1, "username": 1, "name": 1}).to_list(length=None)
         available_emails = [u.get('email', 'N/A') for u in all_users if u.get('email')]
         
         print(f"\n📋 Available emails in database:")
@@ -213,7 +229,7 @@ async def test_forgot_password(email: str):
     token_data = create_password_reset_token(reset_token, expires_in_hours=1)
     
     # Update database with token
-    accounts_collection.update_one(
+    await accounts_collection.update_one(
         {"_id": user["_id"]},
         {
             "$set": {
@@ -0,0 +1,38 @@
+"""
+Move embedded base64 images/documents of existing supplies and equipment
+into the blob store.
+
+Usage (from the meams_backend directory):
+    python migrate_blobs.py [--batch-size 50] [--collection supplies|equipment]
+
+Safe to re-run: items already holding blob references are skipped, and an item
+modified while its blobs are copied is left untouched for the next run.
+"""
+import argparse
+import asyncio
+
+from database import connect_async_db, close_db
+from services.blob_service import migrate_embedded_blobs
+
+
+async def main(collections, batch_size: int):
+    connect_async_db()
+    try:
+        for collection_name in collections:
+            result = await migrate_embedded_blobs(collection_name, batch_size=batch_size)
+            print(
+                f"✅ {collection_name}: {result['migrated']} migrated, "
+                f"{len(result['skipped'])} skipped in {result['duration_seconds']:.1f}s"
+            )
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate embedded images/documents into the blob store")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--collection", choices=["supplies", "equipment"])
+    args = parser.parse_args()
+
+    collections = [args.collection] if args.collection else ["supplies", "equipment"]
+    asyncio.run(main(collections, args.batch_size))
@@ -1,8 +1,16 @@
 import pandas as pd
 import numpy as np
+import math
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import get_context
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 import warnings
 
+from config import SARIMA_SEARCH_WORKERS, SARIMA_FIT_TIMEOUT, SARIMA_ORDER_SEARCH, SARIMA_TIME_BUDGET
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
@@ -34,89 +42,823 @@ def bootstrap_years(df: pd.DataFrame, date_col='date', value_col='quantity',
     return pd.DataFrame(bootstrapped).sort_values(by=date_col).reset_index(drop=True)
 
 
-def find_best_sarima_order(data, seasonal_period=12,
-                           max_p=2, max_d=1, max_q=2,
-                           max_P=1, max_D=1, max_Q=1):
+def sarima_candidate_orders(seasonal_period=12,
+                            max_p=2, max_d=1, max_q=2,
+                            max_P=1, max_D=1, max_Q=1):
     """
-    Grid search for the best SARIMA order using AIC.
+    All (order, seasonal_order) pairs of the grid search, in search order.
+    """
+    return [
+        ((p, d, q), (P, D, Q, seasonal_period))
+        for p in range(max_p + 1)
+        for d in range(max_d + 1)
+        for q in range(max_q + 1)
+        for P in range(max_P + 1)
+        for D in range(max_D + 1)
+        for Q in range(max_Q + 1)
+    ]
+
+
+class SarimaFitTimeout(Exception):
+    pass
+
+
+class SarimaSearchDeadline(Exception):
+    """The order search ran past its deadline; pending candidates were cancelled"""
+    pass
+
+
+def _raise_fit_timeout(signum, frame):
+    raise SarimaFitTimeout()
+
+
+def _can_time_fits(timeout):
+    """Interval timers need SIGALRM, which can only be handled in the main thread"""
+    return bool(timeout) and hasattr(signal, "setitimer") \
+        and threading.current_thread() is threading.main_thread()
+
+
+def fit_sarima_aic(data, order, seasonal_order, timeout=None):
+    """
+    Fit one candidate model and return its AIC, or None if the fit fails.
+    Runs in pool workers; timeout (seconds) is enforced with an interval
+    timer where the platform supports it and only on a main thread, so
+    serial fits in the server's threadpool are not timed.
+    """
+    use_timer = _can_time_fits(timeout)
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_fit_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        model = SARIMAX(
+            data,
+            order=order,
+            seasonal_order=seasonal_order,
+            enforce_stationarity=False,
+            enforce_invertibility=False
+        )
+        return model.fit(disp=False).aic
+    except Exception:
+        return None
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+_search_pool = None
+_search_pool_workers = None
+
+
+def get_search_pool(workers):
+    """Shared process pool for the grid search (created on first use)"""
+    global _search_pool, _search_pool_workers
+    if _search_pool is None or _search_pool_workers != workers:
+        shutdown_search_pool()
+        # spawn: never fork the server process with its event loop and DB clients
+        _search_pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        _search_pool_workers = workers
+    return _search_pool
+
+
+def shutdown_search_pool():
+    """Stop the grid search worker processes"""
+    global _search_pool, _search_pool_workers
+    if _search_pool is not None:
+        _search_pool.shutdown(wait=False, cancel_futures=True)
+        _search_pool = None
+        _search_pool_workers = None
+
+
+def recycle_search_pool():
+    """
+    Replace the shared pool after a deadline abort. Fits already running
+    cannot be cancelled; their workers are left to finish them (each fit is
+    bounded by SARIMA_FIT_TIMEOUT) and exit, while later searches and item
+    forecasts get fresh workers instead of queueing behind them.
+    """
+    shutdown_search_pool()
+
+
+def _select_best(candidates, aics, seasonal_period):
+    """
+    Pick the lowest AIC, breaking ties by search order like the serial loop.
+    Returns (order, seasonal_order, aic).
     """
     best_aic = float('inf')
     best_order = (1, 1, 1)
     best_seasonal_order = (0, 1, 1, seasonal_period)
 
-    for p in range(max_p + 1):
-        for d in range(max_d + 1):
-            for q in range(max_q + 1):
-                for P in range(max_P + 1):
-                    for D in range(max_D + 1):
-                        for Q in range(max_Q + 1):
-                            try:
-                                model = SARIMAX(
-                                    data,
-                                    order=(p, d, q),
-                                    seasonal_order=(P, D, Q, seasonal_period),
-                                    enforce_stationarity=False,
-                                    enforce_invertibility=False
-                                )
-                                result = model.fit(disp=False)
-                                if result.aic < best_aic:
-                                    best_aic = result.aic
-                                    best_order = (p, d, q)
-                                    best_seasonal_order = (P, D, Q, seasonal_period)
-                            except:
-                                continue
-    return best_order, best_seasonal_order
+    for (order, seasonal_order), aic in zip(candidates, aics):
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_seasonal_order = seasonal_order
+    return best_order, best_seasonal_order, best_aic
+
+
+def _past(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def fit_sarima_candidates(data, candidates, workers, fit_timeout, deadline=None):
+    """
+    Fit every (order, seasonal_order) candidate and return their AICs in the
+    same order (None for failed fits). workers <= 1 fits them serially.
+    Raises SarimaSearchDeadline once the deadline (a time.monotonic() value)
+    passes: no further candidates are started, pending ones are cancelled
+    and the pool is recycled if fits were still running. Serial fits are
+    only timed on the main thread (see fit_sarima_aic).
+    """
+    if workers <= 1:
+        aics = []
+        for order, seasonal_order in candidates:
+            if _past(deadline):
+                raise SarimaSearchDeadline()
+            aics.append(fit_sarima_aic(data, order, seasonal_order, fit_timeout))
+        return aics
+
+    if _past(deadline):
+        raise SarimaSearchDeadline()
+    pool = get_search_pool(workers)
+    futures = [
+        pool.submit(fit_sarima_aic, data, order, seasonal_order, fit_timeout)
+        for order, seasonal_order in candidates
+    ]
+
+    # Backstop for platforms without an interval timer in the workers: the
+    # whole batch may take at most as long as every fit hitting its timeout
+    backstop = None
+    if fit_timeout:
+        backstop = time.monotonic() + fit_timeout * math.ceil(len(candidates) / workers)
+    limit = min((value for value in (backstop, deadline) if value is not None), default=None)
+
+    aics = []
+    for future in futures:
+        try:
+            remaining = None if limit is None else max(0.0, limit - time.monotonic())
+            aics.append(future.result(timeout=remaining))
+        except Exception:
+            future.cancel()
+            aics.append(None)
+        if _past(deadline) and len(aics) < len(futures):
+            for pending in futures:
+                pending.cancel()
+            if not all(pending.done() for pending in futures):
+                recycle_search_pool()
+            raise SarimaSearchDeadline()
+    return aics
+
+
+def grid_search_sarima_order(data, seasonal_period, bounds, workers, fit_timeout, deadline=None):
+    """Exhaustive search: fit every order within bounds"""
+    candidates = sarima_candidate_orders(seasonal_period, **bounds)
+    aics = fit_sarima_candidates(data, candidates, workers, fit_timeout, deadline)
+    order, seasonal_order, aic = _select_best(candidates, aics, seasonal_period)
+    return {"order": order, "seasonal_order": seasonal_order, "aic": aic, "fits": len(candidates)}
+
+
+def _stepwise_neighbours(order, seasonal_order, bounds):
+    """Orders one step away from the current best (Hyndman-Khandakar moves)"""
+    p, d, q = order
+    P, D, Q, m = seasonal_order
+    current = (p, d, q, P, D, Q)
+    limits = (bounds["max_p"], bounds["max_d"], bounds["max_q"],
+              bounds["max_P"], bounds["max_D"], bounds["max_Q"])
+
+    moves = []
+    for i in range(6):
+        for step in (-1, 1):
+            move = [0] * 6
+            move[i] = step
+            moves.append(move)
+    # Vary p and q (and P and Q) together
+    for step in (-1, 1):
+        moves.append([step, 0, step, 0, 0, 0])
+        moves.append([0, 0, 0, step, 0, step])
+
+    neighbours = []
+    for move in moves:
+        values = tuple(v + dv for v, dv in zip(current, move))
+        if all(0 <= v <= limit for v, limit in zip(values, limits)):
+            neighbours.append((values[:3], values[3:] + (m,)))
+    return neighbours
+
+
+def stepwise_search_sarima_order(data, seasonal_period, bounds, workers, fit_timeout, deadline=None, max_models=94):
+    """
+    Stepwise search (Hyndman-Khandakar style): fit a few starting models,
+    then repeatedly fit the neighbours of the current best and move while
+    the AIC improves. At most max_models distinct models are fitted.
+    """
+    def clip(values):
+        limits = (bounds["max_p"], bounds["max_d"], bounds["max_q"],
+                  bounds["max_P"], bounds["max_D"], bounds["max_Q"])
+        values = tuple(min(v, limit) for v, limit in zip(values, limits))
+        return values[:3], values[3:] + (seasonal_period,)
+
+    d = min(1, bounds["max_d"])
+    D = min(1, bounds["max_D"])
+    initial = []
+    for values in ((2, d, 2, 1, D, 1), (0, d, 0, 0, D, 0), (1, d, 0, 1, D, 0), (0, d, 1, 0, D, 1)):
+        candidate = clip(values)
+        if candidate not in initial:
+            initial.append(candidate)
+
+    fitted = {}
+
+    def fit_batch(candidates):
+        candidates = [c for c in candidates if c not in fitted][:max_models - len(fitted)]
+        aics = fit_sarima_candidates(data, candidates, workers, fit_timeout, deadline)
+        fitted.update(zip(candidates, aics))
+        return candidates, aics
+
+    candidates, aics = fit_batch(initial)
+    best_order, best_seasonal_order, best_aic = _select_best(candidates, aics, seasonal_period)
+
+    while best_aic != float('inf') and len(fitted) < max_models:
+        candidates, aics = fit_batch(_stepwise_neighbours(best_order, best_seasonal_order, bounds))
+        if not candidates:
+            break
+        order, seasonal_order, aic = _select_best(candidates, aics, seasonal_period)
+        if aic >= best_aic:
+            break
+        best_order, best_seasonal_order, best_aic = order, seasonal_order, aic
+
+    return {"order": best_order, "seasonal_order": best_seasonal_order, "aic": best_aic, "fits": len(fitted)}
+
+
+ORDER_SEARCH_METHODS = {
+    "grid": grid_search_sarima_order,
+    "stepwise": stepwise_search_sarima_order,
+}
+
+
+def search_sarima_order(data, seasonal_period=12, method=None,
+                        max_p=2, max_d=1, max_q=2,
+                        max_P=1, max_D=1, max_Q=1,
+                        workers=None, fit_timeout=None, deadline=None):
+    """
+    Search for the best SARIMA order using AIC.
+    Returns {"order", "seasonal_order", "aic", "fits"}.
+
+    method is "grid" (exhaustive) or "stepwise" (SARIMA_ORDER_SEARCH by
+    default). Candidates are fitted in a process pool of `workers` processes
+    (SARIMA_SEARCH_WORKERS by default; 1 fits serially). A fit taking longer
+    than fit_timeout seconds counts as failed. Past deadline (a
+    time.monotonic() value) the search stops and raises SarimaSearchDeadline.
+    """
+    method = method or SARIMA_ORDER_SEARCH
+    if method not in ORDER_SEARCH_METHODS:
+        raise ValueError(f"Unknown order search method '{method}'. Use one of: {', '.join(ORDER_SEARCH_METHODS)}")
+
+    bounds = {"max_p": max_p, "max_d": max_d, "max_q": max_q,
+              "max_P": max_P, "max_D": max_D, "max_Q": max_Q}
+    workers = SARIMA_SEARCH_WORKERS if workers is None else workers
+    fit_timeout = SARIMA_FIT_TIMEOUT if fit_timeout is None else fit_timeout
+    return ORDER_SEARCH_METHODS[method](data, seasonal_period, bounds, workers, fit_timeout, deadline)
+
+
+def find_best_sarima_order(data, seasonal_period=12,
+                           max_p=2, max_d=1, max_q=2,
+                           max_P=1, max_D=1, max_Q=1,
+                           workers=None, fit_timeout=None, method=None):
+    """
+    Search for the best SARIMA order using AIC (see search_sarima_order).
+    Returns (order, seasonal_order).
+    """
+    result = search_sarima_order(
+        data, seasonal_period, method,
+        max_p=max_p, max_d=max_d, max_q=max_q,
+        max_P=max_P, max_D=max_D, max_Q=max_Q,
+        workers=workers, fit_timeout=fit_timeout
+    )
+    return result["order"], result["seasonal_order"]
+
+
+def fit_forecast_model(values, seasonal_period=12, order_search=None, time_budget=None, workers=None):
+    """
+    Fit the forecasting model of one monthly series, independent of the
+    horizon. Returns (model, results): model holds the method and, for
+    SARIMA, the order, seasonal_order, aic, number of fits and fitted params
+    (enough to rebuild the results without another search); results is the
+    fitted SARIMAX results object (None for the baseline forecasters).
+
+    Series shorter than 12 months, an order search still running after
+    time_budget seconds (SARIMA_TIME_BUDGET by default, 0 for no limit; the
+    search is stopped at that point) and failed fits fall back to the
+    baseline forecasters.
+    """
+    values = np.asarray(values, dtype=float)
+    time_budget = SARIMA_TIME_BUDGET if time_budget is None else time_budget
+
+    if len(values) < 12:
+        print(f"[FORECAST] Only {len(values)} months of data, using baseline forecasters")
+        return _baseline_model(values, seasonal_period), None
+
+    deadline = time.monotonic() + time_budget if time_budget else None
+    try:
+        # Find best SARIMA order
+        search = search_sarima_order(values, seasonal_period=seasonal_period,
+                                     method=order_search, workers=workers, deadline=deadline)
+        order, seasonal_order = search["order"], search["seasonal_order"]
+
+        # Fit SARIMA
+        model = SARIMAX(values, order=order, seasonal_order=seasonal_order,
+                        enforce_stationarity=False, enforce_invertibility=False)
+        result = model.fit(disp=False)
+    except SarimaSearchDeadline:
+        print(f"[FORECAST] SARIMA order search exceeded {time_budget:.0f}s, using baseline forecasters")
+        return _baseline_model(values, seasonal_period), None
+    except Exception as e:
+        print(f"[FORECAST] SARIMA fit failed ({e}), using baseline forecasters")
+        return _baseline_model(values, seasonal_period), None
+
+    return {
+        "method": "sarima",
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "aic": float(result.aic),
+        "fits": search["fits"] + 1,
+        "rmse": _one_step_rmse(result, order, seasonal_order),
+        "params": [float(param) for param in result.params]
+    }, result
+
+
+def _one_step_rmse(result, order, seasonal_order):
+    """In-sample one-step error, skipping the observations lost to differencing"""
+    burn_in = order[1] + seasonal_order[1] * seasonal_order[3]
+    errors = np.asarray(result.resid, dtype=float)[burn_in:]
+    return float(np.sqrt(np.mean(errors ** 2))) if len(errors) else None
+
+
+def update_forecast_model(results, model, new_values):
+    """
+    Extend fitted SARIMAX results with new observations, keeping the fitted
+    params (no order search or optimisation - only the new months are run
+    through the filter). Returns (model, results, error_ratio), where
+    error_ratio is the RMSE of the one-step errors on the new months over
+    the in-sample RMSE of the fit (None when that is unknown).
+    """
+    new_values = np.asarray(new_values, dtype=float)
+    updated = results.append(new_values, refit=False)
+    errors = np.asarray(updated.resid, dtype=float)[-len(new_values):]
+    new_rmse = float(np.sqrt(np.mean(errors ** 2)))
+
+    fit_rmse = model.get("rmse")
+    if fit_rmse:
+        error_ratio = new_rmse / fit_rmse
+    else:
+        error_ratio = None if new_rmse == 0 else float("inf")
+    return {**model, "appended": model.get("appended", 0) + len(new_values)}, updated, error_ratio
+
+
+def _baseline_model(values, seasonal_period):
+    method = baseline_forecasts(values, 1, seasonal_period)["method"][0]
+    return {"method": str(method), "order": None, "seasonal_order": None, "aic": None, "fits": 0, "params": None}
+
+
+def restore_forecast_results(values, model):
+    """Rebuild fitted SARIMAX results from stored params (a Kalman filter pass, no fitting)"""
+    sarimax = SARIMAX(np.asarray(values, dtype=float), order=tuple(model["order"]),
+                      seasonal_order=tuple(model["seasonal_order"]),
+                      enforce_stationarity=False, enforce_invertibility=False)
+    return sarimax.filter(np.asarray(model["params"], dtype=float))
+
+
+def forecast_from_model(values, model, n_periods, seasonal_period=12, results=None):
+    """
+    Forecast any number of months from a model returned by
+    fit_forecast_model. SARIMA forecasts come from results.get_forecast
+    (results are restored from the stored params when not given); baseline
+    forecasts are recomputed, which is cheap. Bounds are widened to at least
+    ±15% for visibility. Returns (forecast, lower_bound, upper_bound) arrays.
+    """
+    if model["method"] != "sarima":
+        fit = baseline_forecasts(values, n_periods, seasonal_period)
+        return fit["forecast"][0], fit["lower_bound"][0], fit["upper_bound"][0]
+
+    if results is None:
+        results = restore_forecast_results(values, model)
+    forecast = results.get_forecast(steps=n_periods)
+    mean = np.asarray(forecast.predicted_mean, dtype=float)
+    conf_int = np.asarray(forecast.conf_int(), dtype=float)
+    lower, upper = _widen_bounds(mean, conf_int[:, 0], conf_int[:, 1])
+    return mean, lower, upper
 
 
 def generate_sarima_forecast(df: pd.DataFrame, date_col='date', value_col='quantity',
-                             n_periods=12, seasonal_period=12) -> pd.DataFrame:
+                             n_periods=12, seasonal_period=12, order_search=None,
+                             return_model=False, time_budget=None, workers=None):
     """
     Fit SARIMA model and forecast next n_periods months.
     Uses SARIMA confidence intervals but expands them to at least ±15% for visibility.
+    order_search picks the order search method ("grid" or "stepwise"); see
+    fit_forecast_model for the baseline fallbacks. workers is passed on to
+    the order search.
+    With return_model=True returns (forecast_df, model) where model is the
+    fit_forecast_model model (None if there was no data).
     """
-    if df.empty or len(df) < 12:
-        return pd.DataFrame(columns=[date_col, value_col, 'lower_bound', 'upper_bound'])
+    if df.empty:
+        empty = pd.DataFrame(columns=[date_col, value_col, 'lower_bound', 'upper_bound'])
+        return (empty, None) if return_model else empty
 
     df = df.sort_values(by=date_col).set_index(date_col)
-
-    # Find best SARIMA order
-    order, seasonal_order = find_best_sarima_order(df[value_col], seasonal_period=seasonal_period)
-
-    # Fit SARIMA
-    model = SARIMAX(df[value_col], order=order, seasonal_order=seasonal_order,
-                    enforce_stationarity=False, enforce_invertibility=False)
-    result = model.fit(disp=False)
-
-    # Forecast
-    forecast_obj = result.get_forecast(steps=n_periods)
-    forecast_mean = forecast_obj.predicted_mean
-    conf_int = forecast_obj.conf_int()
+    values = pd.to_numeric(df[value_col], errors='coerce').fillna(0).to_numpy()
+    model_info, results = fit_forecast_model(values, seasonal_period, order_search, time_budget, workers)
+    forecast_values, lower_bound, upper_bound = forecast_from_model(
+        values, model_info, n_periods, seasonal_period, results
+    )
 
     # Forecast dates
     last_date = df.index.max()
-    forecast_dates = [last_date + pd.DateOffset(months=i) for i in range(1, n_periods + 1)]
-
-    # Extract confidence intervals
-    lower_bound = conf_int.iloc[:, 0].values.clip(min=0)
-    upper_bound = conf_int.iloc[:, 1].values.clip(min=0)
-    forecast_values = forecast_mean.values
-
-    # Ensure bounds are meaningful: at least ±15% of the forecast value
-    # This prevents SARIMA's tight bounds from appearing invisible
-    for i in range(len(forecast_values)):
-        min_lower = forecast_values[i] * 0.85  # At least 15% below
-        max_upper = forecast_values[i] * 1.15  # At least 15% above
-        
-        if lower_bound[i] > min_lower:
-            lower_bound[i] = min_lower
-        if upper_bound[i] < max_upper:
-            upper_bound[i] = max_upper
-
     forecast_df = pd.DataFrame({
-        date_col: forecast_dates,
+        date_col: [last_date + pd.DateOffset(months=i) for i in range(1, n_periods + 1)],
         value_col: forecast_values,
         'lower_bound': lower_bound,
         'upper_bound': upper_bound
     })
+    return (forecast_df, model_info) if return_model else forecast_df
+
+
+# ============================================================
+# Baseline forecasters
+# ============================================================
+#
+# Cheap forecasters that run over many series at once: values is a
+# (series x months) array and starts holds the index of each series' first
+# month, so series of different lengths share one right-aligned matrix.
+# Each returns (forecast, sigma, eligible) where sigma is the standard error
+# per forecast step and eligible marks the series with enough history.
+
+MOVING_AVERAGE_WINDOW = 3
+HOLT_WINTERS_GRID = [
+    (alpha, beta, gamma)
+    for alpha in (0.1, 0.3, 0.5)
+    for beta in (0.05, 0.2)
+    for gamma in (0.1, 0.3)
+]
+# Months held back to pick the baseline method per series
+BASELINE_HOLDOUT = 6
+BASELINE_Z = 1.96
+
+
+def _masked_rmse(errors, valid):
+    """Root mean square of the valid errors per row (NaN where none are valid)"""
+    counts = valid.sum(axis=1)
+    sse = np.where(valid, errors, 0.0) ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sqrt(sse.sum(axis=1) / counts)
+
+
+def _active_std(values, starts):
+    """Standard deviation of each series over its own months"""
+    active = np.arange(values.shape[1]) >= starts[:, None]
+    counts = np.maximum(active.sum(axis=1), 1)
+    mean = np.where(active, values, 0.0).sum(axis=1) / counts
+    return np.sqrt((np.where(active, values - mean[:, None], 0.0) ** 2).sum(axis=1) / counts)
+
+
+def seasonal_naive_forecast(values, starts, n_periods, seasonal_period=12):
+    """Repeat the last season; needs one full season of history"""
+    n, T = values.shape
+    m = seasonal_period
+    eligible = T - starts >= m
+    if T < m:
+        return np.full((n, n_periods), np.nan), np.full((n, n_periods), np.nan), eligible
+
+    steps = np.arange(n_periods)
+    forecast = values[:, T - m + steps % m]
+
+    # Errors of last year's value as this year's forecast
+    errors = values[:, m:] - values[:, :-m]
+    sigma = _masked_rmse(errors, np.arange(T - m) >= starts[:, None])
+    sigma = np.where(np.isnan(sigma), _active_std(values, starts), sigma)
+    return forecast, sigma[:, None] * np.sqrt(steps // m + 1), eligible
+
+
+def moving_average_forecast(values, starts, n_periods, seasonal_period=12, window=MOVING_AVERAGE_WINDOW):
+    """Flat forecast at the mean of the last window months"""
+    n, T = values.shape
+    lengths = T - starts
+    eligible = lengths >= 1
+    windows = np.clip(np.minimum(window, lengths), 1, None)
+
+    sums = np.concatenate([np.zeros((n, 1)), np.cumsum(values, axis=1)], axis=1)
+    level = (sums[:, T] - sums[np.arange(n), T - windows]) / windows
+
+    # One-step errors of the trailing mean over each series' own months
+    if T > window:
+        trailing = (sums[:, window:T] - sums[:, :T - window]) / window
+        errors = values[:, window:] - trailing
+        sigma = _masked_rmse(errors, np.arange(window, T) >= (starts + window)[:, None])
+    else:
+        sigma = np.full(n, np.nan)
+    sigma = np.where(np.isnan(sigma), _active_std(values, starts), sigma)
+    return np.repeat(level[:, None], n_periods, axis=1), np.repeat(sigma[:, None], n_periods, axis=1), eligible
+
+
+def holt_winters_forecast(values, starts, n_periods, seasonal_period=12, grid=None):
+    """
+    Additive Holt-Winters; needs two full seasons of history. Every
+    (alpha, beta, gamma) in the grid is run for all series together and each
+    series keeps the one with the lowest one-step squared error.
+    """
+    grid = np.asarray(grid or HOLT_WINTERS_GRID, dtype=float)
+    n, T = values.shape
+    m = seasonal_period
+    eligible = T - starts >= 2 * m
+    forecast = np.full((n, n_periods), np.nan)
+    sigma = np.full((n, n_periods), np.nan)
+    rows = np.flatnonzero(eligible)
+    if len(rows) == 0:
+        return forecast, sigma, eligible
+
+    # Initial state from the first two seasons of each series
+    first = np.take_along_axis(values[rows], starts[rows, None] + np.arange(2 * m), axis=1)
+    level0 = first[:, :m].mean(axis=1)
+    trend0 = (first[:, m:].mean(axis=1) - level0) / m
+    # Seasonal terms indexed by calendar position (month index mod m)
+    season0 = np.empty((len(rows), m))
+    positions = (starts[rows, None] + np.arange(m)) % m
+    np.put_along_axis(season0, positions, first[:, :m] - level0[:, None], axis=1)
+
+    # One row per (parameter set, series)
+    k, r = len(grid), len(rows)
+    alpha, beta, gamma = (np.repeat(grid[:, i], r) for i in range(3))
+    y = np.tile(values[rows], (k, 1))
+    begin = np.tile(starts[rows], k) + m
+    level, trend, season = np.tile(level0, k), np.tile(trend0, k), np.tile(season0, (k, 1))
+    sse = np.zeros(k * r)
+
+    for t in range(int(begin.min()), T):
+        active = t >= begin
+        s = season[:, t % m]
+        error = y[:, t] - (level + trend + s)
+        new_level = alpha * (y[:, t] - s) + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, t % m] = np.where(active, gamma * (y[:, t] - new_level) + (1 - gamma) * s, s)
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+        sse += np.where(active, error ** 2, 0.0)
+
+    best = sse.reshape(k, r).argmin(axis=0)
+    pick = best * r + np.arange(r)
+    steps = np.arange(1, n_periods + 1)
+    forecast[rows] = (level[pick, None] + trend[pick, None] * steps
+                      + season[pick][:, (T - 1 + steps) % m])
+
+    # ETS(A,A,A) forecast variance: sigma^2 * (1 + sum of c_j^2 for j < h)
+    counts = T - begin[pick]
+    one_step = np.sqrt(sse[pick] / counts)
+    a, b, g = alpha[pick, None], beta[pick, None], gamma[pick, None]
+    c = a * (1 + steps[:-1] * b) + g * (steps[:-1] % m == 0)
+    variance = np.concatenate([np.ones((r, 1)), 1 + np.cumsum(c ** 2, axis=1)], axis=1)
+    sigma[rows] = one_step[:, None] * np.sqrt(variance)
+    return forecast, sigma, eligible
+
+
+# Method name -> forecaster; ties in the holdout go to the earlier (simpler) one
+BASELINE_METHODS = {
+    "moving_average": moving_average_forecast,
+    "seasonal_naive": seasonal_naive_forecast,
+    "holt_winters": holt_winters_forecast,
+}
+
+
+def _widen_bounds(values, lower, upper):
+    """Clip bounds at zero and widen them to at least ±15% of the forecast"""
+    lower = np.minimum(np.clip(lower, 0, None), values * 0.85)
+    upper = np.maximum(np.clip(upper, 0, None), values * 1.15)
+    return lower, upper
+
+
+def baseline_forecasts(values, n_periods=12, seasonal_period=12, starts=None):
+    """
+    Forecast many monthly series at once with the baseline forecasters.
+
+    values is a (series x months) array (a single series may be 1-D) and
+    starts the first month of each series (default 0). Each series uses the
+    method with the lowest error on its last BASELINE_HOLDOUT months, falling
+    back to the moving average when there is too little history to compare.
+    Returns {"method", "forecast", "lower_bound", "upper_bound"} arrays with
+    one row per series.
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n, T = values.shape
+    starts = np.zeros(n, dtype=int) if starts is None else np.asarray(starts, dtype=int)
+    names = list(BASELINE_METHODS)
+
+    errors = np.full((len(names), n), np.inf)
+    if T > BASELINE_HOLDOUT:
+        train, actual = values[:, :-BASELINE_HOLDOUT], values[:, -BASELINE_HOLDOUT:]
+        for i, name in enumerate(names):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                forecast, _, eligible = BASELINE_METHODS[name](train, starts, BASELINE_HOLDOUT, seasonal_period)
+            errors[i, eligible] = np.abs(forecast - actual).mean(axis=1)[eligible]
+    choice = errors.argmin(axis=0)
+
+    forecast = np.zeros((n, n_periods))
+    sigma = np.zeros((n, n_periods))
+    for i, name in enumerate(names):
+        rows = choice == i
+        if rows.any():
+            with np.errstate(invalid="ignore", divide="ignore"):
+                forecast[rows], sigma[rows], _ = BASELINE_METHODS[name](
+                    values[rows], starts[rows], n_periods, seasonal_period
+                )
+
+    forecast = np.clip(np.nan_to_num(forecast), 0, None)
+    sigma = np.nan_to_num(sigma)
+    lower, upper = _widen_bounds(forecast, forecast - BASELINE_Z * sigma, forecast + BASELINE_Z * sigma)
+    return {
+        "method": np.asarray(names)[choice],
+        "forecast": forecast,
+        "lower_bound": lower,
+        "upper_bound": upper
+    }
+
+
+# ============================================================
+# Per-item demand forecasting
+# ============================================================
+
+# Short candidate lists keep one item's fit cheap enough to run for thousands
+ITEM_SEASONAL_CANDIDATES = [
+    ((0, 1, 1), (0, 1, 1)),
+    ((1, 1, 0), (0, 1, 1)),
+    ((1, 1, 1), (0, 1, 1)),
+]
+ITEM_NONSEASONAL_CANDIDATES = [
+    ((0, 1, 1), None),
+    ((1, 1, 0), None),
+    ((1, 0, 0), None),
+]
+# Items with fewer months of history get a baseline forecast instead of SARIMA
+ITEM_MIN_HISTORY = 6
+
+
+def monthly_issue_matrix(transactions: pd.DataFrame, end=None) -> pd.DataFrame:
+    """
+    Monthly issued quantity per item from a long frame of transactions
+    (columns item_id, date, issue) in one groupby. Returns an item x month
+    frame with zero for months without issues, up to the end month.
+    """
+    if transactions.empty:
+        return pd.DataFrame()
+
+    frame = transactions.assign(
+        month=pd.to_datetime(transactions["date"], errors="coerce").dt.to_period("M").dt.to_timestamp(),
+        issue=pd.to_numeric(transactions["issue"], errors="coerce")
+    ).dropna(subset=["month", "issue"])
+    if frame.empty:
+        return pd.DataFrame()
+
+    matrix = frame.groupby(["item_id", "month"])["issue"].sum().unstack(fill_value=0)
+    last = pd.Timestamp(end).to_period("M").to_timestamp() if end is not None else matrix.columns.max()
+    months = pd.date_range(matrix.columns.min(), max(last, matrix.columns.max()), freq="MS")
+    return matrix.reindex(columns=months, fill_value=0).astype(float)
+
+
+def _first_issues(values):
+    """Index of each row's first non-zero month (the last 12 months for rows without any)"""
+    values = np.atleast_2d(values)
+    nonzero = values != 0
+    return np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), max(values.shape[1] - 12, 0))
+
+
+def _baseline_item_results(values, n_periods, seasonal_period):
+    """Baseline forecasts of item rows, formatted like forecast_item_series results"""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    fits = baseline_forecasts(values, n_periods, seasonal_period, starts=_first_issues(values))
+    return [
+        {
+            "method": str(fits["method"][row]),
+            "order": None,
+            "seasonal_order": None,
+            "aic": None,
+            "forecast": fits["forecast"][row].tolist(),
+            "lower_bound": fits["lower_bound"][row].tolist(),
+            "upper_bound": fits["upper_bound"][row].tolist()
+        }
+        for row in range(len(values))
+    ]
+
+
+def forecast_items_baseline(series, n_periods=12, seasonal_period=12):
+    """
+    Baseline forecasts of many item series ({item_id: values}, all the same
+    length) in one vectorized pass. Returns {item_id: result} like
+    forecast_items.
+    """
+    item_ids = list(series)
+    if not item_ids:
+        return {}
+    results = _baseline_item_results(np.vstack([series[item_id] for item_id in item_ids]),
+                                     n_periods, seasonal_period)
+    return dict(zip(item_ids, results))
+
+
+def forecast_item_series(values, n_periods=12, seasonal_period=12, fit_timeout=None):
+    """
+    Forecast one item's monthly series (runs in pool workers).
+    Leading months before the item's first issue are ignored; the lowest-AIC
+    candidate is used, falling back to the baseline forecasters when history
+    is too short or every fit fails.
+    """
+    history = np.asarray(values, dtype=float)
+    active = np.flatnonzero(history)
+    if len(active) == 0 or len(history) - active[0] < ITEM_MIN_HISTORY:
+        return _baseline_item_results(history, n_periods, seasonal_period)[0]
+    history = history[active[0]:]
+
+    if len(history) >= 2 * seasonal_period:
+        candidates = [(order, seasonal + (seasonal_period,)) for order, seasonal in ITEM_SEASONAL_CANDIDATES]
+    else:
+        candidates = [(order, (0, 0, 0, 0)) for order, _ in ITEM_NONSEASONAL_CANDIDATES]
+
+    # Off the main thread (the serial path in the threadpool) fits are not timed
+    use_timer = _can_time_fits(fit_timeout)
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_fit_timeout)
+
+    best = None
+    for order, seasonal_order in candidates:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, fit_timeout)
+        try:
+            result = SARIMAX(history, order=order, seasonal_order=seasonal_order,
+                             enforce_stationarity=False, enforce_invertibility=False).fit(disp=False)
+            if np.isfinite(result.aic) and (best is None or result.aic < best[2].aic):
+                best = (order, seasonal_order, result)
+        except Exception:
+            continue
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    if best is None:
+        return _baseline_item_results(history, n_periods, seasonal_period)[0]
+
+    order, seasonal_order, result = best
+    forecast = result.get_forecast(steps=n_periods)
+    mean = np.clip(np.asarray(forecast.predicted_mean, dtype=float), 0, None)
+    conf_int = np.asarray(forecast.conf_int(), dtype=float)
+    lower, upper = _widen_bounds(mean, conf_int[:, 0], conf_int[:, 1])
+    return {
+        "method": "sarima",
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "aic": float(result.aic),
+        "fits": len(candidates),
+        "forecast": mean.tolist(),
+        "lower_bound": lower.tolist(),
+        "upper_bound": upper.tolist()
+    }
+
+
+def forecast_items(series, n_periods=12, seasonal_period=12, workers=None, fit_timeout=None,
+                   time_budget=None):
+    """
+    Forecast many item series ({item_id: values}) with SARIMA across the
+    shared worker pool. Items not fitted within time_budget seconds (and
+    items whose worker failed) get a baseline forecast instead. Returns
+    {item_id: forecast_item_series result}.
+    """
+    workers = SARIMA_SEARCH_WORKERS if workers is None else workers
+    fit_timeout = SARIMA_FIT_TIMEOUT if fit_timeout is None else fit_timeout
+    deadline = time.monotonic() + time_budget if time_budget else None
+    item_ids = list(series)
+    results = {}
+
+    if workers <= 1:
+        for item_id in item_ids:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            try:
+                results[item_id] = forecast_item_series(series[item_id], n_periods, seasonal_period, fit_timeout)
+            except Exception as e:
+                print(f"[FORECAST] Item {item_id} failed: {e}")
+    else:
+        pool = get_search_pool(workers)
+        futures = {
+            item_id: pool.submit(forecast_item_series, list(series[item_id]), n_periods, seasonal_period, fit_timeout)
+            for item_id in item_ids
+        }
+        wait(futures.values(), timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        for item_id, future in futures.items():
+            if not future.done():
+                future.cancel()
+                continue
+            try:
+                results[item_id] = future.result()
+            except Exception as e:
+                print(f"[FORECAST] Item {item_id} failed: {e}")
+        # Items still being fitted past the budget would keep the workers busy
+        if not all(future.done() for future in futures.values()):
+            recycle_search_pool()
 
-    return forecast_df
+    missing = {item_id: series[item_id] for item_id in item_ids if item_id not in results}
+    if missing:
+        print(f"[FORECAST] {len(missing)} items fall back to baseline forecasts")
+        results.update(forecast_items_baseline(missing, n_periods, seasonal_period))
+    return results
@@ -9,8 +9,9 @@ from datetime import datetime
 from models.user import AccountCreate, AccountUpdate
 from services.auth_service import verify_token, hash_password, generate_secure_password
 from services.log_service import create_log_entry
+from services.delta_service import record_tombstone
 from services.email_service import send_email
-from database import get_accounts_collection
+from database import get_async_accounts_collection
 from dependencies import require_admin, get_current_user  # ← CHANGED: Import get_current_user for check-status
 
 router = APIRouter(prefix="/api/accounts", tags=["accounts"])
@@ -42,8 +43,8 @@ async def get_all_accounts(token: str = Depends(require_admin)):
     """Get all accounts - admin only"""
     payload = verify_token(token)
     
-    collection = get_accounts_collection()
-    accounts = [account_helper(account) for account in collection.find()]
+    collection = get_async_accounts_collection()
+    accounts = [account_helper(account) async for account in collection.find()]
     return {"success": True, "message": f"Found {len(accounts)} accounts", "data": accounts}
 
 @router.post("")
@@ -57,10 +58,10 @@ async def create_account(
     username = payload["username"]
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
-    collection = get_accounts_collection()
+    collection = get_async_accounts_collection()
     
     # Check if username or email exists
-    existing_user = collection.find_one({
+    existing_user = await collection.find_one({
         "$or": [
             {"username": account.username},
             {"email": account.email}
@@ -95,8 +96,8 @@ async def create_account(
         "updated_at": datetime.utcnow()
     }
     
-    result = collection.insert_one(account_dict)
-    created_account = collection.find_one({"_id": result.inserted_id})
+    result = await collection.insert_one(account_dict)
+    created_account = await collection.find_one({"_id": result.inserted_id})
     
     # Send password email
     email_subject = "MEAMS Account Created - Login Credentials"
@@ -153,8 +154,8 @@ async def update_account(
     if not ObjectId.is_valid(account_id):
         raise HTTPException(status_code=400, detail="Invalid account ID format")
     
-    collection = get_accounts_collection()
-    account_before = collection.find_one({"_id": ObjectId(account_id)})
+    collection = get_async_accounts_collection()
+    account_before = await collection.find_one({"_id": ObjectId(account_id)})
     
     if not account_before:
         raise HTTPException(status_code=404, detail="Account not found")
@@ -182,7 +183,7 @@ async def update_account(
         
         if or_conditions:
             conflict_query["$or"] = or_conditions
-            existing_account = collection.find_one(conflict_query)
+            existing_account = await collection.find_one(conflict_query)
             
             if existing_account:
                 if "username" in update_data and existing_account.get("username") == update_data["username"]:
@@ -192,8 +193,8 @@ async def update_account(
     
     update_data["updated_at"] = datetime.utcnow()
     
-    collection.update_one({"_id": ObjectId(account_id)}, {"$set": update_data})
-    updated_account = collection.find_one({"_id": ObjectId(account_id)})
+    await collection.update_one({"_id": ObjectId(account_id)}, {"$set": update_data})
+    updated_account = await collection.find_one({"_id": ObjectId(account_id)})
     
     status_change = ""
     if "status" in update_data:
@@ -226,8 +227,8 @@ async def delete_account(
     if not ObjectId.is_valid(account_id):
         raise HTTPException(status_code=400, detail="Invalid account ID format")
     
-    collection = get_accounts_collection()
-    account_to_delete = collection.find_one({"_id": ObjectId(account_id)})
+    collection = get_async_accounts_collection()
+    account_to_delete = await collection.find_one({"_id": ObjectId(account_id)})
     
     if not account_to_delete:
         raise HTTPException(status_code=404, detail="Account not found")
@@ -236,7 +237,8 @@ async def delete_account(
     if account_to_delete.get("username") == username:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
-    collection.delete_one({"_id": ObjectId(account_id)})
+    await collection.delete_one({"_id": ObjectId(account_id)})
+    await record_tombstone("accounts", account_to_delete, "username")
     
     await create_log_entry(
         username,
@@ -261,8 +263,8 @@ async def reset_account_password(
     if not ObjectId.is_valid(account_id):
         raise HTTPException(status_code=400, detail="Invalid account ID format")
     
-    collection = get_accounts_collection()
-    account = collection.find_one({"_id": ObjectId(account_id)})
+    collection = get_async_accounts_collection()
+    account = await collection.find_one({"_id": ObjectId(account_id)})
     
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
@@ -271,7 +273,7 @@ async def reset_account_password(
     new_password = generate_secure_password()
     password_hash = hash_password(new_password)
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(account_id)},
         {
             "$set": {
@@ -336,8 +338,8 @@ async def check_account_status(token: str = Depends(get_current_user)):  # ← C
             }
         
         # Check database users
-        collection = get_accounts_collection()
-        user = collection.find_one({"username": username})
+        collection = get_async_accounts_collection()
+        user = await collection.find_one({"username": username})
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -16,7 +16,7 @@ from services.auth_service import (
 )
 from services.log_service import create_log_entry
 from services.email_service import send_password_reset_email  # FIXED: Import correct function
-from database import get_accounts_collection
+from database import get_async_accounts_collection
 from dependencies import get_current_user
 from config import HARDCODED_USERS, FRONTEND_URL
 
@@ -43,7 +43,7 @@ async def login(credentials: LoginRequest, request: Request):
     """Login endpoint with account status check"""
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
-    user = authenticate_user(credentials.username, credentials.password)
+    user = await authenticate_user(credentials.username, credentials.password)
     
     if not user:
         await create_log_entry(
@@ -70,7 +70,7 @@ async def login(credentials: LoginRequest, request: Request):
             detail="Your account has been deactivated. Please contact an administrator."
         )
     
-    update_last_login(credentials.username)
+    await update_last_login(credentials.username)
     
     await create_log_entry(
         credentials.username,
@@ -118,7 +118,7 @@ async def refresh_token(request: Request, token: str = Depends(get_current_user)
         role = payload["role"]
         
         # Get user from database to verify account is still active
-        accounts_collection = get_accounts_collection()
+        accounts_collection = get_async_accounts_collection()
         
         # Check if it's a hardcoded user or database user
         if username in HARDCODED_USERS:
@@ -129,7 +129,7 @@ async def refresh_token(request: Request, token: str = Depends(get_current_user)
                 "_id": "hardcoded"
             }
         else:
-            user = accounts_collection.find_one({"username": username})
+            user = await accounts_collection.find_one({"username": username})
         
         # Verify user still exists and is active
         if not user:
@@ -204,8 +204,8 @@ async def change_password_api(
     username = payload["username"]
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
-    accounts_collection = get_accounts_collection()
-    user = accounts_collection.find_one({"username": username})
+    accounts_collection = get_async_accounts_collection()
+    user = await accounts_collection.find_one({"username": username})
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -215,7 +215,7 @@ async def change_password_api(
     
     new_password_hash = hash_password(password_data.new_password)
     
-    accounts_collection.update_one(
+    await accounts_collection.update_one(
         {"username": username},
         {
             "$set": {
@@ -239,10 +239,10 @@ async def change_password_api(
 async def forgot_password(request_data: ForgotPasswordRequest, request: Request):
     """Send password reset email"""
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Find user by email
-    user = accounts_collection.find_one({"email": request_data.email})
+    user = await accounts_collection.find_one({"email": request_data.email})
     
     if not user:
         # Security: Don't reveal if email doesn't exist
@@ -257,7 +257,7 @@ async def forgot_password(request_data: ForgotPasswordRequest, request: Request)
     reset_expires = datetime.utcnow() + timedelta(hours=1)
     
     # Save token to database
-    accounts_collection.update_one(
+    await accounts_collection.update_one(
         {"_id": user["_id"]},
         {
             "$set": {
@@ -300,9 +300,9 @@ async def forgot_password(request_data: ForgotPasswordRequest, request: Request)
 @router.get("/api/auth/validate-reset-token/{token}")
 async def validate_reset_token(token: str):
     """Validate password reset token"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
-    user = accounts_collection.find_one({
+    user = await accounts_collection.find_one({
         "password_reset_token": token,
         "password_reset_expires": {"$gt": datetime.utcnow()}
     })
@@ -322,10 +322,10 @@ async def validate_reset_token(token: str):
 async def reset_password(request_data: ResetPasswordRequest, request: Request):
     """Reset password using token"""
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Find user with valid token
-    user = accounts_collection.find_one({
+    user = await accounts_collection.find_one({
         "password_reset_token": request_data.token,
         "password_reset_expires": {"$gt": datetime.utcnow()}
     })
@@ -342,7 +342,7 @@ async def reset_password(request_data: ResetPasswordRequest, request: Request):
     new_password_hash = hash_password(request_data.new_password)
     
     # Update password and remove reset token
-    accounts_collection.update_one(
+    await accounts_collection.update_one(
         {"_id": user["_id"]},
         {
             "$set": {
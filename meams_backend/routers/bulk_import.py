@@ -5,15 +5,17 @@ OPTIMIZED bulk_import.py
 KEY FIX: Lazy import of pandas only when needed
 """
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request
+from bson import ObjectId
 import io
 import os
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from services.auth_service import verify_token
 from services.log_service import create_log_entry
-from services.supply_service import supply_helper
-from services.equipment_service import equipment_helper
-from database import get_supplies_collection, get_equipment_collection
+from database import get_async_supplies_collection, get_async_equipment_collection
+from config import BULK_IMPORT_BATCH_SIZE, MAX_BULK_IMPORT_BATCH_SIZE
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api", tags=["bulk_import"])
@@ -156,21 +158,114 @@ def validate_and_transform_equipment(item_data: dict, index: int, pd) -> tuple:
     
     return transformed_item, errors
 
+def plan_bulk_writes(rows: List[Tuple[int, dict]], existing: Dict[str, dict], import_type: str) -> List[Tuple[object, List[int], dict]]:
+    """
+    Turn validated rows into write operations, one per itemCode.
+
+    Rows sharing an itemCode are merged first (supplies add up their
+    quantities, equipment keeps the last row's fields), so the batches can be
+    sent unordered without two operations racing on the same item.
+    Returns a list of (operation, row_numbers, summary).
+    """
+    grouped = {}
+    for row_number, item in rows:
+        code = item["itemCode"]
+        if code not in grouped:
+            grouped[code] = {"rows": [row_number], "item": dict(item), "quantity": item.get("quantity", 0)}
+            continue
+        group = grouped[code]
+        group["rows"].append(row_number)
+        if import_type == "supplies":
+            group["quantity"] += item.get("quantity", 0)
+        else:
+            group["item"] = {**item, "created_at": group["item"]["created_at"]}
+
+    now = datetime.utcnow()
+    operations = []
+    for code, group in grouped.items():
+        item = group["item"]
+        existing_item = existing.get(code)
+
+        if existing_item is None:
+            if import_type == "supplies":
+                item["quantity"] = group["quantity"]
+            # Assign the _id client-side so the result needs no re-read
+            item["_id"] = ObjectId()
+            operation = InsertOne(item)
+            summary = {"_id": item["_id"], "action": "inserted"}
+        elif import_type == "supplies":
+            # For supplies, increment quantity
+            operation = UpdateOne(
+                {"_id": existing_item["_id"]},
+                {"$inc": {"quantity": group["quantity"]}, "$set": {"updated_at": now}}
+            )
+            summary = {"_id": existing_item["_id"], "action": "updated"}
+        else:
+            # For equipment, update all fields (keeping the original created_at)
+            fields = {k: v for k, v in item.items() if k != "created_at"}
+            operation = UpdateOne(
+                {"_id": existing_item["_id"]},
+                {"$set": {**fields, "updated_at": now}}
+            )
+            summary = {"_id": existing_item["_id"], "action": "updated"}
+
+        summary.update({
+            "_id": str(summary["_id"]),
+            "itemCode": code,
+            "name": item.get("name", ""),
+            "rows": group["rows"]
+        })
+        operations.append((operation, group["rows"], summary))
+    return operations
+
+async def run_bulk_writes(collection, operations: List[Tuple[object, List[int], dict]], batch_size: int) -> Tuple[List[dict], List[str]]:
+    """
+    Send operations as unordered bulk_write batches.
+    Returns (applied summaries, per-row error messages).
+    """
+    applied = []
+    errors = []
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        failed = {}
+        try:
+            await collection.bulk_write([op for op, _, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                failed[write_error["index"]] = write_error.get("errmsg", "Write failed")
+
+        for index, (_, rows, summary) in enumerate(batch):
+            if index in failed:
+                errors.extend(f"Row {row}: {failed[index]}" for row in rows)
+            else:
+                applied.append(summary)
+    return applied, errors
+
 @router.post("/bulk-import")
 async def bulk_import(
     file: UploadFile = File(...),
     import_type: str = Form("supplies"),
+    batch_size: Optional[int] = Form(None),
     request: Request = None,
     token: str = Depends(get_current_user)
 ):
     """Bulk import supplies or equipment from CSV/Excel file
     
-    PERFORMANCE NOTE: Pandas is imported lazily here to avoid blocking app startup
+    PERFORMANCE NOTE: Pandas is imported lazily here to avoid blocking app startup.
+    Existing itemCodes are resolved with a single $in query and writes are sent
+    as unordered bulk_write batches of batch_size operations.
     """
     payload = verify_token(token)
     username = payload["username"]
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
+    batch_size = batch_size or BULK_IMPORT_BATCH_SIZE
+    if batch_size < 1 or batch_size > MAX_BULK_IMPORT_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"batch_size must be between 1 and {MAX_BULK_IMPORT_BATCH_SIZE}"
+        )
+    
     try:
         # 🚀 LAZY IMPORT - Only import pandas when this endpoint is called
         import pandas as pd
@@ -204,7 +299,7 @@ async def bulk_import(
         df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
         raw_data = df.to_dict('records')
         
-        valid_items = []
+        valid_rows = []
         all_errors = []
         
         # Validate and transform each row
@@ -224,61 +319,42 @@ async def bulk_import(
                 )
             
             if transformed_item:
-                valid_items.append(transformed_item)
+                valid_rows.append((index + 1, transformed_item))
             all_errors.extend(errors)
         
-        if not valid_items:
+        if not valid_rows:
             raise HTTPException(status_code=400, detail="No valid items found to import")
         
-        # Insert items into database
-        saved_items = []
-        collection = get_supplies_collection() if import_type == "supplies" else get_equipment_collection()
-        helper_function = supply_helper if import_type == "supplies" else equipment_helper
+        collection = get_async_supplies_collection() if import_type == "supplies" else get_async_equipment_collection()
+        
+        # Resolve every existing itemCode in one round trip
+        item_codes = list({item["itemCode"] for _, item in valid_rows})
+        existing = {
+            doc["itemCode"]: doc
+            async for doc in collection.find({"itemCode": {"$in": item_codes}}, {"itemCode": 1, "name": 1})
+        }
+        
+        operations = plan_bulk_writes(valid_rows, existing, import_type)
+        saved_items, write_errors = await run_bulk_writes(collection, operations, batch_size)
+        all_errors.extend(write_errors)
         
-        for item in valid_items:
-            try:
-                # Check if item exists by itemCode
-                existing_item = collection.find_one({"itemCode": item["itemCode"]})
-                
-                if existing_item:
-                    # Update existing item
-                    if import_type == "supplies":
-                        # For supplies, increment quantity
-                        collection.update_one(
-                            {"_id": existing_item["_id"]},
-                            {
-                                "$inc": {"quantity": item["quantity"]},
-                                "$set": {"updated_at": datetime.utcnow()}
-                            }
-                        )
-                    else:
-                        # For equipment, update all fields
-                        collection.update_one(
-                            {"_id": existing_item["_id"]},
-                            {"$set": {**item, "updated_at": datetime.utcnow()}}
-                        )
-                    
-                    updated_item = collection.find_one({"_id": existing_item["_id"]})
-                    saved_items.append(helper_function(updated_item))
-                else:
-                    # Insert new item
-                    result = collection.insert_one(item)
-                    created_item = collection.find_one({"_id": result.inserted_id})
-                    saved_items.append(helper_function(created_item))
-            except Exception as e:
-                print(f"Error saving item: {e}")
+        inserted_count = sum(1 for item in saved_items if item["action"] == "inserted")
+        updated_count = len(saved_items) - inserted_count
+        imported_rows = sum(len(item["rows"]) for item in saved_items)
         
         await create_log_entry(
             username,
             f"Bulk imported {import_type}.",
-            f"Imported {len(saved_items)} {import_type} from file: {file.filename}",
+            f"Imported {imported_rows} {import_type} from file: {file.filename}",
             client_ip
         )
         
         return {
             "success": True,
-            "message": f"Successfully imported {len(saved_items)} {import_type} items",
-            "imported_count": len(saved_items),
+            "message": f"Successfully imported {imported_rows} {import_type} items",
+            "imported_count": imported_rows,
+            "inserted_count": inserted_count,
+            "updated_count": updated_count,
             "error_count": len(all_errors),
             "errors": all_errors,
             "imported_items": saved_items
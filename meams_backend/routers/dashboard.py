@@ -6,7 +6,7 @@ Uses database indices for faster queries
 """
 from fastapi import APIRouter, Depends
 from datetime import datetime
-from database import get_supplies_collection, get_equipment_collection
+from database import get_async_supplies_collection, get_async_equipment_collection
 from services.auth_service import verify_token
 from dependencies import get_current_user
 from functools import lru_cache
@@ -18,8 +18,8 @@ router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 _cache_timestamp = {}
 _cache_data = {}
 
-def get_cached_stats(cache_key: str, compute_func, ttl_seconds: int = 30):
-    """Simple time-based cache"""
+async def get_cached_stats(cache_key: str, compute_func, ttl_seconds: int = 30):
+    """Simple time-based cache (compute_func is an async callable)"""
     now = datetime.utcnow().timestamp()
     
     if cache_key in _cache_timestamp:
@@ -27,7 +27,7 @@ def get_cached_stats(cache_key: str, compute_func, ttl_seconds: int = 30):
             return _cache_data[cache_key]
     
     # Cache miss or expired - recompute
-    result = compute_func()
+    result = await compute_func()
     _cache_data[cache_key] = result
     _cache_timestamp[cache_key] = now
     return result
@@ -37,12 +37,12 @@ async def get_dashboard_stats(token: str = Depends(get_current_user)):
     """Get aggregated dashboard statistics - optimized with caching"""
     verify_token(token)
     
-    def compute_stats():
-        supplies_collection = get_supplies_collection()
-        equipment_collection = get_equipment_collection()
+    async def compute_stats():
+        supplies_collection = get_async_supplies_collection()
+        equipment_collection = get_async_equipment_collection()
         
         # Optimized aggregation pipeline with $facet for parallel processing
-        supplies_stats = list(supplies_collection.aggregate([
+        supplies_stats = await supplies_collection.aggregate([
             {
                 "$facet": {
                     "overview": [
@@ -65,9 +65,9 @@ async def get_dashboard_stats(token: str = Depends(get_current_user)):
                     ]
                 }
             }
-        ]))
+        ]).to_list(length=None)
         
-        equipment_stats = list(equipment_collection.aggregate([
+        equipment_stats = await equipment_collection.aggregate([
             {
                 "$facet": {
                     "overview": [
@@ -91,7 +91,7 @@ async def get_dashboard_stats(token: str = Depends(get_current_user)):
                     ]
                 }
             }
-        ]))
+        ]).to_list(length=None)
         
         # Process supplies data
         supplies_status_dist = {}
@@ -136,7 +136,7 @@ async def get_dashboard_stats(token: str = Depends(get_current_user)):
         }
     
     # Use cached stats (30 second TTL)
-    stats = get_cached_stats("dashboard_stats", compute_stats, ttl_seconds=30)
+    stats = await get_cached_stats("dashboard_stats", compute_stats, ttl_seconds=30)
     
     return {
         "success": True,
@@ -151,21 +151,21 @@ async def get_recent_supplies(token: str = Depends(get_current_user), limit: int
     """Get most recently added supplies - cached"""
     verify_token(token)
     
-    def compute_recent():
-        supplies_collection = get_supplies_collection()
+    async def compute_recent():
+        supplies_collection = get_async_supplies_collection()
         # Only fetch necessary fields for better performance
-        recent = list(supplies_collection.find(
+        recent = await supplies_collection.find(
             {},
             {
                 "name": 1, "category": 1, "quantity": 1, 
                 "status": 1, "created_at": 1, "itemCode": 1
             }
-        ).sort("created_at", -1).limit(limit))
+        ).sort("created_at", -1).limit(limit).to_list(length=limit)
         
         from services.supply_service import supply_helper
         return [supply_helper(s) for s in recent]
     
-    data = get_cached_stats(f"recent_supplies_{limit}", compute_recent, ttl_seconds=15)
+    data = await get_cached_stats(f"recent_supplies_{limit}", compute_recent, ttl_seconds=15)
     
     return {
         "success": True,
@@ -177,21 +177,21 @@ async def get_recent_equipment(token: str = Depends(get_current_user), limit: in
     """Get most recently added equipment - cached"""
     verify_token(token)
     
-    def compute_recent():
-        equipment_collection = get_equipment_collection()
+    async def compute_recent():
+        equipment_collection = get_async_equipment_collection()
         # Only fetch necessary fields
-        recent = list(equipment_collection.find(
+        recent = await equipment_collection.find(
             {},
             {
                 "name": 1, "category": 1, "quantity": 1, 
                 "status": 1, "created_at": 1, "itemCode": 1, "amount": 1
             }
-        ).sort("created_at", -1).limit(limit))
+        ).sort("created_at", -1).limit(limit).to_list(length=limit)
         
         from services.equipment_service import equipment_helper
         return [equipment_helper(e) for e in recent]
     
-    data = get_cached_stats(f"recent_equipment_{limit}", compute_recent, ttl_seconds=15)
+    data = await get_cached_stats(f"recent_equipment_{limit}", compute_recent, ttl_seconds=15)
     
     return {
         "success": True,
@@ -11,16 +11,18 @@ import asyncio
 import json
 from datetime import datetime
 from fastapi.responses import HTMLResponse
-from database import get_equipment_collection
+from database import get_async_equipment_collection
 from services.equipment_service import equipment_helper
 from models.equipment import EquipmentCreate, EquipmentUpdate
 from services.equipment_service import (
-    get_all_equipment,
+    list_equipment_page,
     create_equipment,
     get_equipment_by_id,
     update_equipment,
     delete_equipment,
     add_equipment_image,
+    get_equipment_image,
+    get_equipment_image_data_uri,
     update_equipment_repair,
     add_equipment_document,
     get_equipment_documents,
@@ -39,11 +41,40 @@ router = APIRouter(prefix="/api/equipment", tags=["equipment"])
 scan_events = {}
 
 @router.get("")
-async def list_equipment(token: str = Depends(get_current_user)):
-    """Get all equipment"""
+async def list_equipment(
+    token: str = Depends(get_current_user),
+    view: str = "full",
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: Optional[str] = None
+):
+    """Get equipment with server-side filtering, sorting and cursor pagination
+
+    view=summary returns a compact row per item (has_image, document_count,
+    repair_count, last_repair) without image data, documents or repair
+    history; use the per-item endpoints to fetch those.
+    sort is a field name, prefixed with '-' for descending (default -created_at).
+    Pass next_cursor back as `after` to fetch the following page.
+    """
     verify_token(token)
-    equipment_list = get_all_equipment()
-    return {"success": True, "message": f"Found {len(equipment_list)} equipment items", "data": equipment_list}
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="Invalid view. Must be 'full' or 'summary'")
+    
+    equipment_list, next_cursor = await list_equipment_page(
+        category=category, status=status, location=location, q=q,
+        sort=sort, limit=limit, after=after, summary=view == "summary"
+    )
+    return {
+        "success": True,
+        "message": f"Found {len(equipment_list)} equipment items",
+        "data": equipment_list,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
 
 @router.post("")
 async def add_new_equipment(
@@ -56,7 +87,7 @@ async def add_new_equipment(
     username = payload["username"]
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
-    created_equipment = create_equipment(equipment.dict())
+    created_equipment = await create_equipment(equipment.dict())
     
     await create_log_entry(
         username,
@@ -74,7 +105,7 @@ async def get_single_equipment(equipment_id: str, token: str = Depends(get_curre
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    equipment = get_equipment_by_id(equipment_id)
+    equipment = await get_equipment_by_id(equipment_id)
     return {"success": True, "message": "Equipment found", "data": equipment}
 
 # NEW: QR Code Scan Endpoint
@@ -89,7 +120,7 @@ async def scan_equipment(equipment_id: str):
     
     try:
         # Fetch current equipment data
-        equipment = get_equipment_by_id(equipment_id)
+        equipment = await get_equipment_by_id(equipment_id)
         
         # Create scan event data
         scan_data = {
@@ -191,7 +222,7 @@ async def update_existing_equipment(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    updated_equipment = update_equipment(equipment_id, equipment_update.dict(exclude_none=True))
+    updated_equipment = await update_equipment(equipment_id, equipment_update.dict(exclude_none=True))
     
     await create_log_entry(
         username,
@@ -216,7 +247,7 @@ async def remove_equipment(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    deleted_equipment = delete_equipment(equipment_id)
+    deleted_equipment = await delete_equipment(equipment_id)
     
     await create_log_entry(
         username,
@@ -253,6 +284,14 @@ async def upload_image(
     
     return {"success": True, "message": "Image uploaded successfully", "data": updated_equipment}
 
+@router.get("/{equipment_id}/image")
+async def get_image(equipment_id: str, token: str = Depends(get_current_user)):
+    """Get equipment image"""
+    if not ObjectId.is_valid(equipment_id):
+        raise HTTPException(status_code=400, detail="Invalid equipment ID format")
+    
+    return await get_equipment_image(equipment_id)
+
 @router.put("/{equipment_id}/report")
 async def add_equipment_report(
     equipment_id: str,
@@ -274,13 +313,13 @@ async def add_equipment_report(
     if not report_data.get("reportDetails") or not report_data.get("reportDetails").strip():
         raise HTTPException(status_code=400, detail="Report details are required")
     
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
+    equipment = await collection.find_one({"_id": ObjectId(equipment_id)})
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
-    update_result = collection.update_one(
+    update_result = await collection.update_one(
         {"_id": ObjectId(equipment_id)},
         {
             "$set": {
@@ -295,7 +334,7 @@ async def add_equipment_report(
     if update_result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to update equipment with report")
     
-    updated_equipment = collection.find_one({"_id": ObjectId(equipment_id)})
+    updated_equipment = await collection.find_one({"_id": ObjectId(equipment_id)})
     
     if not updated_equipment:
         raise HTTPException(status_code=404, detail="Equipment not found after update")
@@ -330,7 +369,7 @@ async def update_equipment_repair_route(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID")
     
-    updated_equipment = update_equipment_repair(equipment_id, repair_data)
+    updated_equipment = await update_equipment_repair(equipment_id, repair_data)
     
     await create_log_entry(
         username,
@@ -359,7 +398,7 @@ async def get_lcc_analysis(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    lcc_data = calculate_lcc_analysis(equipment_id)
+    lcc_data = await calculate_lcc_analysis(equipment_id)
     
     await create_log_entry(
         username,
@@ -410,7 +449,7 @@ async def list_documents(equipment_id: str, token: str = Depends(get_current_use
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    documents = get_equipment_documents(equipment_id)
+    documents = await get_equipment_documents(equipment_id)
     
     return {
         "success": True,
@@ -428,7 +467,7 @@ async def download_document(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    return get_equipment_document(equipment_id, document_index)
+    return await get_equipment_document(equipment_id, document_index)
 
 @router.delete("/{equipment_id}/documents/{document_index}")
 async def remove_document(
@@ -445,7 +484,7 @@ async def remove_document(
     if not ObjectId.is_valid(equipment_id):
         raise HTTPException(status_code=400, detail="Invalid equipment ID format")
     
-    updated_equipment = delete_equipment_document(equipment_id, document_index)
+    updated_equipment = await delete_equipment_document(equipment_id, document_index)
     
     await create_log_entry(
         username,
@@ -494,7 +533,7 @@ async def view_equipment_qr(equipment_id: str, authorization: Optional[str] = He
         )
     
     # Fetch CURRENT data from database
-    equipment = get_equipment_by_id(equipment_id)
+    equipment = await get_equipment_by_id(equipment_id)
  
     if not equipment:
         return HTMLResponse(
@@ -502,13 +541,9 @@ async def view_equipment_qr(equipment_id: str, authorization: Optional[str] = He
              status_code=404
     )
 
-    # FIX IMAGE DATA FORMAT FOR QR SCAN PAGE
+    # QR scan page embeds the image as a data: URI
+    equipment['image_data'] = await get_equipment_image_data_uri(equipment_id)
     if equipment.get('image_data'):
-        image_data = equipment['image_data']
-        # If it doesn't start with 'data:', add the proper prefix
-        if not image_data.startswith('data:'):
-           content_type = equipment.get('image_content_type', 'image/jpeg')
-           equipment['image_data'] = f"data:{content_type};base64,{image_data}"
         print(f"✅ Image ready for display: {equipment.get('image_filename', 'unknown')}")
     else:
      print(f"⚠️ No image for equipment: {equipment['name']}")
@@ -848,7 +883,7 @@ async def view_full_repair_history(equipment_id: str, authorization: Optional[st
         )
     
     # Fetch equipment data
-    equipment = get_equipment_by_id(equipment_id)
+    equipment = await get_equipment_by_id(equipment_id)
     
     if not equipment:
         return HTMLResponse(
@@ -1097,7 +1132,7 @@ async def verify_scan_access(credentials: dict):
     """
     from services.auth_service import authenticate_user, create_access_token
     from datetime import timedelta
-    from database import get_accounts_collection
+    from database import get_async_accounts_collection
     
     identifier = credentials.get('identifier')  # Can be email OR username
     password = credentials.get('password')
@@ -1105,10 +1140,10 @@ async def verify_scan_access(credentials: dict):
     if not identifier or not password:
         raise HTTPException(status_code=400, detail="Username/Email and password required")
     
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Try to find user by email OR username
-    user_doc = accounts_collection.find_one({
+    user_doc = await accounts_collection.find_one({
         "$or": [
             {"email": identifier},
             {"username": identifier}
@@ -1120,7 +1155,7 @@ async def verify_scan_access(credentials: dict):
     
     # Get username and authenticate
     username = user_doc.get('username')
-    user = authenticate_user(username, password)
+    user = await authenticate_user(username, password)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
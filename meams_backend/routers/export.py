@@ -1,293 +1,391 @@
 """
 Export router - handles data export functionality
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from datetime import datetime
-import zipfile
-import io
-import base64
+from typing import Optional
+import json
 
 from services.auth_service import verify_token
-from services.log_service import create_log_entry
 from database import (
-    get_supplies_collection,
-    get_equipment_collection,
-    get_accounts_collection,
-    get_logs_collection
+    get_async_supplies_collection,
+    get_async_equipment_collection,
+    get_async_accounts_collection,
+    get_async_logs_collection,
+    get_async_historical_supplies_forecast_collection,
+    get_async_historical_equipment_forecast_collection
 )
-from services.supply_service import supply_helper
-from services.equipment_service import equipment_helper
+from services.export_service import (
+    SUPPLY_EXPORT_COLUMNS,
+    EQUIPMENT_EXPORT_COLUMNS,
+    ACCOUNT_EXPORT_COLUMNS,
+    LOG_EXPORT_COLUMNS,
+    HISTORY_EXPORT_COLUMNS,
+    column_header,
+    document_rows,
+    stream_csv,
+    csv_response,
+    attachment_response,
+    build_zip_export,
+    build_xlsx_export,
+    iter_file,
+    XLSX_MEDIA_TYPE
+)
+from services.columnar_export import (
+    COLUMNAR_FORMATS,
+    SUPPLY_COLUMNAR_SCHEMA,
+    EQUIPMENT_COLUMNAR_SCHEMA,
+    LOG_COLUMNAR_SCHEMA,
+    HISTORY_COLUMNAR_SCHEMA,
+    build_columnar_export
+)
+from services.log_service import create_log_entry, build_logs_query
+from services.delta_service import fetch_delta
+from services.supply_service import supply_helper, BLOB_FIELDS_PROJECTION as SUPPLY_BLOB_FIELDS
+from services.equipment_service import equipment_helper, BLOB_FIELDS_PROJECTION as EQUIPMENT_BLOB_FIELDS
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
-def escape_csv_field(field):
-    """Escape CSV field for proper formatting"""
-    field = str(field).replace('"', '""')
-    if ',' in field or '"' in field or '\n' in field:
-        field = f'"{field}"'
-    return field
+EXPORT_FORMATS = ("csv", "xlsx") + tuple(COLUMNAR_FORMATS)
+
+HISTORY_COLLECTIONS = {
+    "supplies": get_async_historical_supplies_forecast_collection,
+    "equipment": get_async_historical_equipment_forecast_collection,
+}
+
+# dataset -> (collection, formatter, projection, admin only)
+DELTA_DATASETS = {
+    "supplies": (get_async_supplies_collection, supply_helper, SUPPLY_BLOB_FIELDS, False),
+    "equipment": (get_async_equipment_collection, equipment_helper, EQUIPMENT_BLOB_FIELDS, False),
+    "accounts": (get_async_accounts_collection, None, {"password_hash": 0, "profile_picture": 0}, True),
+}
+
+def _timestamped(prefix: str, extension: str = "csv") -> str:
+    return f"{prefix}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+def _require_admin(payload: dict):
+    if payload.get("role", "staff") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
+
+async def _buffered_csv(columns, rows) -> str:
+    """Whole CSV as a string, for the JSON export endpoints"""
+    return b"".join([chunk async for chunk in stream_csv(column_header(columns), rows)]).decode("utf-8")
+
+async def _file_response(collection, columns, schema, export_format: str, prefix: str, username: str,
+                         action: str, label: str, query: Optional[dict] = None, sort: Optional[list] = None):
+    """Excel (xlsx), Parquet or Arrow file download of a collection"""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    
+    if export_format == "xlsx":
+        rows = document_rows(collection, columns, query, sort=sort)
+        archive, count = await build_xlsx_export(column_header(columns), rows, label.title())
+        extension, media_type, format_name = "xlsx", XLSX_MEDIA_TYPE, "Excel"
+    else:
+        archive, count = await build_columnar_export(collection, schema, export_format, query, sort)
+        (extension, media_type), format_name = COLUMNAR_FORMATS[export_format], export_format.title()
+    
+    await create_log_entry(username, action, f"Exported {count} {label} to {format_name}", "system")
+    return attachment_response(iter_file(archive), _timestamped(prefix, extension), media_type)
+
+# Streaming CSV downloads (text/csv straight from a projected cursor)
+
+@router.get("/supplies/csv")
+async def stream_supplies_csv(token: str = Depends(get_current_user)):
+    """Download supplies as a streamed CSV file"""
+    payload = verify_token(token)
+    username = payload["username"]
+    
+    async def on_complete(count):
+        await create_log_entry(username, "Exported supplies data.", f"Exported {count} supplies to CSV", "system")
+    
+    rows = document_rows(get_async_supplies_collection(), SUPPLY_EXPORT_COLUMNS, on_complete=on_complete)
+    return csv_response(column_header(SUPPLY_EXPORT_COLUMNS), rows, _timestamped("supplies_export"))
+
+@router.get("/equipment/csv")
+async def stream_equipment_csv(token: str = Depends(get_current_user)):
+    """Download equipment as a streamed CSV file"""
+    payload = verify_token(token)
+    username = payload["username"]
+    
+    async def on_complete(count):
+        await create_log_entry(username, "Exported equipment data.", f"Exported {count} equipment items to CSV", "system")
+    
+    rows = document_rows(get_async_equipment_collection(), EQUIPMENT_EXPORT_COLUMNS, on_complete=on_complete)
+    return csv_response(column_header(EQUIPMENT_EXPORT_COLUMNS), rows, _timestamped("equipment_export"))
+
+@router.get("/accounts/csv")
+async def stream_accounts_csv(token: str = Depends(get_current_user)):
+    """Download user accounts as a streamed CSV file - admin only"""
+    payload = verify_token(token)
+    _require_admin(payload)
+    username = payload["username"]
+    
+    async def on_complete(count):
+        await create_log_entry(username, "Exported accounts data.", f"Exported {count} user accounts to CSV", "system")
+    
+    rows = document_rows(get_async_accounts_collection(), ACCOUNT_EXPORT_COLUMNS, on_complete=on_complete)
+    return csv_response(column_header(ACCOUNT_EXPORT_COLUMNS), rows, _timestamped("accounts_export"))
+
+# JSON exports (csv_data in the body); kept for existing clients, prefer the /csv downloads
 
 @router.get("/supplies")
-async def export_supplies(token: str = Depends(get_current_user)):
-    """Export supplies data as CSV"""
+async def export_supplies(
+    export_format: Optional[str] = Query(None, alias="format"),
+    token: str = Depends(get_current_user)
+):
+    """
+    Export supplies data as CSV
+    
+    format=csv streams a CSV file, format=xlsx an Excel workbook and
+    format=parquet or format=arrow a typed columnar file. Without format the
+    CSV is returned inside JSON.
+    """
+    if export_format == "csv":
+        return await stream_supplies_csv(token)
+    
     payload = verify_token(token)
     username = payload["username"]
     
-    collection = get_supplies_collection()
-    supplies = list(collection.find())
+    if export_format:
+        return await _file_response(
+            get_async_supplies_collection(), SUPPLY_EXPORT_COLUMNS, SUPPLY_COLUMNAR_SCHEMA, export_format,
+            "supplies_export", username, "Exported supplies data.", "supplies"
+        )
+    
+    counted = {}
+    async def on_complete(count):
+        counted["rows"] = count
     
-    if not supplies:
-        csv_data = "name,description,category,quantity,supplier,location,status,itemCode,date\n"
-        filename = f"supplies_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    csv_data = await _buffered_csv(
+        SUPPLY_EXPORT_COLUMNS,
+        document_rows(get_async_supplies_collection(), SUPPLY_EXPORT_COLUMNS, on_complete=on_complete)
+    )
+    if not counted["rows"]:
         return {
             "success": True,
             "message": "No supplies data found",
-            "data": [],
             "csv_data": csv_data,
-            "filename": filename
+            "filename": _timestamped("supplies_export")
         }
     
-    csv_rows = ["name,description,category,quantity,supplier,location,status,itemCode,date"]
-    
-    for supply in supplies:
-        row_data = [
-            str(supply.get('name', '')),
-            str(supply.get('description', '')),
-            str(supply.get('category', '')),
-            str(supply.get('quantity', 0)),
-            str(supply.get('supplier', '')),
-            str(supply.get('location', '')),
-            str(supply.get('status', 'available')),
-            str(supply.get('itemCode', '')),
-            str(supply.get('date', ''))
-        ]
-        
-        escaped_row = [escape_csv_field(field) for field in row_data]
-        csv_rows.append(','.join(escaped_row))
-    
-    csv_data = '\n'.join(csv_rows)
-    filename = f"supplies_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    await create_log_entry(username, "Exported supplies data.", f"Exported {len(supplies)} supplies to CSV", "system")
+    await create_log_entry(username, "Exported supplies data.", f"Exported {counted['rows']} supplies to CSV", "system")
     
     return {
         "success": True,
-        "message": f"Successfully exported {len(supplies)} supplies",
-        "data": [supply_helper(supply) for supply in supplies],
+        "message": f"Successfully exported {counted['rows']} supplies",
         "csv_data": csv_data,
-        "filename": filename
+        "filename": _timestamped("supplies_export")
     }
 
 @router.get("/equipment")
-async def export_equipment(token: str = Depends(get_current_user)):
-    """Export equipment data as CSV"""
+async def export_equipment(
+    export_format: Optional[str] = Query(None, alias="format"),
+    token: str = Depends(get_current_user)
+):
+    """
+    Export equipment data as CSV
+    
+    format=csv streams a CSV file, format=xlsx an Excel workbook and
+    format=parquet or format=arrow a typed columnar file. Without format the
+    CSV is returned inside JSON.
+    """
+    if export_format == "csv":
+        return await stream_equipment_csv(token)
+    
     payload = verify_token(token)
     username = payload["username"]
     
-    collection = get_equipment_collection()
-    equipment_list = list(collection.find())
+    if export_format:
+        return await _file_response(
+            get_async_equipment_collection(), EQUIPMENT_EXPORT_COLUMNS, EQUIPMENT_COLUMNAR_SCHEMA, export_format,
+            "equipment_export", username, "Exported equipment data.", "equipment items"
+        )
+    
+    counted = {}
+    async def on_complete(count):
+        counted["rows"] = count
     
-    if not equipment_list:
-        csv_data = "name,description,category,quantity,usefulLife,amount,location,status,itemCode,supplier,date\n"
-        filename = f"equipment_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    csv_data = await _buffered_csv(
+        EQUIPMENT_EXPORT_COLUMNS,
+        document_rows(get_async_equipment_collection(), EQUIPMENT_EXPORT_COLUMNS, on_complete=on_complete)
+    )
+    if not counted["rows"]:
         return {
             "success": True,
             "message": "No equipment data found",
-            "data": [],
             "csv_data": csv_data,
-            "filename": filename
+            "filename": _timestamped("equipment_export")
         }
     
-    csv_rows = ["name,description,category,quantity,usefulLife,amount,location,status,itemCode,supplier,date"]
-    
-    for equipment in equipment_list:
-        row_data = [
-            str(equipment.get('name', '')),
-            str(equipment.get('description', '')),
-            str(equipment.get('category', '')),
-            str(equipment.get('quantity', 1)),
-            str(equipment.get('usefulLife', 1)),
-            str(equipment.get('amount', 0.0)),
-            str(equipment.get('location', '')),
-            str(equipment.get('status', 'Operational')),
-            str(equipment.get('itemCode', '')),
-            str(equipment.get('supplier', '')),
-            str(equipment.get('date', ''))
-        ]
-        
-        escaped_row = [escape_csv_field(field) for field in row_data]
-        csv_rows.append(','.join(escaped_row))
-    
-    csv_data = '\n'.join(csv_rows)
-    filename = f"equipment_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    await create_log_entry(username, "Exported equipment data.", f"Exported {len(equipment_list)} equipment items to CSV", "system")
+    await create_log_entry(username, "Exported equipment data.", f"Exported {counted['rows']} equipment items to CSV", "system")
     
     return {
         "success": True,
-        "message": f"Successfully exported {len(equipment_list)} equipment items",
-        "data": [equipment_helper(equipment) for equipment in equipment_list],
+        "message": f"Successfully exported {counted['rows']} equipment items",
         "csv_data": csv_data,
-        "filename": filename
+        "filename": _timestamped("equipment_export")
     }
 
 @router.get("/accounts")
 async def export_accounts(token: str = Depends(get_current_user)):
     """Export user accounts data as CSV - admin only"""
     payload = verify_token(token)
-    user_role = payload.get("role", "staff")
+    _require_admin(payload)
     username = payload["username"]
     
-    if user_role != "admin":
-        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
-    
-    collection = get_accounts_collection()
-    accounts = list(collection.find())
+    counted = {}
+    async def on_complete(count):
+        counted["rows"] = count
     
-    if not accounts:
-        csv_data = "name,username,email,role,department,position,phone_number,status,account_creation,last_login\n"
-        filename = f"accounts_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
+    csv_data = await _buffered_csv(
+        ACCOUNT_EXPORT_COLUMNS,
+        document_rows(get_async_accounts_collection(), ACCOUNT_EXPORT_COLUMNS, on_complete=on_complete)
+    )
+    if not counted["rows"]:
         return {
             "success": True,
             "message": "No accounts data found",
-            "data": [],
             "csv_data": csv_data,
-            "filename": filename
+            "filename": _timestamped("accounts_export")
         }
     
-    csv_rows = ["name,username,email,role,department,position,phone_number,status,account_creation,last_login"]
-    
-    for account in accounts:
-        row_data = [
-            str(account.get('name', '')),
-            str(account.get('username', '')),
-            str(account.get('email', '')),
-            str(account.get('role', 'staff')),
-            str(account.get('department', '')),
-            str(account.get('position', '')),
-            str(account.get('phone_number', '')),
-            str(account.get('status', True)),
-            str(account.get('account_creation', '')),
-            str(account.get('last_login', 'Never'))
-        ]
-        
-        escaped_row = [escape_csv_field(field) for field in row_data]
-        csv_rows.append(','.join(escaped_row))
-    
-    csv_data = '\n'.join(csv_rows)
-    filename = f"accounts_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    await create_log_entry(username, "Exported accounts data.", f"Exported {len(accounts)} user accounts to CSV", "system")
-    
-    from routers.accounts import account_helper
+    await create_log_entry(username, "Exported accounts data.", f"Exported {counted['rows']} user accounts to CSV", "system")
+    
     return {
         "success": True,
-        "message": f"Successfully exported {len(accounts)} accounts",
-        "data": [account_helper(account) for account in accounts],
+        "message": f"Successfully exported {counted['rows']} accounts",
         "csv_data": csv_data,
-        "filename": filename
+        "filename": _timestamped("accounts_export")
+    }
+
+@router.get("/logs")
+async def export_logs(
+    export_format: str = Query("csv", alias="format"),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    username: Optional[str] = None,
+    token: str = Depends(get_current_user)
+):
+    """Export audit logs as CSV, Excel, Parquet or Arrow, newest first - admin only"""
+    payload = verify_token(token)
+    _require_admin(payload)
+    
+    query, _ = build_logs_query(date_from, date_to, username)
+    sort = [("timestamp", -1)]
+    
+    if export_format != "csv":
+        return await _file_response(
+            get_async_logs_collection(), LOG_EXPORT_COLUMNS, LOG_COLUMNAR_SCHEMA, export_format,
+            "meams_logs", payload["username"], "Exported logs.", "log entries", query, sort
+        )
+    
+    async def on_complete(count):
+        await create_log_entry(payload["username"], "Exported logs.", f"Exported {count} log entries to CSV", "system")
+    
+    rows = document_rows(get_async_logs_collection(), LOG_EXPORT_COLUMNS, query, on_complete, sort)
+    return csv_response(column_header(LOG_EXPORT_COLUMNS), rows, _timestamped("meams_logs"))
+
+@router.get("/history/{series}")
+async def export_history(
+    series: str,
+    export_format: str = Query("csv", alias="format"),
+    token: str = Depends(get_current_user)
+):
+    """Export the historical forecast data (supplies or equipment) as CSV, Excel, Parquet or Arrow"""
+    payload = verify_token(token)
+    
+    if series not in HISTORY_COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown history series: {series}")
+    collection = HISTORY_COLLECTIONS[series]()
+    sort = [("date", 1)]
+    
+    if export_format != "csv":
+        return await _file_response(
+            collection, HISTORY_EXPORT_COLUMNS, HISTORY_COLUMNAR_SCHEMA, export_format, f"{series}_history",
+            payload["username"], f"Exported {series} history.", "history records", sort=sort
+        )
+    
+    async def on_complete(count):
+        await create_log_entry(payload["username"], f"Exported {series} history.", f"Exported {count} history records to CSV", "system")
+    
+    rows = document_rows(collection, HISTORY_EXPORT_COLUMNS, on_complete=on_complete, sort=sort)
+    return csv_response(column_header(HISTORY_EXPORT_COLUMNS), rows, _timestamped(f"{series}_history"))
+
+@router.get("/delta/{dataset}")
+async def export_delta(
+    dataset: str,
+    since: Optional[str] = None,
+    limit: int = 1000,
+    token: str = Depends(get_current_user)
+):
+    """
+    Supplies, equipment or accounts (admin only) created or updated since a
+    watermark, plus tombstones of deleted ones
+    
+    Call without since for a full sync, then pass the returned watermark as
+    since. While has_more is true, call again right away with the new watermark.
+    """
+    payload = verify_token(token)
+    
+    if dataset not in DELTA_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    collection_fn, formatter, projection, admin_only = DELTA_DATASETS[dataset]
+    if admin_only:
+        _require_admin(payload)
+    if formatter is None:
+        from routers.accounts import account_helper
+        formatter = account_helper
+    
+    delta = await fetch_delta(collection_fn(), dataset, since, limit, projection)
+    
+    items = []
+    for doc in delta["items"]:
+        item = formatter(doc)
+        # Images are served by the image endpoints, not inlined
+        item.pop("image_data", None)
+        items.append(item)
+    
+    return {
+        "success": True,
+        "message": f"{len(items)} changed and {len(delta['deleted'])} deleted {dataset}",
+        "data": items,
+        "deleted": delta["deleted"],
+        "watermark": delta["watermark"],
+        "has_more": delta["has_more"]
     }
 
 @router.get("/all")
 async def export_all_data(token: str = Depends(get_current_user)):
-    """Export all system data as ZIP - admin only"""
+    """
+    Export all system data as a ZIP download - admin only
+    
+    One CSV per collection, written into the archive from projected cursors.
+    Row counts are returned in the X-Export-Summary header.
+    """
     payload = verify_token(token)
-    user_role = payload.get("role", "staff")
+    _require_admin(payload)
     username = payload["username"]
     
-    if user_role != "admin":
-        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
-    
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Export supplies
-        supplies = list(get_supplies_collection().find())
-        if supplies:
-            supplies_csv = "name,description,category,quantity,supplier,location,status,itemCode,date\n"
-            for supply in supplies:
-                row_data = [
-                    str(supply.get('name', '')),
-                    str(supply.get('description', '')),
-                    str(supply.get('category', '')),
-                    str(supply.get('quantity', 0)),
-                    str(supply.get('supplier', '')),
-                    str(supply.get('location', '')),
-                    str(supply.get('status', 'available')),
-                    str(supply.get('itemCode', '')),
-                    str(supply.get('date', ''))
-                ]
-                escaped_row = [escape_csv_field(field) for field in row_data]
-                supplies_csv += ','.join(escaped_row) + '\n'
-            
-            zip_file.writestr('supplies.csv', supplies_csv)
-        
-        # Export equipment
-        equipment_list = list(get_equipment_collection().find())
-        if equipment_list:
-            equipment_csv = "name,description,category,quantity,usefulLife,amount,location,status,itemCode,supplier,date\n"
-            for equipment in equipment_list:
-                row_data = [
-                    str(equipment.get('name', '')),
-                    str(equipment.get('description', '')),
-                    str(equipment.get('category', '')),
-                    str(equipment.get('quantity', 1)),
-                    str(equipment.get('usefulLife', 1)),
-                    str(equipment.get('amount', 0.0)),
-                    str(equipment.get('location', '')),
-                    str(equipment.get('status', 'Operational')),
-                    str(equipment.get('itemCode', '')),
-                    str(equipment.get('supplier', '')),
-                    str(equipment.get('date', ''))
-                ]
-                escaped_row = [escape_csv_field(field) for field in row_data]
-                equipment_csv += ','.join(escaped_row) + '\n'
-            
-            zip_file.writestr('equipment.csv', equipment_csv)
-        
-        # Export accounts
-        accounts = list(get_accounts_collection().find())
-        if accounts:
-            accounts_csv = "name,username,email,role,department,position,phone_number,status,account_creation,last_login\n"
-            for account in accounts:
-                row_data = [
-                    str(account.get('name', '')),
-                    str(account.get('username', '')),
-                    str(account.get('email', '')),
-                    str(account.get('role', 'staff')),
-                    str(account.get('department', '')),
-                    str(account.get('position', '')),
-                    str(account.get('phone_number', '')),
-                    str(account.get('status', True)),
-                    str(account.get('account_creation', '')),
-                    str(account.get('last_login', 'Never'))
-                ]
-                escaped_row = [escape_csv_field(field) for field in row_data]
-                accounts_csv += ','.join(escaped_row) + '\n'
-            
-            zip_file.writestr('accounts.csv', accounts_csv)
-    
-    zip_buffer.seek(0)
-    zip_data = base64.b64encode(zip_buffer.getvalue()).decode('utf-8')
-    
-    filename = f"meams_all_data_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    archive, counts = await build_zip_export([
+        ("supplies.csv", get_async_supplies_collection(), SUPPLY_EXPORT_COLUMNS),
+        ("equipment.csv", get_async_equipment_collection(), EQUIPMENT_EXPORT_COLUMNS),
+        ("accounts.csv", get_async_accounts_collection(), ACCOUNT_EXPORT_COLUMNS)
+    ])
+    summary = {
+        "supplies_count": counts["supplies.csv"],
+        "equipment_count": counts["equipment.csv"],
+        "accounts_count": counts["accounts.csv"]
+    }
     
     await create_log_entry(
         username,
         "Exported all system data.",
-        f"Exported complete system data (supplies: {len(supplies)}, equipment: {len(equipment_list)}, accounts: {len(accounts)})",
+        f"Exported complete system data (supplies: {summary['supplies_count']}, equipment: {summary['equipment_count']}, accounts: {summary['accounts_count']})",
         "system"
     )
     
-    return {
-        "success": True,
-        "message": "Successfully exported all data",
-        "zip_data": zip_data,
-        "filename": filename,
-        "summary": {
-            "supplies_count": len(supplies),
-            "equipment_count": len(equipment_list),
-            "accounts_count": len(accounts)
-        }
-    }
\ No newline at end of file
+    response = attachment_response(iter_file(archive), _timestamped("meams_all_data", "zip"), "application/zip")
+    response.headers["X-Export-Summary"] = json.dumps(summary)
+    return response
@@ -1,14 +1,49 @@
 """
 Forecast router - handles forecasting endpoints
+
+Forecasts are precomputed by the background scheduler; these endpoints only
+serve the latest completed result with its age and a stale flag.
 """
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
 
+from config import MAX_FORECAST_PERIODS
 from services.auth_service import verify_token
-from services.forecast_service import get_supplies_forecast, get_equipment_forecast
+from services.forecast_scheduler import get_latest_forecast, request_forecast_refresh
+from services.item_forecast_service import list_item_forecasts, get_item_forecast
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api", tags=["forecast"])
 
+async def _forecast_response(label: str, n_periods: int) -> dict:
+    if n_periods < 1 or n_periods > MAX_FORECAST_PERIODS:
+        raise HTTPException(status_code=400, detail=f"n_periods must be between 1 and {MAX_FORECAST_PERIODS}")
+    
+    try:
+        latest = await get_latest_forecast(label, n_periods)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to load {label} forecast: {str(e)}"
+        )
+    
+    response = {
+        "success": True,
+        "data": latest["data"],
+        "model": latest["model"],
+        "generated_at": latest["generated_at"],
+        "age_seconds": latest["age_seconds"],
+        "stale": latest["stale"]
+    }
+    if not latest["data"]:
+        response["message"] = (
+            f"The {label} forecast is being generated. Please check back shortly."
+            if latest["stale"] else
+            f"No historical {label} data available for forecasting."
+        )
+    return response
+
 @router.get("/forecast-supplies")
 async def forecast_supplies(
     token: str = Depends(get_current_user),
@@ -16,26 +51,7 @@ async def forecast_supplies(
 ):
     """Get supplies forecast for next n_periods months"""
     verify_token(token)
-    
-    try:
-        forecast_data = get_supplies_forecast(n_periods)
-        
-        if not forecast_data:
-            return {
-                "success": True,
-                "message": "No historical supplies data available for forecasting.",
-                "data": []
-            }
-        
-        return {
-            "success": True,
-            "data": forecast_data
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate supplies forecast: {str(e)}"
-        )
+    return await _forecast_response("supplies", n_periods)
 
 @router.get("/forecast-equipment")
 async def forecast_equipment(
@@ -44,23 +60,43 @@ async def forecast_equipment(
 ):
     """Get equipment forecast for next n_periods months"""
     verify_token(token)
+    return await _forecast_response("equipment", n_periods)
+
+@router.get("/forecast/items")
+async def forecast_items(
+    limit: Optional[int] = 100,
+    after: Optional[str] = None,
+    item_code: Optional[str] = None,
+    token: str = Depends(get_current_user)
+):
+    """Per-supply demand forecasts, ordered by item code (keyset paginated)"""
+    verify_token(token)
+    forecasts, next_cursor = await list_item_forecasts(limit, after, item_code)
+    return {
+        "success": True,
+        "data": forecasts,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
+@router.get("/forecast/items/{supply_id}")
+async def forecast_item(supply_id: str, token: str = Depends(get_current_user)):
+    """Demand history and forecast of one supply"""
+    verify_token(token)
+    return {
+        "success": True,
+        "data": await get_item_forecast(supply_id)
+    }
+
+@router.post("/forecast/items/refresh")
+async def refresh_forecast_items(token: str = Depends(get_current_user)):
+    """Ask the scheduler to refresh the item forecasts now - admin only"""
+    payload = verify_token(token)
+    if payload.get("role", "staff") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
     
-    try:
-        forecast_data = get_equipment_forecast(n_periods)
-        
-        if not forecast_data:
-            return {
-                "success": True,
-                "message": "No historical equipment data available for forecasting.",
-                "data": []
-            }
-        
-        return {
-            "success": True,
-            "data": forecast_data
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate equipment forecast: {str(e)}"
-        )
+    request_forecast_refresh()
+    return {
+        "success": True,
+        "message": "Item forecast refresh requested. Changed items are refitted in the background."
+    }
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
-from database import client, DATABASE_NAME
+from database import get_async_bug_reports_collection
 from services.email_service import send_bug_report_notification
 import os
 
@@ -11,8 +11,7 @@ router = APIRouter()
 # Get bug reports collection
 def get_bug_reports_collection():
     """Get bug reports collection from database"""
-    db = client[DATABASE_NAME]
-    return db['bug_reports']
+    return get_async_bug_reports_collection()
 
 # Pydantic models
 class BugReportRequest(BaseModel):
@@ -45,7 +44,7 @@ async def report_bug(report: BugReportRequest):
         }
         
         # Save to database
-        result = collection.insert_one(report_data)
+        result = await collection.insert_one(report_data)
         report_data['_id'] = str(result.inserted_id)
         
         print(f"✅ Bug report saved to database: {report.username} - {report.message[:50]}...")
@@ -86,7 +85,7 @@ async def get_bug_reports(status: Optional[str] = None):
             query["status"] = status
         
         # Get reports sorted by most recent first
-        reports = list(collection.find(query).sort("created_at", -1).limit(100))
+        reports = await collection.find(query).sort("created_at", -1).limit(100).to_list(length=100)
         
         # Convert ObjectId to string
         for report in reports:
@@ -122,7 +121,7 @@ async def update_bug_report_status(report_id: str, status: str):
                 detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
             )
         
-        result = collection.update_one(
+        result = await collection.update_one(
             {"_id": ObjectId(report_id)},
             {
                 "$set": {
@@ -2,13 +2,24 @@
 Logs router - handles system logs
 """
 from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
 
 from models.log import LogsFilter
 from services.auth_service import verify_token
-from services.log_service import create_log_entry, log_helper
-from database import get_logs_collection
+from config import LOG_PAGE_SIZE, EXPORT_CURSOR_BATCH_SIZE
+from services.log_service import (
+    create_log_entry,
+    log_helper,
+    build_logs_query,
+    fetch_logs_page,
+    get_log_usernames,
+    get_log_analytics,
+    LOG_SEARCH_PROJECTION
+)
+from services.export_service import csv_response
+from services.log_retention import get_log_rollups
+from database import get_async_logs_collection
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
@@ -19,60 +30,107 @@ async def get_logs(
     date_to: Optional[str] = None,
     username: Optional[str] = None,
     search: Optional[str] = None,
+    limit: int = LOG_PAGE_SIZE,
+    after: Optional[str] = None,
     token: str = Depends(get_current_user)
 ):
-    """Get logs with filtering - admin only"""
+    """
+    Get logs with filtering - admin only
+    
+    Returns up to `limit` entries, newest first (ranked by relevance when
+    searching). Pass the returned next_cursor as `after` for older entries.
+    truncated is true when a search matched more entries than are ranked;
+    narrow the date range to reach the older ones.
+    """
     payload = verify_token(token)
     user_role = payload.get("role", "staff")
     
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
     
-    collection = get_logs_collection()
-    query = {}
-    
-    # Date filtering
-    if date_from or date_to:
-        date_query = {}
-        if date_from:
-            from_date = datetime.strptime(date_from, "%Y-%m-%d")
-            date_query["$gte"] = from_date
-        if date_to:
-            to_date = datetime.strptime(date_to, "%Y-%m-%d")
-            to_date = to_date + timedelta(days=1) - timedelta(seconds=1)
-            date_query["$lte"] = to_date
-        query["timestamp"] = date_query
-    
-    # Username filtering
-    if username and username != "ALL USERS":
-        query["username"] = {"$regex": username, "$options": "i"}
-    
-    # Search filtering
-    if search:
-        query["$or"] = [
-            {"action": {"$regex": search, "$options": "i"}},
-            {"details": {"$regex": search, "$options": "i"}},
-            {"username": {"$regex": search, "$options": "i"}}
-        ]
-    
-    logs_cursor = collection.find(query).sort("timestamp", -1).limit(1000)
+    docs, next_cursor, truncated = await fetch_logs_page(date_from, date_to, username, search, limit, after)
     
     logs = []
-    usernames_set = set()
-    
-    for log in logs_cursor:
+    for log in docs:
         formatted_log = log_helper(log)
         formatted_log["remarks"] = f"{formatted_log['action']} {formatted_log['details']}".strip()
         logs.append(formatted_log)
-        usernames_set.add(log.get("username", ""))
     
-    usernames = ["ALL USERS"] + sorted(list(usernames_set - {""}))
+    usernames = ["ALL USERS"] + await get_log_usernames()
     
     return {
         "success": True,
         "message": f"Found {len(logs)} log entries",
         "data": logs,
-        "usernames": usernames
+        "usernames": usernames,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "truncated": truncated
+    }
+
+@router.get("/analytics")
+async def get_analytics(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    username: Optional[str] = None,
+    token: str = Depends(get_current_user)
+):
+    """
+    Activity counts per user, per action and per hour - admin only
+    
+    Served from the hourly counters kept by the log writer, not the raw logs.
+    """
+    payload = verify_token(token)
+    
+    if payload.get("role", "staff") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
+    
+    analytics = await get_log_analytics(date_from, date_to, username)
+    
+    return {
+        "success": True,
+        "message": f"{analytics['total']} log entries in range",
+        "data": analytics
+    }
+
+@router.get("/rollups")
+async def get_rollups(
+    granularity: str = "daily",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    username: Optional[str] = None,
+    token: str = Depends(get_current_user)
+):
+    """
+    Log counts per day or month, username and action - admin only
+    
+    Kept after raw entries pass the retention period, so older history can
+    still be summarised.
+    """
+    payload = verify_token(token)
+    
+    if payload.get("role", "staff") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
+    
+    rollups = await get_log_rollups(granularity, date_from, date_to, username)
+    
+    return {
+        "success": True,
+        "message": f"Found {len(rollups)} {granularity} rollups",
+        "data": rollups
+    }
+
+@router.get("/usernames")
+async def get_usernames(token: str = Depends(get_current_user)):
+    """Usernames for the logs filter - admin only"""
+    payload = verify_token(token)
+    
+    if payload.get("role", "staff") != "admin":
+        raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
+    
+    return {
+        "success": True,
+        "data": ["ALL USERS"] + await get_log_usernames()
     }
 
 @router.post("/export")
@@ -80,71 +138,45 @@ async def export_logs(
     filters: LogsFilter,
     token: str = Depends(get_current_user)
 ):
-    """Export logs as CSV - admin only"""
+    """
+    Export logs as CSV - admin only
+    
+    Streamed straight from the cursor as text/csv, so large exports start
+    downloading immediately and never sit in memory as a whole.
+    """
     payload = verify_token(token)
     user_role = payload.get("role", "staff")
     
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Access denied. Admin privileges required.")
     
-    collection = get_logs_collection()
-    query = {}
-    
-    # Apply filters (same as get_logs)
-    if filters.date_from or filters.date_to:
-        date_query = {}
-        if filters.date_from:
-            from_date = datetime.strptime(filters.date_from, "%Y-%m-%d")
-            date_query["$gte"] = from_date
-        if filters.date_to:
-            to_date = datetime.strptime(filters.date_to, "%Y-%m-%d")
-            to_date = to_date + timedelta(days=1) - timedelta(seconds=1)
-            date_query["$lte"] = to_date
-        query["timestamp"] = date_query
-    
-    if filters.username and filters.username != "ALL USERS":
-        query["username"] = {"$regex": filters.username, "$options": "i"}
-    
-    if filters.search:
-        query["$or"] = [
-            {"action": {"$regex": filters.search, "$options": "i"}},
-            {"details": {"$regex": filters.search, "$options": "i"}},
-            {"username": {"$regex": filters.search, "$options": "i"}}
-        ]
-    
-    logs_cursor = collection.find(query).sort("timestamp", -1)
-    csv_rows = ["Timestamp,Username,Action,Details,IP Address"]
-    
-    for log in logs_cursor:
-        timestamp = log.get("formatted_timestamp", log.get("timestamp", ""))
-        username = log.get("username", "")
-        action = log.get("action", "")
-        details = log.get("details", "")
-        ip_address = log.get("ip_address", "unknown")
+    collection = get_async_logs_collection()
+    query, _ = build_logs_query(filters.date_from, filters.date_to, filters.username, filters.search)
+    
+    logs_cursor = collection.find(query, LOG_SEARCH_PROJECTION).sort("timestamp", -1).batch_size(EXPORT_CURSOR_BATCH_SIZE)
+    
+    async def rows():
+        exported = 0
+        async for log in logs_cursor:
+            exported += 1
+            yield [
+                log.get("formatted_timestamp", log.get("timestamp", "")),
+                log.get("username", ""),
+                log.get("action", ""),
+                log.get("details", ""),
+                log.get("ip_address", "unknown")
+            ]
         
-        def escape_csv_field(field):
-            field = str(field).replace('"', '""')
-            if ',' in field or '"' in field or '\n' in field:
-                field = f'"{field}"'
-            return field
-        
-        csv_row = f"{escape_csv_field(timestamp)},{escape_csv_field(username)},{escape_csv_field(action)},{escape_csv_field(details)},{escape_csv_field(ip_address)}"
-        csv_rows.append(csv_row)
+        await create_log_entry(
+            payload["username"],
+            "Exported logs.",
+            f"Exported {exported} log entries to CSV",
+            "system"
+        )
     
-    csv_data = "\n".join(csv_rows)
     current_date = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"meams_logs_{current_date}.csv"
-    
-    await create_log_entry(
-        payload["username"],
-        "Exported logs.",
-        f"Exported {len(csv_rows) - 1} log entries to CSV",
-        "system"
+    return csv_response(
+        ["Timestamp", "Username", "Action", "Details", "IP Address"],
+        rows(),
+        f"meams_logs_{current_date}.csv"
     )
-    
-    return {
-        "success": True,
-        "message": f"Exported {len(csv_rows) - 1} log entries",
-        "csv_data": csv_data,
-        "filename": filename
-    }
\ No newline at end of file
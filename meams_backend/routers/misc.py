@@ -2,6 +2,7 @@
 Miscellaneous router - bug reports, health checks, etc.
 """
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 
 from models.user import BugReport
@@ -100,7 +101,9 @@ async def clear_cache(token: str = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Admin access required")
     
     from services.forecast_service import clear_forecast_cache
-    clear_forecast_cache()
+    from services.forecast_scheduler import request_forecast_refresh
+    await run_in_threadpool(clear_forecast_cache)
+    request_forecast_refresh()
     
     return {"success": True, "message": "Cache cleared successfully"}
 
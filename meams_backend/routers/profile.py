@@ -14,7 +14,7 @@ from services.auth_service import (
     update_user_password
 )
 from services.log_service import create_log_entry
-from database import get_accounts_collection
+from database import get_async_accounts_collection
 from dependencies import get_current_user
 import base64
 
@@ -26,7 +26,7 @@ async def get_profile(token: str = Depends(get_current_user)):
     payload = verify_token(token)
     username = payload["username"]
     
-    user = get_user_by_username(username)
+    user = await get_user_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -63,11 +63,11 @@ async def update_profile(
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    success = update_user_profile(username, update_fields)
+    success = await update_user_profile(username, update_fields)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     
-    updated_user = get_user_by_username(username)
+    updated_user = await get_user_by_username(username)
     return {
         "username": updated_user.get("username", ""),
         "email": updated_user.get("email", ""),
@@ -88,7 +88,7 @@ async def change_password(
     payload = verify_token(token)
     username = payload["username"]
     
-    user = get_user_by_username(username)
+    user = await get_user_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -102,7 +102,7 @@ async def change_password(
             raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     hashed_new_password = hash_password(password_data.new_password)
-    success = update_user_password(username, hashed_new_password)
+    success = await update_user_password(username, hashed_new_password)
     
     if not success:
         raise HTTPException(status_code=500, detail="Failed to update password")
@@ -137,8 +137,8 @@ async def upload_profile_picture(
     
     from config import HARDCODED_USERS
     if username not in HARDCODED_USERS:
-        accounts_collection = get_accounts_collection()
-        result = accounts_collection.update_one(
+        accounts_collection = get_async_accounts_collection()
+        result = await accounts_collection.update_one(
             {"username": username},
             {"$set": {
                 "profile_picture": base64_data,
@@ -171,8 +171,8 @@ async def get_profile_picture(token: str = Depends(get_current_user)):
     if username in HARDCODED_USERS:
         return {"profilePicture": None}
     
-    accounts_collection = get_accounts_collection()
-    user = accounts_collection.find_one({"username": username})
+    accounts_collection = get_async_accounts_collection()
+    user = await accounts_collection.find_one({"username": username})
     
     if user and user.get("profile_picture"):
         return {
@@ -193,8 +193,8 @@ async def delete_profile_picture(
     
     from config import HARDCODED_USERS
     if username not in HARDCODED_USERS:
-        accounts_collection = get_accounts_collection()
-        success = accounts_collection.update_one(
+        accounts_collection = get_async_accounts_collection()
+        result = await accounts_collection.update_one(
             {"username": username},
             {
                 "$unset": {
@@ -204,7 +204,8 @@ async def delete_profile_picture(
                 },
                 "$set": {"updated_at": datetime.utcnow()}
             }
-        ).matched_count > 0
+        )
+        success = result.matched_count > 0
     else:
         success = True
     
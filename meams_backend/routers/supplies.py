@@ -9,13 +9,14 @@ from typing import Optional
 from fastapi import Header
 from models.supply import SupplyCreate, SupplyUpdate
 from services.supply_service import (
-    get_all_supplies,
+    list_supplies_page,
     create_supply,
     get_supply_by_id,
     update_supply,
     delete_supply,
     add_supply_image,
     get_supply_image,
+    get_supply_image_data_uri,
     delete_supply_image,
     add_supply_document,
     get_supply_documents,
@@ -55,10 +56,39 @@ def pluralize_unit(quantity: int, unit: str) -> str:
     return special_plurals.get(unit.lower(), unit + 's')
 
 @router.get("")
-async def list_supplies(token: str = Depends(get_current_user)):
-    """Get all supplies"""
-    supplies = get_all_supplies()
-    return {"success": True, "message": f"Found {len(supplies)} supplies", "data": supplies}
+async def list_supplies(
+    token: str = Depends(get_current_user),
+    view: str = "full",
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: Optional[str] = None
+):
+    """Get supplies with server-side filtering, sorting and cursor pagination
+
+    view=summary returns a compact row per supply (has_image, document_count,
+    last_transaction) without image data, documents or transaction history;
+    use the per-item endpoints to fetch those.
+    sort is a field name, prefixed with '-' for descending (default -created_at).
+    Pass next_cursor back as `after` to fetch the following page.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="Invalid view. Must be 'full' or 'summary'")
+    
+    supplies, next_cursor = await list_supplies_page(
+        category=category, status=status, location=location, q=q,
+        sort=sort, limit=limit, after=after, summary=view == "summary"
+    )
+    return {
+        "success": True,
+        "message": f"Found {len(supplies)} supplies",
+        "data": supplies,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
 
 @router.post("")
 async def add_new_supply(
@@ -71,7 +101,7 @@ async def add_new_supply(
     username = payload["username"]
     client_ip = request.client.host if hasattr(request, 'client') else "unknown"
     
-    created_supply = create_supply(supply.dict(exclude_none=False))
+    created_supply = await create_supply(supply.dict(exclude_none=False))
     
     await create_log_entry(
         username,
@@ -88,7 +118,7 @@ async def get_single_supply(supply_id: str, token: str = Depends(get_current_use
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    supply = get_supply_by_id(supply_id)
+    supply = await get_supply_by_id(supply_id)
     if not supply:
         raise HTTPException(status_code=404, detail="Supply not found")
     
@@ -109,7 +139,7 @@ async def update_existing_supply(
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    updated_supply = update_supply(supply_id, supply_update.dict(exclude_none=True))
+    updated_supply = await update_supply(supply_id, supply_update.dict(exclude_none=True))
     
     await create_log_entry(
         username,
@@ -134,7 +164,7 @@ async def remove_supply(
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    deleted_supply = delete_supply(supply_id)
+    deleted_supply = await delete_supply(supply_id)
     
     await create_log_entry(
         username,
@@ -179,7 +209,7 @@ async def get_image(supply_id: str, token: str = Depends(get_current_user)):
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    return get_supply_image(supply_id)
+    return await get_supply_image(supply_id)
 
 @router.delete("/{supply_id}/image")
 async def remove_image(
@@ -195,7 +225,7 @@ async def remove_image(
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    updated_supply = delete_supply_image(supply_id)
+    updated_supply = await delete_supply_image(supply_id)
     
     await create_log_entry(
         username,
@@ -244,7 +274,7 @@ async def list_documents(supply_id: str, token: str = Depends(get_current_user))
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    documents = get_supply_documents(supply_id)
+    documents = await get_supply_documents(supply_id)
     
     return {
         "success": True,
@@ -262,7 +292,7 @@ async def download_document(
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    return get_supply_document(supply_id, document_index)
+    return await get_supply_document(supply_id, document_index)
 
 @router.delete("/{supply_id}/documents/{document_index}")
 async def remove_document(
@@ -279,7 +309,7 @@ async def remove_document(
     if not ObjectId.is_valid(supply_id):
         raise HTTPException(status_code=400, detail="Invalid supply ID format")
     
-    updated_supply = delete_supply_document(supply_id, document_index)
+    updated_supply = await delete_supply_document(supply_id, document_index)
     
     await create_log_entry(
         username,
@@ -331,7 +361,7 @@ async def scan_supply_qr(supply_id: str, authorization: Optional[str] = Header(N
             )
         
         # Fetch CURRENT data from database
-        supply = get_supply_by_id(supply_id)
+        supply = await get_supply_by_id(supply_id)
         
         if not supply:
             return HTMLResponse(
@@ -349,6 +379,9 @@ async def scan_supply_qr(supply_id: str, authorization: Optional[str] = Header(N
         supply.setdefault('status', 'Normal')
         supply.setdefault('supplier', 'N/A')
         
+        # Scan page embeds the image as a data: URI
+        supply['image_data'] = await get_supply_image_data_uri(supply_id)
+        
         # Convert ObjectId to string for display
         supply_id_str = str(supply.get('_id', supply_id))
         
@@ -629,7 +662,7 @@ async def view_full_stock_card(supply_id: str):
         )
     
     # Fetch supply data
-    supply = get_supply_by_id(supply_id)
+    supply = await get_supply_by_id(supply_id)
     
     if not supply:
         return HTMLResponse(
@@ -837,7 +870,7 @@ async def verify_scan_access(credentials: dict):
     """
     from services.auth_service import authenticate_user, create_access_token
     from datetime import timedelta
-    from database import get_accounts_collection
+    from database import get_async_accounts_collection
     
     identifier = credentials.get('identifier')  # Can be email OR username
     password = credentials.get('password')
@@ -845,10 +878,10 @@ async def verify_scan_access(credentials: dict):
     if not identifier or not password:
         raise HTTPException(status_code=400, detail="Username/Email and password required")
     
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Try to find user by email OR username
-    user_doc = accounts_collection.find_one({
+    user_doc = await accounts_collection.find_one({
         "$or": [
             {"email": identifier},
             {"username": identifier}
@@ -860,7 +893,7 @@ async def verify_scan_access(credentials: dict):
     
     # Get username and authenticate
     username = user_doc.get('username')
-    user = authenticate_user(username, password)
+    user = await authenticate_user(username, password)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -0,0 +1,33 @@
+"""
+Roll up, archive and remove log entries older than the retention period.
+
+Usage (from the meams_backend directory):
+    python run_log_retention.py [--days 180] [--archive-dir log_archive]
+
+Does the same work as the server's background retention task. Safe to
+re-run: days that were already rolled up are only cleaned up.
+"""
+import argparse
+
+from config import LOG_RETENTION_DAYS, LOG_ARCHIVE_DIR
+from database import connect_db, close_db
+from services.log_retention import run_log_retention
+
+
+def main(days: int, archive_dir: str):
+    connect_db()
+    try:
+        summary = run_log_retention(retention_days=days, archive_dir=archive_dir)
+        for path in summary["archived"]:
+            print(f"Archived {path}")
+        print(f"✅ Processed {summary['days']} day(s), removed {summary['deleted']} log entries")
+    finally:
+        close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the audit log retention policy")
+    parser.add_argument("--days", type=int, default=LOG_RETENTION_DAYS, help="Days of raw entries to keep")
+    parser.add_argument("--archive-dir", default=LOG_ARCHIVE_DIR, help='Archive directory ("" to skip archiving)')
+    args = parser.parse_args()
+    main(args.days, args.archive_dir)
@@ -9,7 +9,7 @@ import secrets
 import string
 
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, HARDCODED_USERS
-from database import get_accounts_collection
+from database import get_async_accounts_collection
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -53,9 +53,9 @@ def verify_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def authenticate_user(username: str, password: str):
+async def authenticate_user(username: str, password: str):
     """Authenticate user with username and password"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Check hardcoded users first
     if username in HARDCODED_USERS:
@@ -70,28 +70,15 @@ def authenticate_user(username: str, password: str):
         return None
     
     # Check database users
-    user = accounts_collection.find_one({"username": username})
+    user = await accounts_collection.find_one({"username": username})
     if user and verify_password(password, user.get("password_hash", "")):
         return user  # Return full user object
     
     return None
-    
-    # Check database users
-    user = accounts_collection.find_one({"username": username})
-    if user and verify_password(password, user.get("password_hash", "")):
-        return {
-    "username": username,
-    "role": user.get("role", "staff"),
-    "first_login": user.get("first_login", True),
-    "status": user.get("status", True),  # ADD THIS LINE
-    "_id": user.get("_id")  # Also good to include this
-}
-    
-    return None
 
-def get_user_by_username(username: str):
+async def get_user_by_username(username: str):
     """Get user data by username"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     # Check hardcoded users
     if username in HARDCODED_USERS:
@@ -108,7 +95,7 @@ def get_user_by_username(username: str):
         }
     
     # Check database users
-    user = accounts_collection.find_one({"username": username})
+    user = await accounts_collection.find_one({"username": username})
     if user:
         profile_picture = None
         if user.get("profile_picture"):
@@ -128,38 +115,39 @@ def get_user_by_username(username: str):
     
     return None
 
-def update_user_profile(username: str, update_fields: dict):
+async def update_user_profile(username: str, update_fields: dict):
     """Update user profile"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     if username in HARDCODED_USERS:
         return True
     
-    result = accounts_collection.update_one(
+    result = await accounts_collection.update_one(
         {"username": username},
         {"$set": {**update_fields, "updated_at": datetime.utcnow()}}
     )
     return result.matched_count > 0
 
-def update_user_password(username: str, hashed_password: str):
+async def update_user_password(username: str, hashed_password: str):
     """Update user password"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     if username in HARDCODED_USERS:
         return True
     
-    result = accounts_collection.update_one(
+    result = await accounts_collection.update_one(
         {"username": username},
         {"$set": {"password_hash": hashed_password, "updated_at": datetime.utcnow()}}
     )
     return result.matched_count > 0
 
-def update_last_login(username: str):
+async def update_last_login(username: str):
     """Update user's last login timestamp"""
-    accounts_collection = get_accounts_collection()
+    accounts_collection = get_async_accounts_collection()
     
     if username not in HARDCODED_USERS:
-        accounts_collection.update_one(
+        await accounts_collection.update_one(
             {"username": username},
-            {"$set": {"last_login": datetime.utcnow().strftime("%m/%d/%Y")}}
+            # last_login is exported, so the change must reach delta exports
+            {"$set": {"last_login": datetime.utcnow().strftime("%m/%d/%Y"), "updated_at": datetime.utcnow()}}
         )
@@ -0,0 +1,357 @@
+"""
+Blob service - storage for item images and documents
+
+Items only hold a blob reference (blob_id plus filename/content type/size);
+the bytes live in a blob store selected by BLOB_STORE_BACKEND:
+- "gridfs": MongoDB GridFS bucket (default)
+- "local":  one file per blob under BLOB_STORE_PATH
+
+Uploads are written and downloads are streamed in BLOB_CHUNK_SIZE chunks, so
+a 25MB document is never held in memory or base64-encoded.
+"""
+import base64
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import StreamingResponse
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from config import BLOB_STORE_BACKEND, BLOB_STORE_PATH, BLOB_BUCKET_NAME, BLOB_CHUNK_SIZE
+from database import get_async_database
+
+
+class BlobNotFound(Exception):
+    """Raised when a blob reference points at missing content"""
+
+
+async def _limit_size(chunks: AsyncIterator[bytes], max_size: Optional[int], label: str) -> AsyncIterator[bytes]:
+    """Pass chunks through, failing as soon as max_size is exceeded"""
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if max_size is not None and total > max_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label} too large (max {max_size // (1024 * 1024)}MB)"
+            )
+        yield chunk
+
+
+class GridFSBlobStore:
+    """Blob store backed by a MongoDB GridFS bucket"""
+
+    def _bucket(self):
+        return AsyncIOMotorGridFSBucket(
+            get_async_database(),
+            bucket_name=BLOB_BUCKET_NAME,
+            chunk_size_bytes=BLOB_CHUNK_SIZE
+        )
+
+    async def put(self, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Dict:
+        """Write chunks to a new blob and return {blob_id, size, sha256}"""
+        grid_in = self._bucket().open_upload_stream(
+            filename or "unnamed",
+            metadata={"contentType": content_type}
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in chunks:
+                await grid_in.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+        return {"blob_id": str(grid_in._id), "size": size, "sha256": digest.hexdigest()}
+
+    async def stream(self, blob_id: str) -> AsyncIterator[bytes]:
+        """Open a blob and return an async iterator over its chunks"""
+        try:
+            grid_out = await self._bucket().open_download_stream(ObjectId(blob_id))
+        except NoFile:
+            raise BlobNotFound(blob_id)
+
+        async def chunk_iterator():
+            while True:
+                chunk = await grid_out.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+
+        return chunk_iterator()
+
+    async def delete(self, blob_id: str):
+        try:
+            await self._bucket().delete(ObjectId(blob_id))
+        except NoFile:
+            pass
+
+
+class LocalBlobStore:
+    """Blob store backed by files in a local directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, blob_id: str) -> str:
+        # Only ids generated by put() are valid; reject anything path-like
+        if not blob_id or not all(c in "0123456789abcdef" for c in blob_id):
+            raise BlobNotFound(blob_id)
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+    async def put(self, chunks: AsyncIterator[bytes], filename: str, content_type: str) -> Dict:
+        """Write chunks to a new blob and return {blob_id, size, sha256}"""
+        blob_id = uuid.uuid4().hex
+        path = self._path(blob_id)
+        tmp_path = f"{path}.part"
+        await run_in_threadpool(os.makedirs, os.path.dirname(path), exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(handle.write, chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            await run_in_threadpool(handle.close)
+            await run_in_threadpool(os.replace, tmp_path, path)
+        except BaseException:
+            handle.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {"blob_id": blob_id, "size": size, "sha256": digest.hexdigest()}
+
+    async def stream(self, blob_id: str) -> AsyncIterator[bytes]:
+        """Open a blob and return an async iterator over its chunks"""
+        path = self._path(blob_id)
+        if not os.path.exists(path):
+            raise BlobNotFound(blob_id)
+
+        def read_chunks() -> Iterator[bytes]:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(BLOB_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        return iterate_in_threadpool(read_chunks())
+
+    async def delete(self, blob_id: str):
+        try:
+            path = self._path(blob_id)
+        except BlobNotFound:
+            return
+        if os.path.exists(path):
+            await run_in_threadpool(os.remove, path)
+
+
+_blob_store = None
+
+def get_blob_store():
+    """Get the configured blob store"""
+    global _blob_store
+    if _blob_store is None:
+        if BLOB_STORE_BACKEND == "local":
+            _blob_store = LocalBlobStore(BLOB_STORE_PATH)
+        else:
+            _blob_store = GridFSBlobStore()
+    return _blob_store
+
+
+async def save_upload(upload: UploadFile, max_size: Optional[int] = None, label: str = "File") -> Dict:
+    """Stream an uploaded file into the blob store, enforcing max_size"""
+    async def read_chunks():
+        while True:
+            chunk = await upload.read(BLOB_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    stored = await get_blob_store().put(
+        _limit_size(read_chunks(), max_size, label),
+        upload.filename,
+        upload.content_type
+    )
+    return {
+        "blob_id": stored["blob_id"],
+        "filename": upload.filename,
+        "content_type": upload.content_type,
+        "file_size": stored["size"],
+        "sha256": stored["sha256"]
+    }
+
+
+async def save_bytes(data: bytes, filename: str, content_type: str) -> Dict:
+    """Store an in-memory payload (e.g. a base64 image from a JSON body)"""
+    async def read_chunks():
+        for start in range(0, len(data), BLOB_CHUNK_SIZE):
+            yield data[start:start + BLOB_CHUNK_SIZE]
+
+    stored = await get_blob_store().put(read_chunks(), filename, content_type)
+    return {
+        "blob_id": stored["blob_id"],
+        "filename": filename,
+        "content_type": content_type,
+        "file_size": stored["size"],
+        "sha256": stored["sha256"]
+    }
+
+
+def decode_base64_payload(value: str) -> bytes:
+    """Decode a base64 string, accepting an optional data: URL prefix"""
+    if value.startswith("data:") and "," in value:
+        value = value.split(",", 1)[1]
+    return base64.b64decode(value)
+
+
+async def blob_response(blob_id: str, content_type: str, filename: Optional[str] = None,
+                        disposition: str = "inline") -> StreamingResponse:
+    """Stream a blob to the client in chunks"""
+    try:
+        chunks = await get_blob_store().stream(blob_id)
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="File content not found")
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'{disposition}; filename="{filename}"'
+    return StreamingResponse(chunks, media_type=content_type or "application/octet-stream", headers=headers)
+
+
+async def read_blob(blob_id: str) -> bytes:
+    """Read a whole blob into memory (only for small content such as images)"""
+    try:
+        chunks = await get_blob_store().stream(blob_id)
+    except BlobNotFound:
+        return b""
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def delete_blob(blob_id: Optional[str]):
+    """Delete a blob, ignoring empty references"""
+    if blob_id:
+        await get_blob_store().delete(blob_id)
+
+
+# ============================================================
+# Migration of embedded base64 content into the blob store
+# ============================================================
+
+# Embedded document payload field per collection
+_DOCUMENT_DATA_FIELDS = {"supplies": "file_data", "equipment": "data"}
+
+
+async def _migrate_item(collection, item: dict, data_field: str) -> bool:
+    """Move one item's embedded image/documents into the blob store"""
+    created = []
+    update_set = {}
+    update_unset = {}
+
+    try:
+        if item.get("image_data"):
+            image = await save_bytes(
+                decode_base64_payload(item["image_data"]),
+                item.get("image_filename") or "image",
+                item.get("image_content_type") or "image/jpeg"
+            )
+            created.append(image["blob_id"])
+            update_set["image_blob_id"] = image["blob_id"]
+            update_set["image_size"] = image["file_size"]
+            update_unset["image_data"] = ""
+
+        documents = item.get("documents") or []
+        if any(doc.get(data_field) for doc in documents):
+            migrated_documents = []
+            for doc in documents:
+                if not doc.get(data_field):
+                    migrated_documents.append(doc)
+                    continue
+                stored = await save_bytes(
+                    base64.b64decode(doc[data_field]),
+                    doc.get("filename") or "document",
+                    doc.get("content_type") or "application/octet-stream"
+                )
+                created.append(stored["blob_id"])
+                migrated = {k: v for k, v in doc.items() if k != data_field}
+                migrated["blob_id"] = stored["blob_id"]
+                migrated["file_size"] = stored["file_size"]
+                migrated_documents.append(migrated)
+            update_set["documents"] = migrated_documents
+    except Exception:
+        for blob_id in created:
+            await delete_blob(blob_id)
+        raise
+
+    if not update_set:
+        return False
+
+    update = {"$set": update_set}
+    if update_unset:
+        update["$unset"] = update_unset
+
+    # Only apply if the item was not modified while its blobs were copied
+    result = await collection.update_one(
+        {"_id": item["_id"], "updated_at": item.get("updated_at")},
+        update
+    )
+    if result.modified_count == 0:
+        for blob_id in created:
+            await delete_blob(blob_id)
+        return False
+    return True
+
+
+async def migrate_embedded_blobs(collection_name: str, batch_size: int = 50) -> Dict:
+    """
+    Move embedded base64 images/documents of one collection ("supplies" or
+    "equipment") into the blob store, batch_size items at a time.
+    """
+    data_field = _DOCUMENT_DATA_FIELDS[collection_name]
+    collection = get_async_database()[collection_name]
+    query = {
+        "$or": [
+            {"image_data": {"$nin": [None, ""]}},
+            {f"documents.{data_field}": {"$exists": True}}
+        ]
+    }
+
+    migrated = 0
+    skipped = []
+    started = datetime.utcnow()
+
+    while True:
+        batch_query = {**query, "_id": {"$nin": skipped}} if skipped else query
+        batch = await collection.find(batch_query).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        for item in batch:
+            try:
+                if await _migrate_item(collection, item, data_field):
+                    migrated += 1
+                else:
+                    skipped.append(item["_id"])
+            except Exception as e:
+                print(f"[BLOB MIGRATION] Failed to migrate {collection_name} {item['_id']}: {e}")
+                skipped.append(item["_id"])
+
+        print(f"[BLOB MIGRATION] {collection_name}: {migrated} migrated, {len(skipped)} skipped")
+
+    return {
+        "collection": collection_name,
+        "migrated": migrated,
+        "skipped": [str(item_id) for item_id in skipped],
+        "duration_seconds": (datetime.utcnow() - started).total_seconds()
+    }
@@ -0,0 +1,159 @@
+"""
+Columnar exports - Parquet and Arrow IPC files for reporting
+
+Documents are read from a projected cursor and converted to typed Arrow
+record batches of EXPORT_RECORD_BATCH_ROWS rows, which are written to a
+compressed Parquet or Arrow file spooled like the ZIP export. Values that do
+not fit a column's type are exported as nulls rather than failing the export.
+"""
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from config import EXPORT_CURSOR_BATCH_SIZE, EXPORT_SPOOL_MAX_SIZE, EXPORT_RECORD_BATCH_ROWS
+
+# format -> (file extension, media type)
+COLUMNAR_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Columns as (field, type); types are "string", "int", "float", "bool" and "timestamp"
+SUPPLY_COLUMNAR_SCHEMA = [
+    ("itemCode", "string"), ("name", "string"), ("description", "string"), ("category", "string"),
+    ("quantity", "int"), ("unit", "string"), ("supplier", "string"), ("location", "string"),
+    ("status", "string"), ("date", "timestamp"), ("created_at", "timestamp"), ("updated_at", "timestamp")
+]
+EQUIPMENT_COLUMNAR_SCHEMA = [
+    ("itemCode", "string"), ("name", "string"), ("description", "string"), ("category", "string"),
+    ("quantity", "int"), ("usefulLife", "int"), ("amount", "float"), ("supplier", "string"),
+    ("location", "string"), ("status", "string"), ("date", "timestamp"),
+    ("created_at", "timestamp"), ("updated_at", "timestamp")
+]
+LOG_COLUMNAR_SCHEMA = [
+    ("timestamp", "timestamp"), ("username", "string"), ("action", "string"),
+    ("details", "string"), ("ip_address", "string")
+]
+HISTORY_COLUMNAR_SCHEMA = [
+    ("date", "timestamp"), ("quantity", "float")
+]
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Parquet/Arrow export requires the pyarrow package")
+    return pyarrow
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def _to_string(value):
+    return None if value is None else str(value)
+
+
+_CONVERTERS = {
+    "string": _to_string,
+    "int": _to_int,
+    "float": _to_float,
+    "bool": lambda value: None if value is None else bool(value),
+    "timestamp": _to_timestamp,
+}
+
+
+def _arrow_schema(pa, columns: List[Tuple[str, str]]):
+    types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("ms"),
+    }
+    return pa.schema([(field, types[kind]) for field, kind in columns])
+
+
+async def build_columnar_export(collection, columns: List[Tuple[str, str]], fmt: str,
+                                query: dict = None, sort: list = None):
+    """
+    Write matching documents to a Parquet or Arrow file. Arrow conversion,
+    compression and writes run in the threadpool, one record batch at a time.
+    Returns the rewound (spooled) file and the row count.
+    """
+    if fmt not in COLUMNAR_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(COLUMNAR_FORMATS)}")
+    pa = _load_pyarrow()
+    schema = _arrow_schema(pa, columns)
+    converters = [(field, _CONVERTERS[kind]) for field, kind in columns]
+
+    projection = {field: 1 for field, _ in columns}
+    projection["_id"] = 0
+    cursor = collection.find(query or {}, projection).batch_size(EXPORT_CURSOR_BATCH_SIZE)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    sink = pa.PythonFile(spool, mode="w")
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    def flush(values: Dict[str, list]):
+        arrays = [pa.array(values[field], type=schema.field(field).type) for field, _ in columns]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+        if fmt == "parquet":
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+
+    rows = 0
+    values = {field: [] for field, _ in columns}
+    try:
+        async for doc in cursor:
+            for field, convert in converters:
+                values[field].append(convert(doc.get(field)))
+            rows += 1
+            if rows % EXPORT_RECORD_BATCH_ROWS == 0:
+                await run_in_threadpool(flush, values)
+                values = {field: [] for field, _ in columns}
+        if rows % EXPORT_RECORD_BATCH_ROWS or rows == 0:
+            await run_in_threadpool(flush, values)
+        await run_in_threadpool(writer.close)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool, rows
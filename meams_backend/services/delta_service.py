@@ -0,0 +1,112 @@
+"""
+Delta service - changes since a watermark, for incremental syncs
+
+Created and updated documents are found through the (updated_at, _id) index;
+deletions are recorded as tombstones and read in (deleted_at, _id) order.
+Both are merged into one change order, oldest first, and a page holds at most
+`limit` changes of either kind. The watermark is an opaque token holding the
+(timestamp, _id) position reached, so a sync can page through a large backlog
+(including a mass deletion) and later resume from the same token. Changes from the last DELTA_EXPORT_LAG_SECONDS are held back for the
+next call, so writes still in flight are not skipped.
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException
+
+from config import DELTA_EXPORT_LAG_SECONDS, MAX_DELTA_PAGE_SIZE
+from database import get_async_tombstones_collection
+
+
+async def record_tombstone(collection_name: str, doc: dict, key_field: str):
+    """Remember a deleted document so delta exports can report it"""
+    try:
+        await get_async_tombstones_collection().insert_one({
+            "collection": collection_name,
+            "item_id": str(doc["_id"]),
+            key_field: doc.get(key_field),
+            "deleted_at": datetime.utcnow()
+        })
+    except Exception as e:
+        print(f"Failed to record tombstone for {collection_name} {doc.get('_id')}: {str(e)}")
+
+
+def encode_watermark(timestamp: datetime, last_id=None) -> str:
+    payload = json_util.dumps({"ts": timestamp, "id": last_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_watermark(token: str) -> Tuple[datetime, object]:
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+        timestamp, last_id = payload["ts"], payload.get("id")
+        if not isinstance(timestamp, datetime):
+            raise ValueError("bad timestamp")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid since watermark")
+    # json_util returns aware datetimes; stored timestamps are naive UTC
+    return timestamp.replace(tzinfo=None), last_id
+
+
+def _changed_since(field: str, upper: datetime, since: Optional[str]) -> dict:
+    """Condition for (field, _id) positions after the since watermark and up to upper"""
+    match = {field: {"$lte": upper}}
+    if since:
+        since_ts, since_id = decode_watermark(since)
+        if since_id is None:
+            match[field]["$gt"] = since_ts
+        else:
+            match["$or"] = [
+                {field: {"$gt": since_ts}},
+                {field: since_ts, "_id": {"$gt": since_id}}
+            ]
+    return match
+
+
+async def fetch_delta(collection, collection_name: str, since: Optional[str] = None,
+                      limit: int = MAX_DELTA_PAGE_SIZE, projection: Optional[dict] = None) -> Dict:
+    """
+    Documents changed and tombstones of documents deleted after the since
+    watermark (everything without one), at most limit of them together.
+    Returns raw items, tombstones, the next watermark and has_more.
+    """
+    if limit < 1 or limit > MAX_DELTA_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_DELTA_PAGE_SIZE}")
+
+    upper = datetime.utcnow() - timedelta(seconds=DELTA_EXPORT_LAG_SECONDS)
+
+    # limit + 1 of each kind is enough to fill the merged page and know whether more follow
+    items = await collection.find(
+        _changed_since("updated_at", upper, since), projection
+    ).sort([("updated_at", 1), ("_id", 1)]).limit(limit + 1).to_list(length=None)
+    tombstones = await get_async_tombstones_collection().find(
+        {"collection": collection_name, **_changed_since("deleted_at", upper, since)}, {"collection": 0}
+    ).sort([("deleted_at", 1), ("_id", 1)]).limit(limit + 1).to_list(length=None)
+
+    changes = sorted(
+        [(doc["updated_at"], doc["_id"], doc, False) for doc in items]
+        + [(tombstone["deleted_at"], tombstone["_id"], tombstone, True) for tombstone in tombstones],
+        key=lambda change: (change[0], change[1])
+    )
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+        last_ts, last_id = changes[-1][:2]
+        watermark = encode_watermark(last_ts, last_id)
+    else:
+        watermark = encode_watermark(upper)
+
+    deleted = []
+    for _, _, doc, is_tombstone in changes:
+        if is_tombstone:
+            doc.pop("_id")
+            deleted.append(doc)
+
+    return {
+        "items": [doc for _, _, doc, is_tombstone in changes if not is_tombstone],
+        "deleted": deleted,
+        "watermark": watermark,
+        "has_more": has_more
+    }
@@ -3,13 +3,33 @@ Equipment service - business logic for equipment
 """
 from bson import ObjectId
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from fastapi import HTTPException, UploadFile, Response
 import base64
-from database import get_equipment_collection
+
+from config import MAX_IMAGE_SIZE, MAX_DOCUMENT_SIZE
+from database import get_async_equipment_collection
+from services.pagination import parse_sort, validate_limit, build_inventory_match, fetch_page
+from services.delta_service import record_tombstone
+from services.blob_service import (
+    save_upload,
+    save_bytes,
+    read_blob,
+    delete_blob,
+    blob_response,
+    decode_base64_payload
+)
+
+# Legacy embedded base64 fields; new content lives in the blob store
+BLOB_FIELDS_PROJECTION = {"documents.data": 0}
+
+def document_metadata(document: dict) -> dict:
+    """Document entry without its (legacy) embedded payload"""
+    return {k: v for k, v in document.items() if k != "data"}
 
 def equipment_helper(equipment) -> dict:
     """Format equipment data"""
+    has_image = bool(equipment.get("image_blob_id") or equipment.get("image_data"))
     return {
         "_id": str(equipment["_id"]),
         "itemCode": equipment.get("itemCode", ""),
@@ -26,27 +46,120 @@ def equipment_helper(equipment) -> dict:
         "reportDate": equipment.get("reportDate", ""),
         "reportDetails": equipment.get("reportDetails", ""),
         "repairHistory": equipment.get("repairHistory", []),
-        "documents": equipment.get("documents", []),
+        "documents": [document_metadata(doc) for doc in equipment.get("documents", [])],
+        "has_image": has_image,
         "image_data": equipment.get("image_data"),
+        "image_url": f"/api/equipment/{equipment['_id']}/image" if has_image else None,
         "image_filename": equipment.get("image_filename"),
         "image_content_type": equipment.get("image_content_type")
     }
 
-def get_all_equipment() -> List[Dict]:
-    """Get all equipment from database"""
-    collection = get_equipment_collection()
-    return [equipment_helper(e) for e in collection.find()]
+# Server-side projection for list views: computes blob/history indicators in
+# MongoDB so image data, documents and repair history never leave the server
+EQUIPMENT_SUMMARY_PROJECTION = {
+    "itemCode": 1,
+    "name": 1,
+    "description": 1,
+    "category": 1,
+    "usefulLife": 1,
+    "amount": 1,
+    "location": 1,
+    "status": 1,
+    "unit_price": 1,
+    "supplier": 1,
+    "date": 1,
+    "reportDate": 1,
+    "reportDetails": 1,
+    "has_image": {"$or": [
+        {"$ifNull": ["$image_blob_id", False]},
+        {"$gt": [{"$strLenBytes": {"$ifNull": ["$image_data", ""]}}, 0]}
+    ]},
+    "document_count": {"$size": {"$ifNull": ["$documents", []]}},
+    "repair_count": {"$size": {"$ifNull": ["$repairHistory", []]}},
+    "total_repair_cost": {"$sum": {"$ifNull": ["$repairHistory.amountUsed", []]}},
+    "last_repair": {"$arrayElemAt": [{"$ifNull": ["$repairHistory", []]}, -1]}
+}
 
-def create_equipment(equipment_data: dict) -> Dict:
+def equipment_summary_helper(equipment) -> dict:
+    """Format equipment summary data (output of EQUIPMENT_SUMMARY_PROJECTION)"""
+    return {
+        "_id": str(equipment["_id"]),
+        "itemCode": equipment.get("itemCode", ""),
+        "name": equipment.get("name", ""),
+        "description": equipment.get("description", ""),
+        "category": equipment.get("category", ""),
+        "usefulLife": equipment.get("usefulLife", 0),
+        "amount": equipment.get("amount", 0.0),
+        "location": equipment.get("location", ""),
+        "status": equipment.get("status", "Within-Useful-Life"),
+        "unit_price": equipment.get("unit_price", 0.0),
+        "supplier": equipment.get("supplier", ""),
+        "date": equipment.get("date", ""),
+        "reportDate": equipment.get("reportDate", ""),
+        "reportDetails": equipment.get("reportDetails", ""),
+        "has_image": equipment.get("has_image", False),
+        "document_count": equipment.get("document_count", 0),
+        "repair_count": equipment.get("repair_count", 0),
+        "total_repair_cost": equipment.get("total_repair_cost", 0.0),
+        "last_repair": equipment.get("last_repair")
+    }
+
+EQUIPMENT_SORT_FIELDS = {"created_at", "updated_at", "itemCode", "name", "amount", "category", "status"}
+
+async def list_equipment_page(category: Optional[str] = None, status: Optional[str] = None,
+                              location: Optional[str] = None, q: Optional[str] = None,
+                              sort: Optional[str] = None, limit: Optional[int] = None,
+                              after: Optional[str] = None, summary: bool = False) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Get a filtered, sorted page of equipment using keyset pagination.
+    Returns (equipment, next_cursor); without a limit every match is returned.
+    """
+    collection = get_async_equipment_collection()
+    sort_field, direction = parse_sort(sort, EQUIPMENT_SORT_FIELDS, "-created_at")
+    match = build_inventory_match(category, status, location, q)
+    
+    docs, next_cursor = await fetch_page(
+        collection, match, sort_field, direction,
+        limit=validate_limit(limit),
+        after=after,
+        projection=EQUIPMENT_SUMMARY_PROJECTION if summary else None
+    )
+    
+    helper = equipment_summary_helper if summary else equipment_helper
+    return [helper(e) for e in docs], next_cursor
+
+async def _get_equipment_or_404(equipment_id: str, projection: dict = None) -> dict:
+    collection = get_async_equipment_collection()
+    equipment = await collection.find_one({"_id": ObjectId(equipment_id)}, projection)
+    if not equipment:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return equipment
+
+async def _reload_equipment(equipment_id) -> Dict:
+    collection = get_async_equipment_collection()
+    return equipment_helper(await collection.find_one({"_id": ObjectId(equipment_id)}, BLOB_FIELDS_PROJECTION))
+
+async def _store_image_payload(data: dict) -> dict:
+    """Move a base64 image_data payload from a JSON body into the blob store"""
+    filename = data.get("image_filename") or "image"
+    content_type = data.get("image_content_type") or "image/jpeg"
+    image = await save_bytes(decode_base64_payload(data.pop("image_data")), filename, content_type)
+    data["image_blob_id"] = image["blob_id"]
+    data["image_size"] = image["file_size"]
+    data["image_filename"] = filename
+    data["image_content_type"] = content_type
+    return data
+
+async def create_equipment(equipment_data: dict) -> Dict:
     """Create new equipment"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    if not equipment_data.get("image_data"):
-        equipment_data["image_data"] = None
-    if not equipment_data.get("image_filename"):
+    if equipment_data.get("image_data"):
+        await _store_image_payload(equipment_data)
+    else:
         equipment_data["image_filename"] = None
-    if not equipment_data.get("image_content_type"):
         equipment_data["image_content_type"] = None
+    equipment_data["image_data"] = None
     
     # Generate item code if not provided
     if not equipment_data.get("itemCode"):
@@ -56,80 +169,120 @@ def create_equipment(equipment_data: dict) -> Dict:
     
     equipment_data["created_at"] = equipment_data["updated_at"] = datetime.utcnow()
     
-    result = collection.insert_one(equipment_data)
-    return equipment_helper(collection.find_one({"_id": result.inserted_id}))
+    result = await collection.insert_one(equipment_data)
+    return await _reload_equipment(result.inserted_id)
 
-def get_equipment_by_id(equipment_id: str) -> Dict:
+async def get_equipment_by_id(equipment_id: str) -> Dict:
     """Get equipment by ID"""
-    collection = get_equipment_collection()
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
-    return equipment_helper(equipment)
+    return equipment_helper(await _get_equipment_or_404(equipment_id, BLOB_FIELDS_PROJECTION))
 
-def update_equipment(equipment_id: str, update_data: dict) -> Dict:
+async def update_equipment(equipment_id: str, update_data: dict) -> Dict:
     """Update equipment"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    equipment = await _get_equipment_or_404(equipment_id, {"image_blob_id": 1})
+    
+    # Documents are managed through the document endpoints; a PUT must not
+    # overwrite their blob references
+    update_data.pop("documents", None)
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
+    update = {}
+    if update_data.get("image_data"):
+        await _store_image_payload(update_data)
+        update["$unset"] = {"image_data": ""}
+    
     update_data["updated_at"] = datetime.utcnow()
-    collection.update_one({"_id": ObjectId(equipment_id)}, {"$set": update_data})
-    return equipment_helper(collection.find_one({"_id": ObjectId(equipment_id)}))
+    update["$set"] = update_data
+    
+    await collection.update_one({"_id": ObjectId(equipment_id)}, update)
+    if "image_blob_id" in update_data:
+        await delete_blob(equipment.get("image_blob_id"))
+    return await _reload_equipment(equipment_id)
 
-def delete_equipment(equipment_id: str) -> Dict:
-    """Delete equipment"""
-    collection = get_equipment_collection()
+async def delete_equipment(equipment_id: str) -> Dict:
+    """Delete equipment and its stored image/documents"""
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    equipment = await _get_equipment_or_404(equipment_id, BLOB_FIELDS_PROJECTION)
     
     equipment_data = equipment_helper(equipment)
-    collection.delete_one({"_id": ObjectId(equipment_id)})
+    await collection.delete_one({"_id": ObjectId(equipment_id)})
+    await record_tombstone("equipment", equipment, "itemCode")
+    
+    await delete_blob(equipment.get("image_blob_id"))
+    for doc in equipment.get("documents", []):
+        await delete_blob(doc.get("blob_id"))
     return equipment_data
 
 async def add_equipment_image(equipment_id: str, image: UploadFile) -> Dict:
     """Add image to equipment"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    equipment = await _get_equipment_or_404(equipment_id, {"image_blob_id": 1})
     
     if not image.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    contents = await image.read()
-    if len(contents) > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Image file too large (max 5MB)")
-    
-    image_base64 = base64.b64encode(contents).decode('utf-8')
+    stored = await save_upload(image, MAX_IMAGE_SIZE, "Image file")
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(equipment_id)},
-        {"$set": {
-            "image_data": image_base64,
-            "image_filename": image.filename,
-            "image_content_type": image.content_type,
-            "updated_at": datetime.utcnow()
-        }}
+        {
+            "$set": {
+                "image_blob_id": stored["blob_id"],
+                "image_size": stored["file_size"],
+                "image_filename": image.filename,
+                "image_content_type": image.content_type,
+                "updated_at": datetime.utcnow()
+            },
+            "$unset": {"image_data": ""}
+        }
     )
+    await delete_blob(equipment.get("image_blob_id"))
+    
+    return await _reload_equipment(equipment_id)
+
+async def get_equipment_image(equipment_id: str) -> Response:
+    """Get equipment image (streamed from the blob store)"""
+    equipment = await _get_equipment_or_404(
+        equipment_id, {"image_blob_id": 1, "image_data": 1, "image_content_type": 1}
+    )
+    content_type = equipment.get("image_content_type") or "image/jpeg"
+    
+    if equipment.get("image_blob_id"):
+        return await blob_response(equipment["image_blob_id"], content_type)
+    
+    if not equipment.get("image_data"):
+        raise HTTPException(status_code=404, detail="No image found for this equipment")
     
-    return equipment_helper(collection.find_one({"_id": ObjectId(equipment_id)}))
+    return Response(content=decode_base64_payload(equipment["image_data"]), media_type=content_type)
 
-def update_equipment_repair(equipment_id: str, repair_data: dict) -> Dict:
+async def get_equipment_image_data_uri(equipment_id: str) -> Optional[str]:
+    """Get the equipment image as a data: URI for server-rendered pages"""
+    equipment = await _get_equipment_or_404(
+        equipment_id, {"image_blob_id": 1, "image_data": 1, "image_content_type": 1}
+    )
+    content_type = equipment.get("image_content_type") or "image/jpeg"
+    
+    if equipment.get("image_blob_id"):
+        image_bytes = await read_blob(equipment["image_blob_id"])
+        if not image_bytes:
+            return None
+        return f"data:{content_type};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+    
+    image_data = equipment.get("image_data")
+    if not image_data:
+        return None
+    return image_data if image_data.startswith("data:") else f"data:{content_type};base64,{image_data}"
+
+async def update_equipment_repair(equipment_id: str, repair_data: dict) -> Dict:
     """Update equipment with repair information and add to repair history"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    await _get_equipment_or_404(equipment_id, {"_id": 1})
     
     # Validate repair data
     if not repair_data.get("repairDate"):
@@ -150,7 +303,7 @@ def update_equipment_repair(equipment_id: str, repair_data: dict) -> Dict:
     }
     
     # Update equipment: add to repair history, clear report fields, set status to Within-Useful-Life
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(equipment_id)},
         {
             "$push": {"repairHistory": repair_entry},
@@ -163,15 +316,13 @@ def update_equipment_repair(equipment_id: str, repair_data: dict) -> Dict:
         }
     )
     
-    return equipment_helper(collection.find_one({"_id": ObjectId(equipment_id)}))
+    return await _reload_equipment(equipment_id)
 
 async def add_equipment_document(equipment_id: str, file: UploadFile) -> Dict:
     """Add document to equipment"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    await _get_equipment_or_404(equipment_id, {"_id": 1})
     
     # Validate file
     allowed_types = ['application/pdf', 'application/msword', 
@@ -181,20 +332,17 @@ async def add_equipment_document(equipment_id: str, file: UploadFile) -> Dict:
     if file.content_type not in allowed_types:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    contents = await file.read()
-    if len(contents) > 25 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large (max 25MB)")
-    
-    file_base64 = base64.b64encode(contents).decode('utf-8')
+    stored = await save_upload(file, MAX_DOCUMENT_SIZE, "File")
     
     document = {
         "filename": file.filename,
         "content_type": file.content_type,
-        "data": file_base64,
+        "blob_id": stored["blob_id"],
+        "file_size": stored["file_size"],
         "uploaded_at": datetime.utcnow()
     }
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(equipment_id)},
         {
             "$push": {"documents": document},
@@ -202,60 +350,65 @@ async def add_equipment_document(equipment_id: str, file: UploadFile) -> Dict:
         }
     )
     
-    return equipment_helper(collection.find_one({"_id": ObjectId(equipment_id)}))
+    return await _reload_equipment(equipment_id)
 
-def get_equipment_documents(equipment_id: str) -> List[Dict]:
+async def get_equipment_documents(equipment_id: str) -> List[Dict]:
     """Get all documents for equipment"""
-    collection = get_equipment_collection()
-    
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    equipment = await _get_equipment_or_404(equipment_id, {
+        "documents.filename": 1,
+        "documents.content_type": 1,
+        "documents.file_size": 1,
+        "documents.uploaded_at": 1
+    })
     
     documents = equipment.get("documents", [])
     
-    # Return documents without the base64 data (just metadata)
+    # Return documents without the payload (just metadata)
     return [
         {
             "index": idx,
             "filename": doc.get("filename"),
             "content_type": doc.get("content_type"),
+            "file_size": doc.get("file_size"),
             "uploaded_at": doc.get("uploaded_at")
         }
         for idx, doc in enumerate(documents)
     ]
 
-def get_equipment_document(equipment_id: str, document_index: int) -> Response:
-    """Get specific document for download"""
-    collection = get_equipment_collection()
+async def get_equipment_document(equipment_id: str, document_index: int) -> Response:
+    """Get specific document for download (streamed from the blob store)"""
+    if document_index < 0:
+        raise HTTPException(status_code=404, detail="Document not found")
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    # Only load the requested document entry
+    equipment = await _get_equipment_or_404(equipment_id, {"_id": 1, "documents": {"$slice": [document_index, 1]}})
     
     documents = equipment.get("documents", [])
-    
-    if document_index < 0 or document_index >= len(documents):
+    if not documents:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    document = documents[document_index]
-    file_data = base64.b64decode(document.get("data"))
+    document = documents[0]
+    if document.get("blob_id"):
+        return await blob_response(
+            document["blob_id"],
+            document.get("content_type"),
+            document.get("filename"),
+            disposition="attachment"
+        )
     
     return Response(
-        content=file_data,
+        content=base64.b64decode(document.get("data") or ""),
         media_type=document.get("content_type"),
         headers={
             "Content-Disposition": f'attachment; filename="{document.get("filename")}"'
         }
     )
 
-def delete_equipment_document(equipment_id: str, document_index: int) -> Dict:
+async def delete_equipment_document(equipment_id: str, document_index: int) -> Dict:
     """Delete specific document from equipment"""
-    collection = get_equipment_collection()
+    collection = get_async_equipment_collection()
     
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
-    if not equipment:
-        raise HTTPException(status_code=404, detail="Equipment not found")
+    equipment = await _get_equipment_or_404(equipment_id, {"documents": 1})
     
     documents = equipment.get("documents", [])
     
@@ -263,9 +416,9 @@ def delete_equipment_document(equipment_id: str, document_index: int) -> Dict:
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Remove document at index
-    documents.pop(document_index)
+    removed = documents.pop(document_index)
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(equipment_id)},
         {
             "$set": {
@@ -274,15 +427,16 @@ def delete_equipment_document(equipment_id: str, document_index: int) -> Dict:
             }
         }
     )
+    await delete_blob(removed.get("blob_id"))
     
-    return equipment_helper(collection.find_one({"_id": ObjectId(equipment_id)}))
+    return await _reload_equipment(equipment_id)
 
-def calculate_lcc_analysis(equipment_id: str) -> Dict:
+async def calculate_lcc_analysis(equipment_id: str) -> Dict:
     """
     Performs Life Cycle Cost (LCC) analysis for a given equipment.
     """
-    collection = get_equipment_collection()
-    equipment = collection.find_one({"_id": ObjectId(equipment_id)})
+    collection = get_async_equipment_collection()
+    equipment = await collection.find_one({"_id": ObjectId(equipment_id)})
     
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
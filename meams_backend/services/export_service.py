@@ -0,0 +1,202 @@
+"""
+Export service - streams exports to the client instead of building them in memory
+
+Rows are pulled from an (async) iterator, typically a Mongo cursor, and
+encoded a chunk at a time, so memory stays bounded by EXPORT_CHUNK_ROWS no
+matter how many documents match and the first bytes go out immediately.
+"""
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from config import EXPORT_CHUNK_ROWS, EXPORT_CURSOR_BATCH_SIZE, EXPORT_SPOOL_MAX_SIZE, BLOB_CHUNK_SIZE
+
+# Export columns as (field, default when missing)
+SUPPLY_EXPORT_COLUMNS = [
+    ("name", ""), ("description", ""), ("category", ""), ("quantity", 0), ("supplier", ""),
+    ("location", ""), ("status", "available"), ("itemCode", ""), ("date", "")
+]
+EQUIPMENT_EXPORT_COLUMNS = [
+    ("name", ""), ("description", ""), ("category", ""), ("quantity", 1), ("usefulLife", 1),
+    ("amount", 0.0), ("location", ""), ("status", "Operational"), ("itemCode", ""),
+    ("supplier", ""), ("date", "")
+]
+ACCOUNT_EXPORT_COLUMNS = [
+    ("name", ""), ("username", ""), ("email", ""), ("role", "staff"), ("department", ""),
+    ("position", ""), ("phone_number", ""), ("status", True), ("account_creation", ""),
+    ("last_login", "Never")
+]
+
+LOG_EXPORT_COLUMNS = [
+    ("timestamp", ""), ("username", ""), ("action", ""), ("details", ""), ("ip_address", "unknown")
+]
+HISTORY_EXPORT_COLUMNS = [("date", ""), ("quantity", 0)]
+
+
+def column_header(columns: List[Tuple[str, object]]) -> List[str]:
+    return [field for field, _ in columns]
+
+
+async def document_rows(collection, columns: List[Tuple[str, object]], query: Optional[dict] = None,
+                        on_complete: Optional[Callable[[int], Awaitable]] = None,
+                        sort: Optional[list] = None) -> AsyncIterator[list]:
+    """
+    Yield one row per document, fetching only the exported fields.
+    on_complete is awaited with the row count after the last row.
+    """
+    projection = {field: 1 for field, _ in columns}
+    projection["_id"] = 0
+    cursor = collection.find(query or {}, projection).batch_size(EXPORT_CURSOR_BATCH_SIZE)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    exported = 0
+    async for doc in cursor:
+        exported += 1
+        yield [doc.get(field, default) for field, default in columns]
+
+    if on_complete is not None:
+        await on_complete(exported)
+
+
+async def stream_csv(header: List[str], rows: AsyncIterator[Iterable],
+                     chunk_rows: int = EXPORT_CHUNK_ROWS) -> AsyncIterator[bytes]:
+    """Encode rows as CSV, yielding one UTF-8 chunk per chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+
+    pending = 0
+    async for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode("utf-8")
+
+
+def attachment_response(chunks: AsyncIterator[bytes], filename: str, media_type: str) -> StreamingResponse:
+    """Stream chunks to the client as a file download"""
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def csv_response(header: List[str], rows: AsyncIterator[Iterable], filename: str) -> StreamingResponse:
+    """Stream rows to the client as a CSV download"""
+    return attachment_response(stream_csv(header, rows), filename, "text/csv; charset=utf-8")
+
+
+async def build_zip_export(sections: List[Tuple[str, object, List[Tuple[str, object]]]]):
+    """
+    Write one CSV per (filename, collection, columns) section into a ZIP.
+
+    Rows are deflated into the archive as they come off the cursor, in the
+    threadpool so compression and spool writes do not block the event loop;
+    the archive is spooled to disk past EXPORT_SPOOL_MAX_SIZE. Returns the
+    rewound file and the row count per section.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    counts = {}
+    try:
+        archive = zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED)
+        try:
+            for filename, collection, columns in sections:
+                async def on_complete(count, filename=filename):
+                    counts[filename] = count
+
+                rows = document_rows(collection, columns, on_complete=on_complete)
+                entry = await run_in_threadpool(archive.open, filename, "w", force_zip64=True)
+                try:
+                    async for chunk in stream_csv(column_header(columns), rows):
+                        await run_in_threadpool(entry.write, chunk)
+                finally:
+                    await run_in_threadpool(entry.close)
+        finally:
+            await run_in_threadpool(archive.close)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool, counts
+
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _xlsx_value(value):
+    """Cell value openpyxl can write: numbers and dates stay typed, the rest becomes text"""
+    if value is None or isinstance(value, (bool, int, float, datetime, date)):
+        return value
+    return ILLEGAL_CHARACTERS_RE.sub("", str(value))
+
+
+async def build_xlsx_export(header: List[str], rows: AsyncIterator[Iterable], sheet_title: str,
+                            batch_rows: int = EXPORT_CURSOR_BATCH_SIZE):
+    """
+    Write rows to a single-sheet XLSX using openpyxl's write-only mode.
+
+    Rows are appended in batches in the threadpool, so neither the sheet
+    nor the event loop holds more than one batch. Returns the rewound
+    (spooled) file and the row count.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(header)
+
+    def append_rows(batch):
+        for row in batch:
+            sheet.append([_xlsx_value(value) for value in row])
+
+    written = 0
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            await run_in_threadpool(append_rows, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        await run_in_threadpool(append_rows, batch)
+        written += len(batch)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    try:
+        await run_in_threadpool(workbook.save, spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, written
+
+
+async def iter_file(file, chunk_size: int = BLOB_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a file in chunks and close it when done"""
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,120 @@
+"""
+Forecast scheduler - keeps forecasts precomputed in the background
+
+Forecast endpoints never fit models on the request path; they forecast the
+requested horizon from the latest fitted model of each series. A background
+task refreshes every series at startup, every FORECAST_REFRESH_INTERVAL
+seconds and whenever a refresh is requested (e.g. after the cache is
+cleared). Fits only happen when the historical data changed, and run in the
+threadpool so the event loop is never blocked.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import FORECAST_REFRESH_INTERVAL, FORECAST_DEFAULT_PERIODS
+from services.forecast_service import (
+    FORECAST_SOURCES,
+    refresh_forecast,
+    load_latest_forecast,
+    load_checked_fingerprint
+)
+from services.item_forecast_service import refresh_item_forecasts
+
+_task: Optional[asyncio.Task] = None
+_wake: Optional[asyncio.Event] = None
+
+
+async def refresh_all_forecasts():
+    """Refresh the model of every series one after another, then the item forecasts"""
+    for label in FORECAST_SOURCES:
+        try:
+            if await run_in_threadpool(refresh_forecast, label):
+                print(f"[FORECAST] Refreshed {label} forecast model")
+        except Exception as e:
+            print(f"[FORECAST] Refresh of {label} forecast failed: {e}")
+
+    # Per-item forecasts only for the default horizon
+    try:
+        summary = await run_in_threadpool(refresh_item_forecasts, FORECAST_DEFAULT_PERIODS)
+        if summary["fitted"] or summary["removed"]:
+            print(f"[FORECAST] Refreshed {summary['fitted']} of {summary['items']} item forecasts "
+                  f"in {summary['seconds']}s ({summary['removed']} removed, models: {summary['methods']})")
+    except Exception as e:
+        print(f"[FORECAST] Refresh of item forecasts failed: {e}")
+
+
+async def _run():
+    while True:
+        await refresh_all_forecasts()
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=FORECAST_REFRESH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+
+
+def start_forecast_scheduler():
+    """Start the background refresh loop (call from the startup event)"""
+    global _task, _wake
+    if _task is None:
+        _wake = asyncio.Event()
+        _task = asyncio.create_task(_run())
+
+
+async def stop_forecast_scheduler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def request_forecast_refresh():
+    """Ask the scheduler to refresh now"""
+    if _wake is not None:
+        _wake.set()
+
+
+async def get_latest_forecast(label: str, n_periods: int) -> Dict:
+    """
+    Latest forecast for any horizon with its age and the model that
+    produced it ({"method", "order", "seasonal_order", "aic", "fits"}),
+    forecast from the stored model without refitting. stale is True when the
+    historical data had changed when the scheduler last checked it (or no
+    forecast exists yet); a refresh is requested in that case. The data
+    itself is only hashed by the background refresh.
+    """
+    latest = await run_in_threadpool(load_latest_forecast, label, n_periods)
+    checked = await run_in_threadpool(load_checked_fingerprint, label)
+    # Before the first check the data is assumed to exist
+    has_data = checked is None or checked.get("checked_fingerprint") is not None
+
+    if latest is None:
+        if has_data:
+            request_forecast_refresh()
+        return {
+            "data": [],
+            "model": None,
+            "generated_at": None,
+            "age_seconds": None,
+            "stale": has_data
+        }
+
+    stale = checked is not None and has_data and latest.get("fingerprint") != checked["checked_fingerprint"]
+    if stale:
+        request_forecast_refresh()
+
+    generated_at = latest.get("generated_at")
+    return {
+        "data": latest.get("result", []),
+        "model": latest.get("model"),
+        "generated_at": generated_at,
+        "age_seconds": (datetime.utcnow() - generated_at).total_seconds() if generated_at else None,
+        "stale": stale
+    }
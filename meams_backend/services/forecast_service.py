@@ -1,22 +1,45 @@
 """
 ========================
-forecast_service.py (REVISED - 2024-2025 Output)
+forecast_service.py (REVISED - Rolling Window Output)
 ========================
-Revised to show 2024 historical data + 2025 forecast on line graphs.
+Shows the latest FORECAST_WINDOW_MONTHS months of history + the forecast
+after them on line graphs. Models are fitted on that rolling window and
+updated with new months as they arrive.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import hashlib
+import json
 import math
+import time
 import numpy as np
 import pandas as pd
+from bson import json_util
 
+from pymongo.errors import DuplicateKeyError
+
+from config import (
+    SARIMA_ORDER_SEARCH,
+    FORECAST_REFRESH_LEASE_SECONDS,
+    FORECAST_WINDOW_MONTHS,
+    FORECAST_FULL_REFIT_DAYS,
+    FORECAST_DEGRADATION_RATIO
+)
 from database import (
     get_historical_supplies_forecast_collection,
-    get_historical_equipment_forecast_collection
+    get_historical_equipment_forecast_collection,
+    get_forecast_results_collection
 )
 
+# Bump when the forecasting pipeline changes so stored models are refitted
+FORECAST_MODEL_VERSION = 4
+
+# In-process copies of the stored models, with the fitted results object:
+# {label: {"fingerprint", "model", "series", "history", "fitted_at", "generated_at", "results"}}
+_model_cache = {}
+# Forecasts built from them per horizon:
+# {cache_key: {"fingerprint": ..., "result": ..., "model": ..., "generated_at": ...}}
 _forecast_cache = {}
-_cache_expiry = {}
 
 
 def clean_nan_data(data: Any) -> Any:
@@ -36,176 +59,428 @@ def clean_nan_data(data: Any) -> Any:
     return data
 
 
-def generate_2025_forecast(df_bootstrapped: pd.DataFrame) -> pd.DataFrame:
-    """Generate 2025 forecast using SARIMA from 2024 data."""
-    from processing import generate_sarima_forecast
-    print("[GENERATING] 2025 forecast from 2024 historical data...")
+def fit_window_model(series: pd.Series):
+    """
+    Fit the forecasting model on the monthly window series, once for every
+    horizon. Returns (model, results) - see processing.fit_forecast_model -
+    or (None, None) if the fit failed.
+    """
+    from processing import fit_forecast_model
+    print(f"[FITTING] Forecast model on {len(series)} months of historical data...")
 
     try:
-        bootstrap_ts = df_bootstrapped.reset_index()
-        bootstrap_ts['date'] = pd.to_datetime(bootstrap_ts['date'])
-        bootstrap_ts['quantity'] = pd.to_numeric(bootstrap_ts['quantity'], errors='coerce').fillna(0)
+        return fit_forecast_model(series.to_numpy(dtype=float), seasonal_period=12)
+    except Exception as e:
+        print(f"[ERROR] Failed to fit forecast model: {e}")
+        import traceback
+        traceback.print_exc()
+        return None, None
 
-        # Generate 12 months of 2025 forecast
-        n_periods_2025 = 12
 
-        bootstrap_ts = bootstrap_ts.set_index('date').asfreq('MS').fillna(0)
-        bootstrap_ts_for_sarima = bootstrap_ts.reset_index()
+def generate_future_forecast(series: pd.Series, model_info: Dict, n_periods: int = 12, results=None) -> pd.DataFrame:
+    """
+    Forecast n_periods months after the end of the series from a fitted
+    model, without refitting. results is the fitted SARIMAX results object when
+    available (it is rebuilt from the stored params otherwise).
+    """
+    from processing import forecast_from_model
 
-        # Call generate_sarima_forecast which returns bounds from SARIMA
-        forecast_2025 = generate_sarima_forecast(
-            bootstrap_ts_for_sarima, 'date', 'quantity',
-            n_periods=n_periods_2025, seasonal_period=12
+    try:
+        forecast, lower, upper = forecast_from_model(
+            series.to_numpy(dtype=float), model_info, n_periods, seasonal_period=12, results=results
         )
+        forecast_df = pd.DataFrame({
+            'date': pd.date_range(series.index.max() + pd.DateOffset(months=1), periods=n_periods, freq='MS'),
+            'quantity': forecast,
+            'lower_bound': lower,
+            'upper_bound': upper
+        })
 
-        print(f"[DEBUG] Forecast returned {len(forecast_2025)} records")
-        print(f"[DEBUG] Forecast columns: {forecast_2025.columns.tolist()}")
-        if not forecast_2025.empty:
-            print(f"[DEBUG] Sample forecast row - quantity: {forecast_2025['quantity'].iloc[0]}, lower: {forecast_2025['lower_bound'].iloc[0]}, upper: {forecast_2025['upper_bound'].iloc[0]}")
-
-        # Ensure date column exists and is properly formatted
-        if 'date' not in forecast_2025.columns:
-            print("[WARNING] Date column missing from forecast, generating dates...")
-            dates_2025 = pd.date_range(start='2025-01-01', end='2025-12-01', freq='MS')
-            forecast_2025['date'] = dates_2025[:len(forecast_2025)]
-        else:
-            forecast_2025['date'] = pd.to_datetime(forecast_2025['date'])
-
-        # Ensure bounds exist and are not zero (use SARIMA bounds, fallback to 85/115% if needed)
-        # Check each bound value individually
-        if 'lower_bound' in forecast_2025.columns:
-            # If any lower bounds are 0 or NaN, replace with 85% fallback
-            zero_mask = (forecast_2025['lower_bound'] == 0) | forecast_2025['lower_bound'].isna()
-            if zero_mask.any():
-                print(f"[WARNING] Found {zero_mask.sum()} zero/NaN lower bounds, applying fallback")
-                forecast_2025.loc[zero_mask, 'lower_bound'] = forecast_2025.loc[zero_mask, 'quantity'] * 0.85
-        else:
-            print("[WARNING] Lower bound column missing, creating from quantity")
-            forecast_2025['lower_bound'] = forecast_2025['quantity'] * 0.85
-        
-        if 'upper_bound' in forecast_2025.columns:
-            # If any upper bounds are 0 or NaN, replace with 115% fallback
-            zero_mask = (forecast_2025['upper_bound'] == 0) | forecast_2025['upper_bound'].isna()
-            if zero_mask.any():
-                print(f"[WARNING] Found {zero_mask.sum()} zero/NaN upper bounds, applying fallback")
-                forecast_2025.loc[zero_mask, 'upper_bound'] = forecast_2025.loc[zero_mask, 'quantity'] * 1.15
-        else:
-            print("[WARNING] Upper bound column missing, creating from quantity")
-            forecast_2025['upper_bound'] = forecast_2025['quantity'] * 1.15
+        # Ensure bounds are not zero (use model bounds, fallback to 85/115% if needed)
+        zero_mask = (forecast_df['lower_bound'] == 0) | forecast_df['lower_bound'].isna()
+        if zero_mask.any():
+            print(f"[WARNING] Found {zero_mask.sum()} zero/NaN lower bounds, applying fallback")
+            forecast_df.loc[zero_mask, 'lower_bound'] = forecast_df.loc[zero_mask, 'quantity'] * 0.85
+        zero_mask = (forecast_df['upper_bound'] == 0) | forecast_df['upper_bound'].isna()
+        if zero_mask.any():
+            print(f"[WARNING] Found {zero_mask.sum()} zero/NaN upper bounds, applying fallback")
+            forecast_df.loc[zero_mask, 'upper_bound'] = forecast_df.loc[zero_mask, 'quantity'] * 1.15
 
         # Add forecast_type column
-        forecast_2025['forecast_type'] = 'forecast'
-
-        # Select columns using .loc to avoid ambiguity
-        forecast_2025 = forecast_2025.loc[:, ['date', 'quantity', 'lower_bound', 'upper_bound', 'forecast_type']].copy()
-        
-        print(f"[INFO] Generated {len(forecast_2025)} months of 2025 forecast data")
-        return forecast_2025
+        forecast_df['forecast_type'] = 'forecast'
+        return forecast_df
 
     except Exception as e:
-        print(f"[ERROR] Failed to generate 2025 forecast: {e}")
+        print(f"[ERROR] Failed to generate forecast: {e}")
         import traceback
         traceback.print_exc()
         
-        dates_2025 = pd.date_range(start='2025-01-01', end='2025-12-01', freq='MS')
+        forecast_dates = pd.date_range(series.index.max() + pd.DateOffset(months=1), periods=n_periods, freq='MS')
         return pd.DataFrame({
-            'date': dates_2025,
-            'quantity': [0] * len(dates_2025),
-            'lower_bound': [0] * len(dates_2025),
-            'upper_bound': [0] * len(dates_2025),
-            'forecast_type': ['forecast'] * len(dates_2025)
+            'date': forecast_dates,
+            'quantity': [0] * len(forecast_dates),
+            'lower_bound': [0] * len(forecast_dates),
+            'upper_bound': [0] * len(forecast_dates),
+            'forecast_type': ['forecast'] * len(forecast_dates)
         })
 
 
-def _generate_forecast(collection_fn, label: str, n_periods: int = 12):
-    """Shared logic for supplies and equipment forecast - outputs 2024 historical + 2025 forecast."""
+def forecast_fingerprint(raw_data: List[Dict], label: str) -> str:
+    """Hash of the input series and the settings that shape its model"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "label": label,
+        "version": FORECAST_MODEL_VERSION,
+        "order_search": SARIMA_ORDER_SEARCH
+    }, sort_keys=True).encode("utf-8"))
+    # Row order in the collection must not change the fingerprint
+    for record in sorted(json_util.dumps(row, sort_keys=True) for row in raw_data):
+        digest.update(record.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def load_stored_model(label: str, fingerprint: Optional[str] = None) -> Optional[Dict]:
+    """
+    Load the persisted model of a series - only if it was fitted on the
+    given fingerprint's data when one is passed.
+    Returns {"fingerprint", "model", "series", "history", "fitted_at", "generated_at",
+    "model_version", "order_search"} or None.
+    """
+    query = {"label": label, "model": {"$exists": True}}
+    if fingerprint is not None:
+        query["fingerprint"] = fingerprint
+    try:
+        return get_forecast_results_collection().find_one(
+            query, {"_id": 0, "fingerprint": 1, "model": 1, "series": 1, "history": 1,
+                    "fitted_at": 1, "generated_at": 1, "model_version": 1, "order_search": 1}
+        )
+    except Exception as e:
+        print(f"[WARNING] Could not read stored {label} forecast model: {e}")
+        return None
+
+
+def save_stored_model(label: str, fingerprint: str, model_info: Dict, series: Dict,
+                      history: List[Dict], generation_seconds: float, fitted_at: datetime) -> Dict:
+    """
+    Persist a fitted model, replacing the one for older input data.
+    fitted_at is the time of the last full fit (kept across appended months).
+    """
+    stored = {
+        "fingerprint": fingerprint,
+        "model": model_info,
+        "series": series,
+        "history": history,
+        "fitted_at": fitted_at,
+        "generated_at": datetime.utcnow(),
+        "model_version": FORECAST_MODEL_VERSION,
+        "order_search": SARIMA_ORDER_SEARCH
+    }
+    try:
+        get_forecast_results_collection().update_one(
+            {"label": label},
+            {"$set": {**stored, "generation_seconds": generation_seconds}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"[WARNING] Could not store {label} forecast model: {e}")
+    return stored
+
+
+def _stored_series(stored: Dict) -> pd.Series:
+    values = stored["series"]["values"]
+    return pd.Series(values, index=pd.date_range(stored["series"]["start"], periods=len(values), freq="MS"),
+                     dtype=float)
+
+
+def _model_results(stored: Dict, series: pd.Series):
+    """Fitted results object of a cached model, restored from its params on first use"""
+    from processing import restore_forecast_results
+
+    if stored.get("results") is None and stored["model"].get("method") == "sarima":
+        try:
+            stored["results"] = restore_forecast_results(series.to_numpy(dtype=float), stored["model"])
+        except Exception as e:
+            print(f"[WARNING] Could not restore the forecast model: {e}")
+    return stored.get("results")
+
+
+def build_forecast(label: str, stored: Dict, n_periods: int) -> Dict:
+    """
+    Window history + n_periods forecast from a stored model, without
+    refitting. Returns {"fingerprint", "result", "model", "generated_at"}.
+    """
     cache_key = f"{label}_{n_periods}"
+    cached = _forecast_cache.get(cache_key)
+    if cached and cached["fingerprint"] == stored["fingerprint"]:
+        return cached
+
+    series = _stored_series(stored)
+    forecast_df = generate_future_forecast(series, stored["model"], n_periods, _model_results(stored, series))
+    print(f"[DEBUG] Forecast generated: {len(forecast_df)} records")
+
+    # Combine window history + forecast
+    historical = pd.DataFrame(stored["history"], columns=['date', 'quantity', 'lower_bound', 'upper_bound', 'forecast_type'])
+    historical['date'] = pd.to_datetime(historical['date'])
+    combined_df = pd.concat([historical, forecast_df], ignore_index=True)
+    combined_df = combined_df.sort_values('date').drop_duplicates('date')
+    combined_df['date'] = combined_df['date'].dt.strftime('%Y-%m-%d')
+
+    forecast = {
+        "fingerprint": stored["fingerprint"],
+        "result": clean_nan_data(combined_df.to_dict(orient='records')),
+        "model": {key: value for key, value in stored["model"].items() if key != "params"},
+        "generated_at": stored["generated_at"]
+    }
+    _forecast_cache[cache_key] = forecast
+    return forecast
+
+
+def load_latest_forecast(label: str, n_periods: int) -> Optional[Dict]:
+    """
+    Latest completed forecast for a series and horizon, whatever input its
+    model was fitted on. Returns {"fingerprint", "result", "model",
+    "generated_at"} or None.
+    """
+    stored = _model_cache.get(label)
+    if stored is None:
+        stored = load_stored_model(label)
+        if stored is None:
+            return None
+        _model_cache[label] = stored
+    return build_forecast(label, stored, n_periods)
+
+
+def acquire_refresh_lease(label: str) -> bool:
+    """Claim the right to refit one series so workers do not fit it twice"""
     now = datetime.utcnow()
+    try:
+        result = get_forecast_results_collection().update_one(
+            {
+                "label": label,
+                "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]
+            },
+            {"$set": {"lease_until": now + timedelta(seconds=FORECAST_REFRESH_LEASE_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The document exists and its lease is still held
+        return False
+    return result.matched_count > 0 or result.upserted_id is not None
 
-    if cache_key in _forecast_cache and now < _cache_expiry.get(cache_key, now):
-        print(f"[CACHE HIT] Using cached {label} forecast.")
-        return _forecast_cache[cache_key]
 
-    print(f"[GENERATING] {label.capitalize()} forecast (2024 historical + 2025 forecast)...")
+def release_refresh_lease(label: str):
+    try:
+        get_forecast_results_collection().update_one(
+            {"label": label},
+            {"$unset": {"lease_until": ""}}
+        )
+    except Exception as e:
+        print(f"[WARNING] Could not release {label} forecast lease: {e}")
 
+
+def current_forecast_fingerprint(label: str) -> Optional[str]:
+    """Fingerprint of the current historical data (None if there is none)"""
+    raw_data = list(FORECAST_SOURCES[label]().find({}, {"_id": 0}))
+    if not raw_data:
+        return None
+    return forecast_fingerprint(raw_data, label)
+
+
+def record_checked_fingerprint(label: str, fingerprint: Optional[str]):
+    """Remember the data fingerprint the last refresh saw, for cheap staleness checks"""
+    try:
+        get_forecast_results_collection().update_one(
+            {"label": label},
+            {"$set": {"checked_fingerprint": fingerprint, "checked_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"[WARNING] Could not record the {label} data fingerprint: {e}")
+
+
+def load_checked_fingerprint(label: str) -> Optional[Dict]:
+    """{"checked_fingerprint", "checked_at"} of the last refresh, or None if none ran yet"""
     try:
-        from processing import bootstrap_years, generate_sarima_forecast
-        collection = collection_fn()
-        raw_data = list(collection.find({}, {"_id": 0}))
+        return get_forecast_results_collection().find_one(
+            {"label": label, "checked_at": {"$exists": True}},
+            {"_id": 0, "checked_fingerprint": 1, "checked_at": 1}
+        )
+    except Exception as e:
+        print(f"[WARNING] Could not read the {label} data fingerprint: {e}")
+        return None
+
+
+def refresh_forecast(label: str) -> bool:
+    """
+    Bring the stored model for one series up to date with its data; every
+    horizon is forecast from it. Blocking - run it off the event loop.
+    Returns True if a model was fitted or updated.
+    """
+    fingerprint = current_forecast_fingerprint(label)
+    record_checked_fingerprint(label, fingerprint)
+    if fingerprint is None:
+        return False
+
+    cached = _model_cache.get(label)
+    if cached and cached["fingerprint"] == fingerprint:
+        return False
+    # Another worker may already have fitted this data
+    stored = load_stored_model(label, fingerprint)
+    if stored is not None:
+        _model_cache[label] = stored
+        return False
+
+    if not acquire_refresh_lease(label):
+        print(f"[FORECAST] {label} forecast is being refreshed by another worker")
+        return False
+    try:
+        _update_forecast_model(label)
+    finally:
+        release_refresh_lease(label)
+    return True
+
+
+def clear_forecast_cache():
+    """Drop in-process and persisted forecast models and results"""
+    _model_cache.clear()
+    _forecast_cache.clear()
+    get_forecast_results_collection().delete_many({})
+
+
+def _append_new_months(label: str, stored: Dict, monthly: pd.Series):
+    """
+    Append the months after the stored model's series to its fitted results
+    without refitting, dropping months that leave the FORECAST_WINDOW_MONTHS
+    window. Returns (model, results, series, fitted_at), or None
+    when a full refit is needed: no SARIMA model, the model was fitted by
+    another FORECAST_MODEL_VERSION or SARIMA_ORDER_SEARCH, the fit is older
+    than FORECAST_FULL_REFIT_DAYS, months already fitted changed, or the
+    one-step error on the new months exceeds FORECAST_DEGRADATION_RATIO times
+    the fit's.
+    """
+    from processing import update_forecast_model
+
+    model = stored.get("model") or {}
+    fitted_at = stored.get("fitted_at")
+    if model.get("method") != "sarima" or fitted_at is None:
+        return None
+    if (stored.get("model_version") != FORECAST_MODEL_VERSION
+            or stored.get("order_search") != SARIMA_ORDER_SEARCH):
+        print(f"[FORECAST] {label} model was fitted with other settings, refitting")
+        return None
+    if datetime.utcnow() - fitted_at > timedelta(days=FORECAST_FULL_REFIT_DAYS):
+        print(f"[FORECAST] {label} model is older than {FORECAST_FULL_REFIT_DAYS} days, refitting")
+        return None
+
+    series = _stored_series(stored)
+    seen = monthly.reindex(series.index)
+    if seen.isna().any() or not np.allclose(seen.to_numpy(), series.to_numpy()):
+        print(f"[FORECAST] Fitted {label} months changed, refitting")
+        return None
+
+    results = _model_results(stored, series)
+    new_months = monthly[monthly.index > series.index.max()]
+    if new_months.empty or results is None:
+        # Nothing the model sees changed
+        return (model, results, series, fitted_at) if results is not None else None
+
+    try:
+        model, results, error_ratio = update_forecast_model(results, model, new_months.to_numpy(dtype=float))
+    except Exception as e:
+        print(f"[FORECAST] Could not append to the {label} model ({e}), refitting")
+        return None
+    if error_ratio is not None and error_ratio > FORECAST_DEGRADATION_RATIO:
+        print(f"[FORECAST] {label} error on new months is {error_ratio:.2f}x the fit's, refitting")
+        return None
+
+    print(f"[FORECAST] Appended {len(new_months)} month(s) to the {label} model without refitting")
+    series = pd.concat([series, new_months])
+    if len(series) > FORECAST_WINDOW_MONTHS:
+        # Roll the window: the stored params were still estimated on the
+        # older months until the next full refit, but the state is refiltered
+        # on the window only (restored from the params on next use)
+        series, results = series.iloc[-FORECAST_WINDOW_MONTHS:], None
+    return model, results, series, fitted_at
+
+
+def _update_forecast_model(label: str) -> Optional[Dict]:
+    """
+    Shared logic for supplies and equipment - brings the stored model up to
+    date with the data. New months are appended to the fitted model where
+    possible (see _append_new_months); otherwise the model is refitted on the
+    latest FORECAST_WINDOW_MONTHS months.
+    """
+    try:
+        raw_data = list(FORECAST_SOURCES[label]().find({}, {"_id": 0}))
         if not raw_data:
             print(f"[WARNING] No raw {label} data found.")
-            return []
+            return None
+
+        # Models are keyed by a hash of the input, so changed data
+        # invalidates them without any expiry
+        fingerprint = forecast_fingerprint(raw_data, label)
+        started = time.perf_counter()
 
         df = pd.DataFrame(raw_data)
         df['date'] = pd.to_datetime(df['date'])
         df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0)
 
-        # Filter to 2024 data only (your MongoDB now contains 2024 data after manual update)
-        df['date'] = pd.to_datetime(df['date'])
-        df_2024 = df[(df['date'].dt.year == 2024)].copy()
-        
-        print(f"[DEBUG] Found {len(df_2024)} records for 2024")
-        if not df_2024.empty:
-            print(f"[DEBUG] Date range in 2024 data: {df_2024['date'].min()} to {df_2024['date'].max()}")
-        
-        if df_2024.empty:
-            print(f"[WARNING] No 2024 {label} data found in MongoDB.")
-            return []
-
-        # Prepare 2024 historical data - sort by date to ensure chronological order
-        historical_2024 = df_2024.copy()
-        historical_2024 = historical_2024.sort_values('date').reset_index(drop=True)
-        historical_2024['forecast_type'] = 'historical'
-        
-        # Only add bounds if they don't exist (don't overwrite existing bounds from SARIMA)
-        if 'lower_bound' not in historical_2024.columns:
-            historical_2024['lower_bound'] = historical_2024['quantity'] * 0.8
-        if 'upper_bound' not in historical_2024.columns:
-            historical_2024['upper_bound'] = historical_2024['quantity'] * 1.2
-        
-        # Ensure these columns exist before selection
-        for col in ['lower_bound', 'upper_bound']:
-            if col not in historical_2024.columns:
-                historical_2024[col] = 0.0
-        
-        # Select columns using .loc
-        historical_2024 = historical_2024.loc[:, ['date', 'quantity', 'lower_bound', 'upper_bound', 'forecast_type']].copy()
-        print(f"[DEBUG] Historical 2024 prepared: {len(historical_2024)} records from {historical_2024['date'].min()} to {historical_2024['date'].max()}")
+        # Rolling window ending at the latest month with data
+        monthly = df.set_index('date')['quantity'].resample('MS').sum()
+        window_start = monthly.index.max() - pd.DateOffset(months=FORECAST_WINDOW_MONTHS - 1)
+        window = monthly[monthly.index >= window_start]
+        print(f"[DEBUG] {label.capitalize()} window: {window.index.min():%Y-%m} to {window.index.max():%Y-%m} "
+              f"({len(window)} of {len(monthly)} months)")
 
-        # Generate 2025 forecast using 2024 data
-        df_2024_for_forecast = df_2024.set_index('date').asfreq('MS').fillna(0)
-        forecast_2025 = generate_2025_forecast(df_2024_for_forecast)
-        print(f"[DEBUG] Forecast 2025 generated: {len(forecast_2025)} records")
+        # Prepare window historical data - sort by date to ensure chronological order
+        historical = df[df['date'] >= window_start].sort_values('date').reset_index(drop=True)
+        historical['forecast_type'] = 'historical'
 
-        # Combine 2024 historical + 2025 forecast
-        combined_df = pd.concat([historical_2024, forecast_2025], ignore_index=True)
-        combined_df = combined_df.sort_values('date').drop_duplicates('date')
-        combined_df['date'] = combined_df['date'].dt.strftime('%Y-%m-%d')
+        # Only add bounds if they don't exist (don't overwrite existing bounds from SARIMA)
+        if 'lower_bound' not in historical.columns:
+            historical['lower_bound'] = historical['quantity'] * 0.8
+        if 'upper_bound' not in historical.columns:
+            historical['upper_bound'] = historical['quantity'] * 1.2
 
-        # Clean and prepare result
-        result = clean_nan_data(combined_df.to_dict(orient='records'))
-        
-        # Cache the result
-        _forecast_cache[cache_key] = result
-        _cache_expiry[cache_key] = now + timedelta(hours=1)
+        # Select columns using .loc
+        historical = historical.loc[:, ['date', 'quantity', 'lower_bound', 'upper_bound', 'forecast_type']].copy()
+        history = [
+            {**row, "date": row["date"].to_pydatetime()}
+            for row in clean_nan_data(historical.to_dict(orient='records'))
+        ]
+
+        stored = _model_cache.get(label) or load_stored_model(label)
+        update = _append_new_months(label, stored, monthly) if stored else None
+        if update is not None:
+            model_info, results, series, fitted_at = update
+        else:
+            print(f"[GENERATING] {label.capitalize()} forecast model (full fit)...")
+            model_info, results = fit_window_model(window)
+            # A failed fit is not stored so the next refresh retries it
+            if model_info is None:
+                return None
+            series, fitted_at = window, datetime.utcnow()
+
+        stored = save_stored_model(
+            label, fingerprint, model_info,
+            {"start": series.index.min().to_pydatetime(), "values": [float(value) for value in series]},
+            history, time.perf_counter() - started, fitted_at
+        )
+        stored["results"] = results
+        _model_cache[label] = stored
 
-        print(f"[COMPLETE] {label.capitalize()} forecast ready. Total records: {len(result)}")
-        print(f"[COMPLETE] Date range: {combined_df['date'].min()} to {combined_df['date'].max()}")
-        
-        return result
+        print(f"[COMPLETE] {label.capitalize()} forecast model ready ({model_info['method']}).")
+        return stored
 
     except Exception as e:
         print(f"[ERROR] {label.capitalize()} forecast generation failed: {e}")
         import traceback
         traceback.print_exc()
-        return []
-
-
-def get_supplies_forecast(n_periods: int = 12) -> List[Dict]:
-    """Get supplies forecast: 2024 historical + 2025 forecast."""
-    return _generate_forecast(get_historical_supplies_forecast_collection, "supplies", n_periods)
+        return None
 
 
-def get_equipment_forecast(n_periods: int = 12) -> List[Dict]:
-    """Get equipment forecast: 2024 historical + 2025 forecast."""
-    return _generate_forecast(get_historical_equipment_forecast_collection, "equipment", n_periods)
+FORECAST_SOURCES = {
+    "supplies": get_historical_supplies_forecast_collection,
+    "equipment": get_historical_equipment_forecast_collection,
+}
@@ -0,0 +1,223 @@
+"""
+Item forecast service - demand forecasts for every supply line
+
+Issues recorded in each supply's transactionHistory are pulled out with one
+aggregation and turned into an item x month matrix with a single pandas
+groupby. By default every item is forecast in one vectorized pass of the
+baseline forecasters; with ITEM_FORECAST_METHOD=sarima each item gets a
+SARIMA fit across the shared worker pool instead. Results are stored one
+document per supply in item_forecasts together with a fingerprint of the
+item's monthly series, so a refresh only refits items whose issues changed.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from config import (
+    FORECAST_DEFAULT_PERIODS,
+    SARIMA_SEARCH_WORKERS,
+    ITEM_FORECAST_METHOD,
+    ITEM_FORECAST_TIME_BUDGET
+)
+from database import (
+    get_supplies_collection,
+    get_item_forecasts_collection,
+    get_async_item_forecasts_collection
+)
+from services.forecast_service import acquire_refresh_lease, release_refresh_lease
+from services.pagination import validate_limit, fetch_page
+
+# Bump when the per-item pipeline changes so every item is refitted
+ITEM_FORECAST_MODEL_VERSION = 2
+ITEM_FORECAST_LABEL = "items"
+ITEM_FORECAST_METHODS = ("baseline", "sarima")
+
+
+def load_issue_transactions() -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """
+    Every issue transaction as a long frame (item_id, date, issue), plus
+    itemCode/name per item.
+    """
+    pipeline = [
+        {"$match": {"transactionHistory.issue": {"$gt": 0}}},
+        {"$project": {"itemCode": 1, "name": 1, "transactionHistory.date": 1, "transactionHistory.issue": 1}},
+        {"$unwind": "$transactionHistory"},
+        {"$match": {"transactionHistory.issue": {"$gt": 0}}},
+        {"$project": {
+            "_id": 0,
+            "item_id": {"$toString": "$_id"},
+            "itemCode": 1,
+            "name": 1,
+            "date": "$transactionHistory.date",
+            "issue": "$transactionHistory.issue"
+        }}
+    ]
+    rows = list(get_supplies_collection().aggregate(pipeline, allowDiskUse=True))
+    if not rows:
+        return pd.DataFrame(columns=["item_id", "date", "issue"]), {}
+
+    frame = pd.DataFrame(rows)
+    items = (
+        frame.drop_duplicates("item_id")
+        .set_index("item_id")[["itemCode", "name"]]
+        .to_dict(orient="index")
+    )
+    return frame[["item_id", "date", "issue"]], items
+
+
+def series_fingerprint(values, start: pd.Timestamp, n_periods: int, method: str) -> str:
+    """Hash of one item's monthly series and the settings that shape its forecast"""
+    return hashlib.sha256(json.dumps({
+        "start": start.strftime("%Y-%m"),
+        "values": [round(float(value), 6) for value in values],
+        "n_periods": n_periods,
+        "method": method,
+        "version": ITEM_FORECAST_MODEL_VERSION
+    }).encode("utf-8")).hexdigest()
+
+
+def _forecast_document(item_id: str, info: Dict, months: pd.DatetimeIndex, values, fit: Dict,
+                       fingerprint: str, n_periods: int, now: datetime) -> Dict:
+    forecast_dates = pd.date_range(months[-1] + pd.DateOffset(months=1), periods=n_periods, freq="MS")
+    return {
+        "itemCode": info.get("itemCode"),
+        "name": info.get("name"),
+        "n_periods": n_periods,
+        "fingerprint": fingerprint,
+        "method": fit["method"],
+        "order": fit["order"],
+        "seasonal_order": fit["seasonal_order"],
+        "aic": fit["aic"],
+        "history": [
+            {"date": month.strftime("%Y-%m-%d"), "quantity": float(value)}
+            for month, value in zip(months, values)
+        ],
+        "forecast": [
+            {"date": date.strftime("%Y-%m-%d"), "quantity": quantity, "lower_bound": lower, "upper_bound": upper}
+            for date, quantity, lower, upper in zip(
+                forecast_dates, fit["forecast"], fit["lower_bound"], fit["upper_bound"]
+            )
+        ],
+        "model_version": ITEM_FORECAST_MODEL_VERSION,
+        "generated_at": now
+    }
+
+
+def refresh_item_forecasts(n_periods: int = FORECAST_DEFAULT_PERIODS, workers: Optional[int] = None,
+                           force: bool = False, method: Optional[str] = None) -> Dict:
+    """
+    Refit the forecast of every supply whose issue history changed.
+    method is "baseline" or "sarima" (ITEM_FORECAST_METHOD by default).
+    Blocking - run it off the event loop. Returns counts of what was done
+    and how many forecasts each model produced.
+    """
+    from processing import monthly_issue_matrix, forecast_items, forecast_items_baseline
+
+    method = method or ITEM_FORECAST_METHOD
+    if method not in ITEM_FORECAST_METHODS:
+        raise ValueError(f"Unknown item forecast method '{method}'. Use one of: {', '.join(ITEM_FORECAST_METHODS)}")
+
+    summary = {"items": 0, "fitted": 0, "unchanged": 0, "removed": 0, "methods": {}, "seconds": 0.0}
+    if not acquire_refresh_lease(ITEM_FORECAST_LABEL):
+        print("[FORECAST] Item forecasts are being refreshed by another worker")
+        return summary
+
+    started = time.perf_counter()
+    try:
+        transactions, items = load_issue_transactions()
+        # Every series runs up to the current month so idle items decay
+        matrix = monthly_issue_matrix(transactions, end=datetime.utcnow())
+        collection = get_item_forecasts_collection()
+        summary["items"] = len(matrix)
+
+        stored = {
+            doc["_id"]: doc.get("fingerprint")
+            for doc in collection.find({"n_periods": n_periods}, {"fingerprint": 1})
+        }
+
+        pending = {}
+        fingerprints = {}
+        for item_id, row in matrix.iterrows():
+            values = row.to_numpy()
+            fingerprint = series_fingerprint(values, matrix.columns[0], n_periods, method)
+            if not force and stored.get(item_id) == fingerprint:
+                summary["unchanged"] += 1
+                continue
+            pending[item_id] = values
+            fingerprints[item_id] = fingerprint
+
+        if method == "baseline":
+            fits = forecast_items_baseline(pending, n_periods=n_periods)
+        else:
+            fits = forecast_items(pending, n_periods=n_periods,
+                                  workers=SARIMA_SEARCH_WORKERS if workers is None else workers,
+                                  time_budget=ITEM_FORECAST_TIME_BUDGET)
+        for fit in fits.values():
+            summary["methods"][fit["method"]] = summary["methods"].get(fit["method"], 0) + 1
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": item_id},
+                {"$set": _forecast_document(item_id, items.get(item_id, {}), matrix.columns,
+                                            pending[item_id], fit, fingerprints[item_id], n_periods, now)},
+                upsert=True
+            )
+            for item_id, fit in fits.items()
+        ]
+        for start in range(0, len(operations), 1000):
+            collection.bulk_write(operations[start:start + 1000], ordered=False)
+        summary["fitted"] = len(operations)
+
+        # Supplies that were deleted or no longer have issues
+        removed = collection.delete_many({"_id": {"$nin": list(matrix.index)}})
+        summary["removed"] = removed.deleted_count
+    finally:
+        release_refresh_lease(ITEM_FORECAST_LABEL)
+
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def item_forecast_helper(doc: Dict) -> Dict:
+    """Format a stored item forecast"""
+    return {
+        "supply_id": doc["_id"],
+        "itemCode": doc.get("itemCode"),
+        "name": doc.get("name"),
+        "method": doc.get("method"),
+        "order": doc.get("order"),
+        "seasonal_order": doc.get("seasonal_order"),
+        "aic": doc.get("aic"),
+        "history": doc.get("history", []),
+        "forecast": doc.get("forecast", []),
+        "generated_at": doc.get("generated_at")
+    }
+
+
+async def list_item_forecasts(limit: Optional[int] = 100, after: Optional[str] = None,
+                              item_code: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """One page of stored item forecasts ordered by itemCode"""
+    limit = validate_limit(limit)
+    match = {"itemCode": item_code} if item_code else {}
+    docs, next_cursor = await fetch_page(
+        get_async_item_forecasts_collection(), match, "itemCode", 1, limit, after, {"history": 0}
+    )
+    return [item_forecast_helper(doc) for doc in docs], next_cursor
+
+
+async def get_item_forecast(supply_id: str) -> Dict:
+    """Stored forecast of one supply"""
+    if not ObjectId.is_valid(supply_id):
+        raise HTTPException(status_code=400, detail="Invalid supply ID")
+    doc = await get_async_item_forecasts_collection().find_one({"_id": supply_id})
+    if doc is None:
+        raise HTTPException(status_code=404, detail="No forecast for this supply yet")
+    return item_forecast_helper(doc)
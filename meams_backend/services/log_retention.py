@@ -0,0 +1,287 @@
+"""
+Audit log retention - rolls old log entries up, archives them and removes them
+
+Raw entries are kept for LOG_RETENTION_DAYS. Each full day past that is
+processed once, oldest first:
+
+1. counted per username and action into log_rollups_daily, and the
+   month's totals recomputed in log_rollups_monthly
+2. written to a gzipped JSON Lines file in LOG_ARCHIVE_DIR
+3. deleted from the logs collection, and taken off the username facet
+   (users left without entries drop out of the log filter dropdown)
+
+Processed days are recorded in log_retention, so a run that stops halfway
+only repeats the delete for that day instead of rolling up a partial day
+again. A day is claimed there with an expiring lease before it is rolled up,
+so concurrent workers never archive the same day. The work is synchronous
+and runs in the threadpool.
+"""
+import asyncio
+import gzip
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from bson import json_util
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from config import (
+    LOG_RETENTION_DAYS,
+    LOG_RETENTION_INTERVAL,
+    LOG_RETENTION_LEASE_SECONDS,
+    LOG_ARCHIVE_DIR,
+    EXPORT_CURSOR_BATCH_SIZE
+)
+from database import (
+    get_logs_collection,
+    get_log_rollups_daily_collection,
+    get_log_retention_collection,
+    get_log_usernames_collection,
+    get_async_log_rollups_daily_collection,
+    get_async_log_rollups_monthly_collection
+)
+
+_task: Optional[asyncio.Task] = None
+
+
+def _day_start(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_start(value: datetime) -> datetime:
+    return _day_start(value).replace(day=1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def expired_days(cutoff: datetime) -> List[datetime]:
+    """Days before the cutoff that still have raw log entries"""
+    oldest = get_logs_collection().find_one(
+        {"timestamp": {"$lt": cutoff}}, {"timestamp": 1}, sort=[("timestamp", 1)]
+    )
+    if oldest is None:
+        return []
+
+    days = []
+    day = _day_start(oldest["timestamp"])
+    while day < cutoff:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def rollup_logs_day(day: datetime):
+    """Count a day's entries per username and action, then refresh its month"""
+    get_logs_collection().aggregate([
+        {"$match": {"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}}},
+        {"$group": {
+            "_id": {"username": "$username", "action": "$action"},
+            "count": {"$sum": 1},
+            "first_seen": {"$min": "$timestamp"},
+            "last_seen": {"$max": "$timestamp"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "day": day,
+            "username": "$_id.username",
+            "action": "$_id.action",
+            "count": 1,
+            "first_seen": 1,
+            "last_seen": 1
+        }},
+        {"$merge": {
+            "into": "log_rollups_daily",
+            "on": ["day", "username", "action"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ])
+
+    # Monthly totals are derived from the daily rollups, so recomputing is safe
+    month = _month_start(day)
+    get_log_rollups_daily_collection().aggregate([
+        {"$match": {"day": {"$gte": month, "$lt": _next_month(month)}}},
+        {"$group": {
+            "_id": {"username": "$username", "action": "$action"},
+            "count": {"$sum": "$count"},
+            "first_seen": {"$min": "$first_seen"},
+            "last_seen": {"$max": "$last_seen"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "month": month,
+            "username": "$_id.username",
+            "action": "$_id.action",
+            "count": 1,
+            "first_seen": 1,
+            "last_seen": 1
+        }},
+        {"$merge": {
+            "into": "log_rollups_monthly",
+            "on": ["month", "username", "action"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ])
+
+
+def archive_logs_day(day: datetime, archive_dir: str) -> Optional[str]:
+    """Write a day's raw entries to <archive_dir>/logs_YYYY-MM-DD.jsonl.gz"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"logs_{day.strftime('%Y-%m-%d')}.jsonl.gz")
+    partial = path + ".part"
+
+    cursor = get_logs_collection().find(
+        {"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}},
+        {"search_words": 0, "search_terms": 0}
+    ).sort("timestamp", 1).batch_size(EXPORT_CURSOR_BATCH_SIZE)
+
+    with gzip.open(partial, "wt", encoding="utf-8") as archive:
+        for entry in cursor:
+            archive.write(json_util.dumps(entry) + "\n")
+    os.replace(partial, path)
+    return path
+
+
+def remove_from_username_facet(counts: Dict[str, int]):
+    """Take deleted entries off the per-username facet counts"""
+    if not counts:
+        return
+    facet = get_log_usernames_collection()
+    facet.bulk_write([
+        UpdateOne({"_id": username}, {"$inc": {"count": -count}})
+        for username, count in counts.items()
+    ], ordered=False)
+    facet.delete_many({"_id": {"$in": list(counts)}, "count": {"$lte": 0}})
+
+
+def acquire_day_lease(day: datetime) -> bool:
+    """Claim an unprocessed day so only one worker rolls it up and archives it"""
+    now = datetime.utcnow()
+    try:
+        result = get_log_retention_collection().update_one(
+            {
+                "_id": day,
+                "processed_at": {"$exists": False},
+                "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]
+            },
+            {"$set": {"lease_until": now + timedelta(seconds=LOG_RETENTION_LEASE_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The day is already processed or its lease is still held
+        return False
+    return result.matched_count > 0 or result.upserted_id is not None
+
+
+def run_log_retention(retention_days: int = LOG_RETENTION_DAYS, archive_dir: str = LOG_ARCHIVE_DIR,
+                      now: Optional[datetime] = None) -> Dict:
+    """Process every expired day; returns what was done"""
+    summary = {"days": 0, "archived": [], "deleted": 0}
+    if retention_days <= 0:
+        return summary
+
+    cutoff = _day_start(now or datetime.utcnow()) - timedelta(days=retention_days)
+    state = get_log_retention_collection()
+
+    logs = get_logs_collection()
+    for day in expired_days(cutoff):
+        day_query = {"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}}
+        if logs.find_one(day_query, {"_id": 1}) is None:
+            continue
+
+        if state.find_one({"_id": day, "processed_at": {"$exists": True}}) is None:
+            if not acquire_day_lease(day):
+                # Another worker is processing this day
+                continue
+            try:
+                rollup_logs_day(day)
+                path = archive_logs_day(day, archive_dir) if archive_dir else None
+            except Exception:
+                state.update_one({"_id": day}, {"$unset": {"lease_until": ""}})
+                raise
+            state.update_one(
+                {"_id": day},
+                {"$set": {"processed_at": datetime.utcnow(), "archive": path}, "$unset": {"lease_until": ""}}
+            )
+            if path:
+                summary["archived"].append(path)
+
+        per_user = {
+            doc["_id"]: doc["count"]
+            for doc in logs.aggregate([
+                {"$match": day_query},
+                {"$group": {"_id": "$username", "count": {"$sum": 1}}}
+            ])
+            if doc["_id"]
+        }
+        result = logs.delete_many(day_query)
+        remove_from_username_facet(per_user)
+        summary["deleted"] += result.deleted_count
+        summary["days"] += 1
+
+    return summary
+
+
+async def get_log_rollups(granularity: str = "daily", date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, username: Optional[str] = None) -> List[Dict]:
+    """Rolled-up log counts per period, username and action (dates are YYYY-MM-DD, inclusive)"""
+    if granularity not in ("daily", "monthly"):
+        raise HTTPException(status_code=400, detail="granularity must be 'daily' or 'monthly'")
+
+    if granularity == "monthly":
+        collection, field = get_async_log_rollups_monthly_collection(), "month"
+    else:
+        collection, field = get_async_log_rollups_daily_collection(), "day"
+
+    query = {}
+    if date_from or date_to:
+        period_query = {}
+        try:
+            if date_from:
+                start = datetime.strptime(date_from, "%Y-%m-%d")
+                period_query["$gte"] = _month_start(start) if granularity == "monthly" else start
+            if date_to:
+                period_query["$lt"] = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+        query[field] = period_query
+    if username and username != "ALL USERS":
+        query["username"] = username
+
+    cursor = collection.find(query, {"_id": 0}).sort([(field, 1), ("username", 1), ("action", 1)])
+    return await cursor.to_list(length=None)
+
+
+async def _run():
+    while True:
+        try:
+            summary = await run_in_threadpool(run_log_retention)
+            if summary["days"]:
+                print(f"[LOG RETENTION] Rolled up {summary['days']} day(s), removed {summary['deleted']} entries")
+        except Exception as e:
+            print(f"[LOG RETENTION] Run failed: {e}")
+        await asyncio.sleep(LOG_RETENTION_INTERVAL)
+
+
+def start_log_retention():
+    """Start the periodic retention task (call from the startup event)"""
+    global _task
+    if _task is None and LOG_RETENTION_DAYS > 0:
+        _task = asyncio.create_task(_run())
+
+
+async def stop_log_retention():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -1,8 +1,181 @@
 """
 Log service - handles logging operations
+
+Audit log entries are not written on the request path: create_log_entry
+puts them on a bounded in-process queue that a background task drains
+with insert_many, in batches of up to LOG_BATCH_SIZE entries or every
+LOG_FLUSH_INTERVAL seconds, whichever comes first.
+
+Each entry carries a token index for search: search_words (the lowercased
+words of action, details and username) and search_terms (every prefix of
+those words). Searches match whole terms through the
+(search_terms, timestamp) index instead of scanning with $regex.
 """
-from datetime import datetime
-from database import get_logs_collection
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import (
+    LOG_PAGE_SIZE,
+    LOG_SEARCH_MAX_CANDIDATES,
+    LOG_QUEUE_SIZE,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL,
+    LOG_OVERFLOW_POLICY,
+    LOG_ENQUEUE_TIMEOUT
+)
+from database import (
+    get_async_logs_collection,
+    get_async_log_usernames_collection,
+    get_async_log_activity_collection
+)
+from services.pagination import encode_cursor, decode_cursor, fetch_page
+
+SEARCH_FIELDS = ("action", "details", "username")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 20
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Search index fields are internal; never return them to clients
+LOG_SEARCH_PROJECTION = {"search_terms": 0, "search_words": 0}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words of a text"""
+    return _WORD_RE.findall(str(text or "").lower())
+
+def build_search_index(entry: dict) -> Tuple[List[str], List[str]]:
+    """(search_words, search_terms) for a log entry"""
+    words = set()
+    for field in SEARCH_FIELDS:
+        words.update(tokenize(entry.get(field, "")))
+
+    terms = set()
+    for word in words:
+        for length in range(MIN_TERM_LENGTH, min(len(word), MAX_TERM_LENGTH) + 1):
+            terms.add(word[:length])
+    return sorted(words), sorted(terms)
+
+def parse_search(search: Optional[str]) -> List[str]:
+    """Query terms for a search string (prefixes are matched, like the index)"""
+    terms = []
+    for word in tokenize(search):
+        if len(word) >= MIN_TERM_LENGTH and word[:MAX_TERM_LENGTH] not in terms:
+            terms.append(word[:MAX_TERM_LENGTH])
+    return terms
+
+def build_logs_query(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                     username: Optional[str] = None, search: Optional[str] = None) -> Tuple[dict, List[str]]:
+    """
+    Build the logs filter shared by listing and export.
+    Returns (query, search_terms); search_terms is empty without a search.
+    """
+    query = {}
+    
+    # Date filtering
+    if date_from or date_to:
+        date_query = {}
+        try:
+            if date_from:
+                date_query["$gte"] = datetime.strptime(date_from, "%Y-%m-%d")
+            if date_to:
+                to_date = datetime.strptime(date_to, "%Y-%m-%d")
+                date_query["$lte"] = to_date + timedelta(days=1) - timedelta(seconds=1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+        query["timestamp"] = date_query
+    
+    # Username filtering (values come from the usernames list)
+    if username and username != "ALL USERS":
+        query["username"] = username
+    
+    terms = []
+    if search and search.strip():
+        terms = parse_search(search)
+        if terms:
+            query["search_terms"] = {"$all": terms}
+        else:
+            # Only one-character words: fall back to an escaped scan
+            escaped = re.escape(search.strip())
+            query["$or"] = [{field: {"$regex": escaped, "$options": "i"}} for field in SEARCH_FIELDS]
+    return query, terms
+
+def ranked_search_pipeline(query: dict, terms: List[str], limit: Optional[int] = None,
+                           after: Optional[str] = None) -> List[dict]:
+    """
+    Aggregation ranking matches by how many query terms are whole words of
+    the entry (prefix-only matches rank lower), newest first within a rank.
+    Only the newest LOG_SEARCH_MAX_CANDIDATES matches are ranked, so broad
+    terms do not sort the whole collection in memory.
+    after is a continuation token from fetch_ranked_page.
+    """
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"timestamp": -1, "_id": -1}},
+        {"$limit": LOG_SEARCH_MAX_CANDIDATES},
+        {"$addFields": {"score": {"$size": {"$setIntersection": [{"$ifNull": ["$search_words", []]}, terms]}}}},
+        # Drop the token arrays before the ranking sort holds the documents
+        {"$project": LOG_SEARCH_PROJECTION}
+    ]
+    if after:
+        (score, timestamp), last_id = decode_cursor(after, "relevance", -1)
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "timestamp": {"$lt": timestamp}},
+            {"score": score, "timestamp": timestamp, "_id": {"$lt": last_id}}
+        ]}})
+    pipeline.append({"$sort": {"score": -1, "timestamp": -1, "_id": -1}})
+    if limit:
+        pipeline.append({"$limit": limit})
+    return pipeline
+
+async def fetch_ranked_page(collection, query: dict, terms: List[str], limit: int,
+                            after: Optional[str] = None) -> Tuple[List[dict], Optional[str], bool]:
+    """
+    One page of ranked search results; returns (logs, next_cursor, truncated).
+    truncated is True when more than LOG_SEARCH_MAX_CANDIDATES entries match,
+    so older matches are not reachable through the cursor.
+    """
+    docs = await collection.aggregate(
+        ranked_search_pipeline(query, terms, limit + 1, after)
+    ).to_list(length=None)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor("relevance", -1, {
+            "relevance": [last["score"], last["timestamp"]],
+            "_id": last["_id"]
+        })
+
+    beyond_cap = await collection.find(query, {"_id": 1}).sort(
+        [("timestamp", -1), ("_id", -1)]
+    ).skip(LOG_SEARCH_MAX_CANDIDATES).limit(1).to_list(length=1)
+    return docs, next_cursor, bool(beyond_cap)
+
+async def fetch_logs_page(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                          username: Optional[str] = None, search: Optional[str] = None,
+                          limit: int = LOG_PAGE_SIZE, after: Optional[str] = None) -> Tuple[List[dict], Optional[str], bool]:
+    """
+    Get a page of logs, newest first (ranked by relevance when searching).
+    Pages continue from the `after` cursor with a (timestamp, _id) range
+    condition, so reaching older entries costs the same as the first page.
+    Returns (logs, next_cursor, truncated); see fetch_ranked_page.
+    """
+    if limit < 1 or limit > LOG_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {LOG_PAGE_SIZE}")
+
+    collection = get_async_logs_collection()
+    query, terms = build_logs_query(date_from, date_to, username, search)
+    if terms:
+        return await fetch_ranked_page(collection, query, terms, limit, after)
+    docs, next_cursor = await fetch_page(collection, query, "timestamp", -1, limit, after, LOG_SEARCH_PROJECTION)
+    return docs, next_cursor, False
 
 def log_helper(log) -> dict:
     """Helper function to format log data"""
@@ -16,19 +189,344 @@ def log_helper(log) -> dict:
         "created_at": log.get("timestamp", datetime.utcnow())
     }
 
+
+class LogWriter:
+    """
+    Bounded queue of log entries drained by a background batch writer.
+
+    Overflow policy when the queue is full:
+    - "block":       wait up to LOG_ENQUEUE_TIMEOUT seconds for space, then drop
+    - "drop_newest": drop the entry being logged
+    - "drop_oldest": drop the oldest queued entry to make room
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float,
+                 overflow_policy: str, enqueue_timeout: float):
+        if overflow_policy not in ("block", "drop_newest", "drop_oldest"):
+            raise ValueError(f"Unknown log overflow policy: {overflow_policy}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.enqueue_timeout = enqueue_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = asyncio.Event()
+        self.counters = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Signal the drain task to flush everything still queued and wait until it has finished"""
+        self.stopping.set()
+        if self.task is not None:
+            await self.task
+            self.task = None
+
+    async def put(self, entry: dict):
+        if self.overflow_policy == "block":
+            try:
+                await asyncio.wait_for(self.queue.put(entry), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["dropped"] += 1
+                return
+        else:
+            if self.queue.full():
+                if self.overflow_policy == "drop_newest":
+                    self.counters["dropped"] += 1
+                    return
+                self.queue.get_nowait()
+                self.counters["dropped"] += 1
+            self.queue.put_nowait(entry)
+        self.counters["queued"] += 1
+
+    async def _next_batch(self) -> List[dict]:
+        """Collect entries until the batch is full or the flush interval ends (may be empty)"""
+        batch = []
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size and not self.stopping.is_set():
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            await get_async_logs_collection().insert_many(batch, ordered=False)
+            inserted = batch
+        except BulkWriteError as e:
+            # Unordered insert: only the entries listed in writeErrors are missing
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            inserted = [entry for index, entry in enumerate(batch) if index not in failed]
+            print(f"Failed to write {len(failed)} of {len(batch)} log entries: {str(e)}")
+        except Exception as e:
+            inserted = []
+            print(f"Failed to write {len(batch)} log entries: {str(e)}")
+        self.counters["written"] += len(inserted)
+        self.counters["failed"] += len(batch) - len(inserted)
+        self.counters["batches"] += 1
+        # The facet and activity counters only count entries that were stored
+        if inserted:
+            await update_username_facet(inserted)
+            await update_activity_counters(inserted)
+
+    async def _run(self):
+        # Never cancelled: stop() sets stopping and waits for the queue to be drained
+        while not self.stopping.is_set():
+            await self._write(await self._next_batch())
+
+        while not self.queue.empty():
+            batch = []
+            while not self.queue.empty() and len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+            await self._write(batch)
+
+    def stats(self) -> Dict:
+        return {**self.counters, "pending": self.queue.qsize(), "overflow_policy": self.overflow_policy}
+
+
+_log_writer: Optional[LogWriter] = None
+
+def start_log_writer():
+    """Start the background log writer (call from the startup event)"""
+    global _log_writer
+    if _log_writer is None:
+        _log_writer = LogWriter(
+            LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL,
+            LOG_OVERFLOW_POLICY, LOG_ENQUEUE_TIMEOUT
+        )
+        _log_writer.start()
+
+async def stop_log_writer():
+    """Flush queued entries and stop the writer (call from the shutdown event)"""
+    global _log_writer
+    if _log_writer is not None:
+        await _log_writer.stop()
+        print(f"Log writer stopped: {_log_writer.stats()}")
+        _log_writer = None
+
+def get_log_writer_stats() -> Optional[Dict]:
+    """Counters of queued, written and dropped log entries"""
+    return _log_writer.stats() if _log_writer else None
+
+# ============================================================
+# Username facet: one document per username in log_usernames,
+# kept up to date by the log writer
+# ============================================================
+
+async def update_username_facet(entries: List[dict]):
+    """Count new log entries per username in the facet collection"""
+    per_user = {}
+    for entry in entries:
+        username = entry.get("username")
+        if not username:
+            continue
+        count, last_seen = per_user.get(username, (0, entry["timestamp"]))
+        per_user[username] = (count + 1, max(last_seen, entry["timestamp"]))
+    if not per_user:
+        return
+    
+    try:
+        await get_async_log_usernames_collection().bulk_write([
+            UpdateOne(
+                {"_id": username},
+                {"$inc": {"count": count}, "$max": {"last_seen": last_seen}},
+                upsert=True
+            )
+            for username, (count, last_seen) in per_user.items()
+        ], ordered=False)
+    except Exception as e:
+        print(f"Failed to update username facet: {str(e)}")
+
+async def rebuild_username_facet():
+    """Rebuild the username facet from the logs collection"""
+    pipeline = [
+        {"$group": {"_id": "$username", "count": {"$sum": 1}, "last_seen": {"$max": "$timestamp"}}},
+        {"$match": {"_id": {"$nin": [None, ""]}}},
+        {"$merge": {"into": "log_usernames", "whenMatched": "replace"}}
+    ]
+    await get_async_logs_collection().aggregate(pipeline).to_list(length=None)
+
+async def get_log_usernames() -> List[str]:
+    """Usernames that appear in the logs, from the facet collection"""
+    facet = get_async_log_usernames_collection()
+    usernames = [doc["_id"] async for doc in facet.find({}, {"_id": 1})]
+    if not usernames and await get_async_logs_collection().find_one({}, {"_id": 1}):
+        # First use on an existing log collection
+        await rebuild_username_facet()
+        usernames = [doc["_id"] async for doc in facet.find({}, {"_id": 1})]
+    return sorted(usernames)
+
+# ============================================================
+# Activity analytics: hourly counters per username and action in
+# log_activity, incremented by the log writer. Analytics read these
+# counters, so their cost depends on the range, not the log volume.
+# ============================================================
+
+def _hour_start(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+async def update_activity_counters(entries: List[dict]):
+    """Add new log entries to the hourly activity counters"""
+    counts = {}
+    for entry in entries:
+        key = (_hour_start(entry["timestamp"]), entry.get("username") or "", entry.get("action") or "")
+        counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+    
+    try:
+        await get_async_log_activity_collection().bulk_write([
+            UpdateOne(
+                {"hour": hour, "username": username, "action": action},
+                {"$inc": {"count": count}},
+                upsert=True
+            )
+            for (hour, username, action), count in counts.items()
+        ], ordered=False)
+    except Exception as e:
+        print(f"Failed to update activity counters: {str(e)}")
+
+async def rebuild_activity_counters() -> int:
+    """Recompute the hourly counters from the raw logs still in the collection"""
+    pipeline = [
+        {"$group": {
+            "_id": {
+                "hour": {"$dateFromParts": {
+                    "year": {"$year": "$timestamp"},
+                    "month": {"$month": "$timestamp"},
+                    "day": {"$dayOfMonth": "$timestamp"},
+                    "hour": {"$hour": "$timestamp"}
+                }},
+                "username": {"$ifNull": ["$username", ""]},
+                "action": {"$ifNull": ["$action", ""]}
+            },
+            "count": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0,
+            "hour": "$_id.hour",
+            "username": "$_id.username",
+            "action": "$_id.action",
+            "count": 1
+        }},
+        {"$merge": {
+            "into": "log_activity",
+            "on": ["hour", "username", "action"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    await get_async_logs_collection().aggregate(pipeline).to_list(length=None)
+    return await get_async_log_activity_collection().count_documents({})
+
+async def get_log_analytics(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                            username: Optional[str] = None) -> Dict:
+    """
+    Activity counts per user, per action and per hour over a date range
+    (YYYY-MM-DD, inclusive; defaults to the last 30 days).
+    """
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+        end = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1) if date_to else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if end is None:
+        end = _hour_start(datetime.utcnow()) + timedelta(hours=1)
+    if start is None:
+        start = end - timedelta(days=30)
+    
+    match = {"hour": {"$gte": start, "$lt": end}}
+    if username and username != "ALL USERS":
+        match["username"] = username
+    
+    pipeline = [
+        {"$match": match},
+        {"$facet": {
+            "total": [{"$group": {"_id": None, "count": {"$sum": "$count"}}}],
+            "by_user": [
+                {"$group": {"_id": "$username", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ],
+            "by_action": [
+                {"$group": {"_id": "$action", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ],
+            "by_hour": [
+                {"$group": {"_id": "$hour", "count": {"$sum": "$count"}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "by_hour_of_day": [
+                {"$group": {"_id": {"$hour": "$hour"}, "count": {"$sum": "$count"}}}
+            ]
+        }}
+    ]
+    result = (await get_async_log_activity_collection().aggregate(pipeline).to_list(length=1))[0]
+    
+    hour_of_day = [0] * 24
+    for row in result["by_hour_of_day"]:
+        hour_of_day[row["_id"]] = row["count"]
+    
+    return {
+        "date_from": start,
+        "date_to": end,
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "by_user": [{"username": row["_id"], "count": row["count"]} for row in result["by_user"]],
+        "by_action": [{"action": row["_id"], "count": row["count"]} for row in result["by_action"]],
+        "by_hour": [{"hour": row["_id"], "count": row["count"]} for row in result["by_hour"]],
+        "by_hour_of_day": hour_of_day
+    }
+
+async def backfill_search_index(batch_size: int = 1000) -> int:
+    """Add the search index fields to log entries written before they existed"""
+    collection = get_async_logs_collection()
+    updated = 0
+    while True:
+        batch = await collection.find(
+            {"search_terms": {"$exists": False}},
+            {field: 1 for field in SEARCH_FIELDS}
+        ).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        
+        operations = []
+        for log in batch:
+            words, terms = build_search_index(log)
+            operations.append(UpdateOne(
+                {"_id": log["_id"]},
+                {"$set": {"search_words": words, "search_terms": terms}}
+            ))
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+        print(f"[LOG SEARCH] Indexed {updated} log entries")
+    return updated
+
 async def create_log_entry(username: str, action: str, details: str = "", ip_address: str = "unknown"):
-    """Create a log entry in the database"""
+    """Queue a log entry for the background writer"""
     try:
-        collection = get_logs_collection()
+        now = datetime.utcnow()
         log_entry = {
-            "timestamp": datetime.utcnow(),
+            "timestamp": now,
             "username": username,
             "action": action,
             "details": details,
             "ip_address": ip_address,
-            "formatted_timestamp": datetime.utcnow().strftime("%m/%d/%Y - %H:%M:%S")
+            "formatted_timestamp": now.strftime("%m/%d/%Y - %H:%M:%S")
         }
-        collection.insert_one(log_entry)
-        print(f"Log created: {username} - {action}")
+        log_entry["search_words"], log_entry["search_terms"] = build_search_index(log_entry)
+        if _log_writer is not None:
+            await _log_writer.put(log_entry)
+        else:
+            # Writer not running (scripts, tests): write directly
+            await get_async_logs_collection().insert_one(log_entry)
+            await update_username_facet([log_entry])
+            await update_activity_counters([log_entry])
     except Exception as e:
-        print(f"Failed to create log entry: {str(e)}")
\ No newline at end of file
+        print(f"Failed to create log entry: {str(e)}")
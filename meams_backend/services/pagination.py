@@ -0,0 +1,140 @@
+"""
+Pagination helpers - keyset (cursor) pagination for list endpoints
+
+Pages are fetched with a range condition on (sort field, _id) instead of
+skip/offset, so every page is an index seek no matter how deep the client
+has paged. The continuation token is an opaque urlsafe-base64 wrapper around
+the last row's sort value and _id.
+"""
+import base64
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_sort(sort: Optional[str], allowed_fields: set, default: str) -> Tuple[str, int]:
+    """Parse a sort parameter like '-created_at' into (field, direction)"""
+    sort = (sort or default).strip()
+    direction = -1 if sort.startswith("-") else 1
+    field = sort.lstrip("+-")
+
+    if field not in allowed_fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field. Allowed: {', '.join(sorted(allowed_fields))}"
+        )
+    return field, direction
+
+
+def validate_limit(limit: Optional[int]) -> Optional[int]:
+    """Validate a page size (None means no limit)"""
+    if limit is None:
+        return None
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def encode_cursor(sort_field: str, direction: int, doc: dict) -> str:
+    """Build an opaque continuation token from the last document of a page"""
+    payload = json_util.dumps({
+        "s": sort_field,
+        "d": direction,
+        "v": doc.get(sort_field),
+        "id": doc["_id"]
+    })
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str, sort_field: str, direction: int) -> Tuple[Any, Any]:
+    """Decode a continuation token, checking it belongs to the same sort order"""
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+        value, last_id = payload["v"], payload["id"]
+        token_field, token_direction = payload["s"], payload["d"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    if token_field != sort_field or token_direction != direction:
+        raise HTTPException(status_code=400, detail="Pagination cursor does not match the requested sort")
+    return value, last_id
+
+
+def keyset_condition(sort_field: str, direction: int, value: Any, last_id: Any) -> dict:
+    """
+    Condition selecting rows strictly after (value, last_id) in the given order.
+    Null and missing values sort before every other value, so they come first
+    ascending and last descending; a None value means the last row had neither.
+    """
+    op = "$gt" if direction == 1 else "$lt"
+    if sort_field == "_id":
+        return {"_id": {op: last_id}}
+
+    same_value = {sort_field: value, "_id": {op: last_id}}
+    if value is None:
+        if direction == 1:
+            return {"$or": [{sort_field: {"$ne": None}}, same_value]}
+        return same_value
+    after = [{sort_field: {op: value}}, same_value]
+    if direction == -1:
+        after.append({sort_field: None})
+    return {"$or": after}
+
+
+def build_inventory_match(category: Optional[str] = None, status: Optional[str] = None,
+                          location: Optional[str] = None, q: Optional[str] = None) -> dict:
+    """Build the $match filter shared by the supplies and equipment lists"""
+    match = {}
+    if category:
+        match["category"] = category
+    if status:
+        match["status"] = status
+    if location:
+        match["location"] = location
+    if q and q.strip():
+        escaped = re.escape(q.strip())
+        match["$or"] = [
+            # Anchored prefix match can use the itemCode index
+            {"itemCode": {"$regex": f"^{escaped}"}},
+            {"name": {"$regex": escaped, "$options": "i"}}
+        ]
+    return match
+
+
+async def fetch_page(collection, match: dict, sort_field: str, direction: int,
+                     limit: Optional[int] = None, after: Optional[str] = None,
+                     projection: Optional[dict] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Fetch one page of raw documents ordered by (sort_field, _id).
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    """
+    if after:
+        value, last_id = decode_cursor(after, sort_field, direction)
+        condition = keyset_condition(sort_field, direction, value, last_id)
+        match = {"$and": [match, condition]} if match else condition
+
+    sort = {sort_field: direction}
+    if sort_field != "_id":
+        sort["_id"] = direction
+
+    pipeline = [{"$match": match}, {"$sort": sort}]
+    if limit:
+        # Fetch one extra row to know whether another page exists
+        pipeline.append({"$limit": limit + 1})
+    if projection:
+        # The sort field must survive an inclusion projection for the cursor
+        if any(value != 0 for value in projection.values()):
+            projection = {**projection, sort_field: 1}
+        pipeline.append({"$project": projection})
+
+    docs = await collection.aggregate(pipeline).to_list(length=None)
+
+    next_cursor = None
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(sort_field, direction, docs[-1])
+    return docs, next_cursor
@@ -3,14 +3,33 @@ Supply service - business logic for supplies
 """
 from bson import ObjectId
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from fastapi import HTTPException, UploadFile, Response
 import base64
 
-from database import get_supplies_collection
+from config import MAX_IMAGE_SIZE, MAX_DOCUMENT_SIZE
+from database import get_async_supplies_collection
+from services.pagination import parse_sort, validate_limit, build_inventory_match, fetch_page
+from services.delta_service import record_tombstone
+from services.blob_service import (
+    save_upload,
+    save_bytes,
+    read_blob,
+    delete_blob,
+    blob_response,
+    decode_base64_payload
+)
+
+# Legacy embedded base64 fields; new content lives in the blob store
+BLOB_FIELDS_PROJECTION = {"documents.file_data": 0}
+
+def document_metadata(document: dict) -> dict:
+    """Document entry without its (legacy) embedded payload"""
+    return {k: v for k, v in document.items() if k != "file_data"}
 
 def supply_helper(supply) -> dict:
     """Format supply data"""
+    has_image = bool(supply.get("image_blob_id") or supply.get("image_data"))
     return {
         "_id": str(supply["_id"]),
         "name": supply["name"],
@@ -23,32 +42,113 @@ def supply_helper(supply) -> dict:
         "unit": supply.get("unit", "piece"),
         "itemCode": supply.get("itemCode", ""),
         "date": supply.get("date", ""),
-        "has_image": supply.get("image_data") is not None and supply.get("image_data") != "",
+        "has_image": has_image,
         "image_data": supply.get("image_data"),
+        "image_url": f"/api/supplies/{supply['_id']}/image" if has_image else None,
         "image_filename": supply.get("image_filename"),
         "image_content_type": supply.get("image_content_type"),
         "transactionHistory": supply.get("transactionHistory", []),
-        "documents": supply.get("documents", []),
+        "documents": [document_metadata(doc) for doc in supply.get("documents", [])],
         "created_at": supply.get("created_at", datetime.utcnow()),
         "updated_at": supply.get("updated_at", datetime.utcnow())
     }
 
-def get_all_supplies() -> List[Dict]:
-    """Get all supplies from database"""
-    collection = get_supplies_collection()
-    return [supply_helper(s) for s in collection.find()]
+# Server-side projection for list views: computes blob/history indicators in
+# MongoDB so image data, documents and transaction history never leave the server
+SUPPLY_SUMMARY_PROJECTION = {
+    "name": 1,
+    "description": 1,
+    "category": 1,
+    "quantity": 1,
+    "supplier": 1,
+    "location": 1,
+    "status": 1,
+    "unit": 1,
+    "itemCode": 1,
+    "date": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "has_image": {"$or": [
+        {"$ifNull": ["$image_blob_id", False]},
+        {"$gt": [{"$strLenBytes": {"$ifNull": ["$image_data", ""]}}, 0]}
+    ]},
+    "document_count": {"$size": {"$ifNull": ["$documents", []]}},
+    "transaction_count": {"$size": {"$ifNull": ["$transactionHistory", []]}},
+    "last_transaction": {"$arrayElemAt": [{"$ifNull": ["$transactionHistory", []]}, -1]}
+}
+
+def supply_summary_helper(supply) -> dict:
+    """Format supply summary data (output of SUPPLY_SUMMARY_PROJECTION)"""
+    return {
+        "_id": str(supply["_id"]),
+        "name": supply.get("name", ""),
+        "description": supply.get("description", ""),
+        "category": supply.get("category", ""),
+        "quantity": supply.get("quantity", 0),
+        "supplier": supply.get("supplier", ""),
+        "location": supply.get("location", ""),
+        "status": supply.get("status", "available"),
+        "unit": supply.get("unit", "piece"),
+        "itemCode": supply.get("itemCode", ""),
+        "date": supply.get("date", ""),
+        "has_image": supply.get("has_image", False),
+        "document_count": supply.get("document_count", 0),
+        "transaction_count": supply.get("transaction_count", 0),
+        "last_transaction": supply.get("last_transaction"),
+        "created_at": supply.get("created_at"),
+        "updated_at": supply.get("updated_at")
+    }
+
+SUPPLY_SORT_FIELDS = {"created_at", "updated_at", "itemCode", "name", "quantity", "category", "status"}
 
-def create_supply(supply_data: dict) -> Dict:
+async def list_supplies_page(category: Optional[str] = None, status: Optional[str] = None,
+                             location: Optional[str] = None, q: Optional[str] = None,
+                             sort: Optional[str] = None, limit: Optional[int] = None,
+                             after: Optional[str] = None, summary: bool = False) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Get a filtered, sorted page of supplies using keyset pagination.
+    Returns (supplies, next_cursor); without a limit every match is returned.
+    """
+    collection = get_async_supplies_collection()
+    sort_field, direction = parse_sort(sort, SUPPLY_SORT_FIELDS, "-created_at")
+    match = build_inventory_match(category, status, location, q)
+    
+    docs, next_cursor = await fetch_page(
+        collection, match, sort_field, direction,
+        limit=validate_limit(limit),
+        after=after,
+        projection=SUPPLY_SUMMARY_PROJECTION if summary else None
+    )
+    
+    helper = supply_summary_helper if summary else supply_helper
+    return [helper(s) for s in docs], next_cursor
+
+async def _get_supply_or_404(supply_id: str, projection: dict = None) -> dict:
+    collection = get_async_supplies_collection()
+    supply = await collection.find_one({"_id": ObjectId(supply_id)}, projection)
+    if not supply:
+        raise HTTPException(status_code=404, detail="Supply not found")
+    return supply
+
+async def _reload_supply(supply_id) -> Dict:
+    collection = get_async_supplies_collection()
+    return supply_helper(await collection.find_one({"_id": ObjectId(supply_id)}, BLOB_FIELDS_PROJECTION))
+
+async def create_supply(supply_data: dict) -> Dict:
     """Create a new supply"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
+    supply_data["image_data"] = None
     if supply_data.get("itemPicture"):
-        supply_data["image_data"] = supply_data["itemPicture"]
         filename = supply_data.get("image_filename")
-        supply_data["image_filename"] = filename if filename and filename.strip() else "unknown_filename"
-        supply_data["image_content_type"] = supply_data.get("image_content_type") or "image/jpeg"
+        filename = filename if filename and filename.strip() else "unknown_filename"
+        content_type = supply_data.get("image_content_type") or "image/jpeg"
+        image = await save_bytes(decode_base64_payload(supply_data["itemPicture"]), filename, content_type)
+        supply_data["image_blob_id"] = image["blob_id"]
+        supply_data["image_size"] = image["file_size"]
+        supply_data["image_filename"] = filename
+        supply_data["image_content_type"] = content_type
     else:
-        supply_data["image_data"] = None
         supply_data["image_filename"] = None
         supply_data["image_content_type"] = None
     
@@ -64,119 +164,150 @@ def create_supply(supply_data: dict) -> Dict:
     
     supply_data["created_at"] = supply_data["updated_at"] = datetime.utcnow()
     
-    result = collection.insert_one(supply_data)
-    return supply_helper(collection.find_one({"_id": result.inserted_id}))
+    result = await collection.insert_one(supply_data)
+    return await _reload_supply(result.inserted_id)
 
-def get_supply_by_id(supply_id: str) -> Dict:
+async def get_supply_by_id(supply_id: str) -> Dict:
     """Get supply by ID"""
-    collection = get_supplies_collection()
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
-    return supply_helper(supply)
+    return supply_helper(await _get_supply_or_404(supply_id, BLOB_FIELDS_PROJECTION))
 
-def update_supply(supply_id: str, update_data: dict) -> Dict:
+async def update_supply(supply_id: str, update_data: dict) -> Dict:
     """Update a supply"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, {"image_blob_id": 1})
+    
+    # Documents are managed through the document endpoints; a PUT must not
+    # overwrite their blob references
+    update_data.pop("documents", None)
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
+    update = {}
+    if update_data.get("image_data"):
+        filename = update_data.get("image_filename") or "image"
+        content_type = update_data.get("image_content_type") or "image/jpeg"
+        image = await save_bytes(decode_base64_payload(update_data.pop("image_data")), filename, content_type)
+        update_data["image_blob_id"] = image["blob_id"]
+        update_data["image_size"] = image["file_size"]
+        update_data["image_filename"] = filename
+        update_data["image_content_type"] = content_type
+        update["$unset"] = {"image_data": ""}
+    
     update_data["updated_at"] = datetime.utcnow()
+    update["$set"] = update_data
     
-    collection.update_one({"_id": ObjectId(supply_id)}, {"$set": update_data})
-    return supply_helper(collection.find_one({"_id": ObjectId(supply_id)}))
+    await collection.update_one({"_id": ObjectId(supply_id)}, update)
+    if "image_blob_id" in update_data:
+        await delete_blob(supply.get("image_blob_id"))
+    return await _reload_supply(supply_id)
 
-def delete_supply(supply_id: str) -> Dict:
-    """Delete a supply"""
-    collection = get_supplies_collection()
+async def delete_supply(supply_id: str) -> Dict:
+    """Delete a supply and its stored image/documents"""
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, BLOB_FIELDS_PROJECTION)
     
     supply_data = supply_helper(supply)
-    collection.delete_one({"_id": ObjectId(supply_id)})
+    await collection.delete_one({"_id": ObjectId(supply_id)})
+    await record_tombstone("supplies", supply, "itemCode")
+    
+    await delete_blob(supply.get("image_blob_id"))
+    for doc in supply.get("documents", []):
+        await delete_blob(doc.get("blob_id"))
     return supply_data
 
 async def add_supply_image(supply_id: str, image: UploadFile) -> Dict:
     """Add image to supply"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, {"image_blob_id": 1})
     
     if not image.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    contents = await image.read()
-    if len(contents) > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Image file too large (max 5MB)")
-    
-    image_base64 = base64.b64encode(contents).decode('utf-8')
+    stored = await save_upload(image, MAX_IMAGE_SIZE, "Image file")
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(supply_id)},
-        {"$set": {
-            "image_data": image_base64,
-            "image_filename": image.filename,
-            "image_content_type": image.content_type,
-            "updated_at": datetime.utcnow()
-        }}
+        {
+            "$set": {
+                "image_blob_id": stored["blob_id"],
+                "image_size": stored["file_size"],
+                "image_filename": image.filename,
+                "image_content_type": image.content_type,
+                "updated_at": datetime.utcnow()
+            },
+            "$unset": {"image_data": ""}
+        }
     )
+    await delete_blob(supply.get("image_blob_id"))
     
-    return supply_helper(collection.find_one({"_id": ObjectId(supply_id)}))
+    return await _reload_supply(supply_id)
 
-def get_supply_image(supply_id: str) -> Response:
-    """Get supply image"""
-    collection = get_supplies_collection()
+async def get_supply_image(supply_id: str) -> Response:
+    """Get supply image (streamed from the blob store)"""
+    supply = await _get_supply_or_404(
+        supply_id, {"image_blob_id": 1, "image_data": 1, "image_content_type": 1}
+    )
+    content_type = supply.get("image_content_type") or "image/jpeg"
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    if supply.get("image_blob_id"):
+        return await blob_response(supply["image_blob_id"], content_type)
     
     if not supply.get("image_data"):
         raise HTTPException(status_code=404, detail="No image found for this supply")
     
-    image_data = base64.b64decode(supply["image_data"])
-    content_type = supply.get("image_content_type", "image/jpeg")
-    
+    image_data = decode_base64_payload(supply["image_data"])
     return Response(content=image_data, media_type=content_type)
 
-def delete_supply_image(supply_id: str) -> Dict:
+async def get_supply_image_data_uri(supply_id: str) -> Optional[str]:
+    """Get the supply image as a data: URI for server-rendered pages"""
+    supply = await _get_supply_or_404(
+        supply_id, {"image_blob_id": 1, "image_data": 1, "image_content_type": 1}
+    )
+    content_type = supply.get("image_content_type") or "image/jpeg"
+    
+    if supply.get("image_blob_id"):
+        image_bytes = await read_blob(supply["image_blob_id"])
+        if not image_bytes:
+            return None
+        return f"data:{content_type};base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+    
+    image_data = supply.get("image_data")
+    if not image_data:
+        return None
+    return image_data if image_data.startswith("data:") else f"data:{content_type};base64,{image_data}"
+
+async def delete_supply_image(supply_id: str) -> Dict:
     """Delete supply image"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, {"image_blob_id": 1})
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(supply_id)},
         {
             "$unset": {
                 "image_data": "",
+                "image_blob_id": "",
+                "image_size": "",
                 "image_filename": "",
                 "image_content_type": ""
             },
             "$set": {"updated_at": datetime.utcnow()}
         }
     )
+    await delete_blob(supply.get("image_blob_id"))
     
-    return supply_helper(collection.find_one({"_id": ObjectId(supply_id)}))
+    return await _reload_supply(supply_id)
 
 async def add_supply_document(supply_id: str, file: UploadFile) -> Dict:
     """Add document to supply"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    await _get_supply_or_404(supply_id, {"_id": 1})
     
     allowed_types = [
         'application/pdf',
@@ -193,23 +324,17 @@ async def add_supply_document(supply_id: str, file: UploadFile) -> Dict:
             detail="Invalid file type. Allowed: PDF, DOCX, DOC, JPEG, PNG, GIF"
         )
     
-    contents = await file.read()
-    file_size = len(contents)
-    
-    if file_size > 25 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large (max 25MB)")
-    
-    file_base64 = base64.b64encode(contents).decode('utf-8')
+    stored = await save_upload(file, MAX_DOCUMENT_SIZE, "File")
     
     document = {
         "filename": file.filename,
-        "file_data": file_base64,
+        "blob_id": stored["blob_id"],
         "content_type": file.content_type,
-        "file_size": file_size,
+        "file_size": stored["file_size"],
         "uploaded_at": datetime.utcnow().isoformat()
     }
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(supply_id)},
         {
             "$push": {"documents": document},
@@ -217,15 +342,16 @@ async def add_supply_document(supply_id: str, file: UploadFile) -> Dict:
         }
     )
     
-    return supply_helper(collection.find_one({"_id": ObjectId(supply_id)}))
+    return await _reload_supply(supply_id)
 
-def get_supply_documents(supply_id: str) -> List[Dict]:
+async def get_supply_documents(supply_id: str) -> List[Dict]:
     """Get all documents for a supply"""
-    collection = get_supplies_collection()
-    
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, {
+        "documents.filename": 1,
+        "documents.content_type": 1,
+        "documents.file_size": 1,
+        "documents.uploaded_at": 1
+    })
     
     documents = supply.get("documents", [])
     
@@ -237,20 +363,26 @@ def get_supply_documents(supply_id: str) -> List[Dict]:
         "uploaded_at": doc["uploaded_at"]
     } for idx, doc in enumerate(documents)]
 
-def get_supply_document(supply_id: str, document_index: int) -> Response:
+async def get_supply_document(supply_id: str, document_index: int) -> Response:
     """Get a specific document by index"""
-    collection = get_supplies_collection()
+    if document_index < 0:
+        raise HTTPException(status_code=404, detail="Document not found")
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    # $slice fetches only the requested entry instead of every document
+    supply = await _get_supply_or_404(supply_id, {"_id": 1, "documents": {"$slice": [document_index, 1]}})
     
     documents = supply.get("documents", [])
     
-    if document_index < 0 or document_index >= len(documents):
+    if not documents:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    document = documents[document_index]
+    document = documents[0]
+    
+    if document.get("blob_id"):
+        return await blob_response(
+            document["blob_id"], document["content_type"], document["filename"], "inline"
+        )
+    
     file_data = base64.b64decode(document["file_data"])
     
     return Response(
@@ -261,22 +393,20 @@ def get_supply_document(supply_id: str, document_index: int) -> Response:
         }
     )
 
-def delete_supply_document(supply_id: str, document_index: int) -> Dict:
+async def delete_supply_document(supply_id: str, document_index: int) -> Dict:
     """Delete a specific document by index"""
-    collection = get_supplies_collection()
+    collection = get_async_supplies_collection()
     
-    supply = collection.find_one({"_id": ObjectId(supply_id)})
-    if not supply:
-        raise HTTPException(status_code=404, detail="Supply not found")
+    supply = await _get_supply_or_404(supply_id, {"documents": 1})
     
     documents = supply.get("documents", [])
     
     if document_index < 0 or document_index >= len(documents):
         raise HTTPException(status_code=404, detail="Document not found")
     
-    documents.pop(document_index)
+    removed = documents.pop(document_index)
     
-    collection.update_one(
+    await collection.update_one(
         {"_id": ObjectId(supply_id)},
         {
             "$set": {
@@ -285,5 +415,6 @@ def delete_supply_document(supply_id: str, document_index: int) -> Dict:
             }
         }
     )
+    await delete_blob(removed.get("blob_id"))
     
-    return supply_helper(collection.find_one({"_id": ObjectId(supply_id)}))
+    return await _reload_supply(supply_id)
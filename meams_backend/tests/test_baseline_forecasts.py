@@ -0,0 +1,36 @@
+"""
+Tests for the vectorized baseline forecasters
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+import numpy as np
+
+from processing import baseline_forecasts
+
+
+def test_one_row_per_series_with_non_negative_bounds():
+    rng = np.random.default_rng(5)
+    values = rng.poisson(4, size=(3, 30)).astype(float)
+    result = baseline_forecasts(values, n_periods=4)
+
+    assert result["forecast"].shape == (3, 4)
+    assert len(result["method"]) == 3
+    assert (result["lower_bound"] >= 0).all()
+    assert (result["lower_bound"] <= result["forecast"]).all()
+    assert (result["forecast"] <= result["upper_bound"]).all()
+
+
+def test_seasonal_series_picks_a_seasonal_method():
+    season = np.array([10, 12, 30, 50, 70, 40, 20, 15, 12, 11, 10, 9], dtype=float)
+    result = baseline_forecasts(np.tile(season, 3), n_periods=12)
+
+    assert result["method"][0] in ("seasonal_naive", "holt_winters")
+    np.testing.assert_allclose(result["forecast"][0], season, atol=1.0)
+
+
+def test_single_series_and_zero_history():
+    result = baseline_forecasts(np.zeros(5), n_periods=2)
+
+    assert result["forecast"].shape == (1, 2)
+    assert (result["forecast"] == 0).all()
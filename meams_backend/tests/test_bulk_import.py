@@ -0,0 +1,71 @@
+"""
+Tests for planning and sending bulk import writes
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from routers.bulk_import import plan_bulk_writes, run_bulk_writes
+
+CREATED = datetime(2024, 1, 1)
+
+
+def _row(code, quantity=1, name="Item"):
+    return {"itemCode": code, "name": name, "quantity": quantity, "created_at": CREATED}
+
+
+def test_duplicate_supply_codes_merge_into_one_insert():
+    rows = [(2, _row("SUP-1", 3)), (3, _row("SUP-2", 1)), (4, _row("SUP-1", 4))]
+    operations = plan_bulk_writes(rows, {}, "supplies")
+
+    assert len(operations) == 2
+    operation, row_numbers, summary = operations[0]
+    assert isinstance(operation, InsertOne)
+    assert operation._doc["quantity"] == 7
+    assert row_numbers == [2, 4]
+    assert summary["action"] == "inserted" and summary["rows"] == [2, 4]
+
+
+def test_duplicate_supply_codes_of_existing_item_add_up():
+    existing_id = ObjectId()
+    rows = [(2, _row("SUP-1", 3)), (3, _row("SUP-1", 5))]
+    (operation, _, summary), = plan_bulk_writes(rows, {"SUP-1": {"_id": existing_id}}, "supplies")
+
+    assert isinstance(operation, UpdateOne)
+    assert operation._doc["$inc"] == {"quantity": 8}
+    assert summary == {"_id": str(existing_id), "action": "updated", "itemCode": "SUP-1",
+                       "name": "Item", "rows": [2, 3]}
+
+
+def test_duplicate_equipment_codes_keep_last_row():
+    rows = [(2, _row("EQ-1", name="Old")), (3, {**_row("EQ-1", name="New"), "created_at": datetime(2025, 1, 1)})]
+    (operation, _, _), = plan_bulk_writes(rows, {}, "equipment")
+
+    assert operation._doc["name"] == "New"
+    assert operation._doc["created_at"] == CREATED
+
+
+class _FailingCollection:
+    def __init__(self, failed_indexes):
+        self.failed_indexes = failed_indexes
+
+    async def bulk_write(self, operations, ordered=True):
+        raise BulkWriteError({"writeErrors": [
+            {"index": index, "errmsg": f"failed {index}"} for index in self.failed_indexes
+        ]})
+
+
+def test_write_errors_map_back_to_their_rows():
+    rows = [(2, _row("A")), (3, _row("B")), (4, _row("A")), (5, _row("C"))]
+    operations = plan_bulk_writes(rows, {}, "supplies")
+    applied, errors = asyncio.run(run_bulk_writes(_FailingCollection([0]), operations, batch_size=2))
+
+    # Every batch fails its first operation: "A" (rows 2 and 4) and "C" (row 5)
+    assert errors == ["Row 2: failed 0", "Row 4: failed 0", "Row 5: failed 0"]
+    assert [summary["itemCode"] for summary in applied] == ["B"]
@@ -0,0 +1,32 @@
+"""
+Tests for the delta export watermark
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from services.delta_service import decode_watermark, encode_watermark
+
+
+def test_watermark_round_trip():
+    timestamp, last_id = datetime(2024, 5, 6, 7, 8, 9, 123000), ObjectId()
+    assert decode_watermark(encode_watermark(timestamp, last_id)) == (timestamp, last_id)
+
+
+def test_watermark_without_id():
+    timestamp = datetime(2024, 5, 6)
+    decoded, last_id = decode_watermark(encode_watermark(timestamp))
+    assert decoded == timestamp and decoded.tzinfo is None
+    assert last_id is None
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "e30=", "eyJ0cyI6ICJ5ZXN0ZXJkYXkifQ=="])
+def test_invalid_watermark_is_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        decode_watermark(token)
+    assert error.value.status_code == 400
@@ -0,0 +1,30 @@
+"""
+Tests for the per-item SARIMA forecasts
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+import threading
+
+import numpy as np
+
+from processing import forecast_items
+
+
+def _seasonal_series(months=36, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(months)
+    return np.clip(40 + 15 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 2, months), 0, None)
+
+
+def test_single_worker_fits_sarima_off_the_main_thread():
+    # The scheduler runs item forecasts in the threadpool, where SIGALRM timers are not allowed
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(
+        forecast_items({"item": _seasonal_series()}, n_periods=3, workers=1, fit_timeout=30)
+    ))
+    thread.start()
+    thread.join()
+
+    assert results["item"]["method"] == "sarima"
+    assert len(results["item"]["forecast"]) == 3
@@ -0,0 +1,33 @@
+"""
+Tests for the log search token index
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+from services.log_service import MAX_TERM_LENGTH, build_search_index, parse_search
+
+
+def test_index_holds_words_and_their_prefixes():
+    words, terms = build_search_index({"action": "Updated supply.", "details": "Item: Toner", "username": "admin"})
+
+    assert words == ["admin", "item", "supply", "toner", "updated"]
+    assert {"to", "ton", "tone", "toner", "su", "sup"} <= set(terms)
+    # Single letters are too short to be terms
+    assert "t" not in terms
+
+
+def test_long_words_are_cut_to_the_term_length():
+    word = "x" * (MAX_TERM_LENGTH + 5)
+    words, terms = build_search_index({"details": word})
+
+    assert words == [word]
+    assert max(len(term) for term in terms) == MAX_TERM_LENGTH
+
+
+def test_search_terms_match_index_prefixes():
+    _, terms = build_search_index({"details": "Projector repaired"})
+
+    assert parse_search("PROJ rep a") == ["proj", "rep"]
+    assert set(parse_search("PROJ rep")) <= set(terms)
+    assert parse_search("proj proj") == ["proj"]
+    assert parse_search(None) == []
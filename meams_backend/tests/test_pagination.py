@@ -0,0 +1,60 @@
+"""
+Tests for the keyset pagination condition
+
+Run from the meams_backend directory:
+    python -m pytest tests
+"""
+import pytest
+
+from services.pagination import keyset_condition
+
+ROWS = [
+    {"_id": 1},                  # missing sort field
+    {"_id": 2, "name": None},
+    {"_id": 3, "name": "alpha"},
+    {"_id": 4, "name": "beta"},
+    {"_id": 5},
+    {"_id": 6, "name": "alpha"},
+]
+
+
+def _matches(row, condition):
+    """Evaluate the subset of MongoDB query operators keyset_condition emits"""
+    if "$or" in condition:
+        return any(_matches(row, part) for part in condition["$or"])
+    for field, expected in condition.items():
+        actual = row.get(field)
+        if isinstance(expected, dict):
+            op, operand = next(iter(expected.items()))
+            if op == "$ne":
+                if actual == operand:
+                    return False
+            elif actual is None:
+                # Range operators never match null or missing fields
+                return False
+            elif op == "$gt" and not actual > operand:
+                return False
+            elif op == "$lt" and not actual < operand:
+                return False
+        elif actual != expected:
+            return False
+    return True
+
+
+def _sort_key(row):
+    # Nulls and missing values sort before every string, as in MongoDB
+    value = row.get("name")
+    return (value is not None, value or "", row["_id"])
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_pages_cover_rows_with_missing_sort_field(direction):
+    ordered = sorted(ROWS, key=_sort_key, reverse=direction == -1)
+    for position, last in enumerate(ordered):
+        condition = keyset_condition("name", direction, last.get("name"), last["_id"])
+        remaining = [row for row in ordered if _matches(row, condition)]
+        assert remaining == ordered[position + 1:]
+
+
+def test_id_sort_uses_id_only():
+    assert keyset_condition("_id", 1, 3, 3) == {"_id": {"$gt": 3}}
@@ -247,7 +247,7 @@ const equipmentColors = ['#2196F3', '#9C27B0', '#FF5722'];
     location: supply.location || '',
     status: supply.status || 'Normal', // This will be recalculated below
     date: supply.date || '',
-    has_image: supply.image_data ? true : false,
+    has_image: supply.has_image ?? !!supply.image_data,
     image_data: supply.image_data || null,
     transactionHistory: supply.transactionHistory || []
   };
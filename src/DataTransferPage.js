@@ -17,6 +17,8 @@ function DataTransferPage() {
     'All Data',
     'Supply Inventory',
     'Equipment Inventory',
+    'Supply Inventory (Excel)',
+    'Equipment Inventory (Excel)',
     'User Accounts',
     'System Logs'
   ];
@@ -242,13 +244,19 @@ function DataTransferPage() {
       
       switch (exportOption) {
         case 'Supply Inventory':
-          exportUrl = '/api/export/supplies';
+          exportUrl = '/api/export/supplies/csv';
           break;
         case 'Equipment Inventory':
-          exportUrl = '/api/export/equipment';
+          exportUrl = '/api/export/equipment/csv';
+          break;
+        case 'Supply Inventory (Excel)':
+          exportUrl = '/api/export/supplies?format=xlsx';
+          break;
+        case 'Equipment Inventory (Excel)':
+          exportUrl = '/api/export/equipment?format=xlsx';
           break;
         case 'User Accounts':
-          exportUrl = '/api/export/accounts';
+          exportUrl = '/api/export/accounts/csv';
           break;
         case 'System Logs':
           exportUrl = '/api/export/logs';
@@ -278,6 +286,25 @@ function DataTransferPage() {
         throw new Error(errorResult.detail || `HTTP error! status: ${response.status}`);
       }
 
+      // CSV, Excel and ZIP exports are streamed as files
+      const contentType = response.headers.get('Content-Type') || '';
+      if (contentType.startsWith('text/csv') || contentType.startsWith('application/zip') ||
+          contentType.startsWith('application/vnd.openxmlformats')) {
+        const blob = await response.blob();
+        const disposition = response.headers.get('Content-Disposition') || '';
+        const match = disposition.match(/filename="?([^"]+)"?/);
+        downloadFile(blob, match ? match[1] : 'meams_export');
+
+        const summaryHeader = response.headers.get('X-Export-Summary');
+        if (summaryHeader) {
+          const summary = JSON.parse(summaryHeader);
+          alert(`${exportOption} exported successfully!\n\nSummary:\n• Supplies: ${summary.supplies_count || 0}\n• Equipment: ${summary.equipment_count || 0}\n• Accounts: ${summary.accounts_count || 0}`);
+        } else {
+          alert(`${exportOption} exported successfully!`);
+        }
+        return;
+      }
+
       const result = await response.json();
 
       if (result.success) {
@@ -542,6 +569,9 @@ const handleSendReport = async () => {
                   {exportOption === 'Equipment Inventory' && (
                     <p>🔧 Will export all equipment inventory data as a CSV file.</p>
                   )}
+                  {exportOption.endsWith('(Excel)') && (
+                    <p>📗 Will export the inventory as an Excel (.xlsx) workbook.</p>
+                  )}
                   {exportOption === 'User Accounts' && (
                     <p>👥 Will export user account data as a CSV file (Admin only).</p>
                   )}
@@ -145,6 +145,23 @@ const EquipmentAPI = {
     }
   },
 
+  // Fetch an item image from the blob store as a data: URL
+  async fetchEquipmentImage(equipmentId) {
+    const token = getAuthToken();
+    const response = await fetch(`${API_BASE_URL}/api/equipment/${equipmentId}/image`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok) return null;
+
+    const blob = await response.blob();
+    return new Promise((resolve) => {
+      const reader = new FileReader();
+      reader.onloadend = () => resolve(reader.result);
+      reader.onerror = () => resolve(null);
+      reader.readAsDataURL(blob);
+    });
+  },
+
   async uploadEquipmentImage(equipmentId, imageFile) {
     try {
       const formData = new FormData();
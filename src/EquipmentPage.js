@@ -468,7 +468,7 @@ function EquipmentPage() {
       supplier: item.supplier || '',
       unit_price: item.unit_price || 0,
       date: item.date || '',
-      has_image: item.image_data ? true : false,
+      has_image: item.has_image ?? !!item.image_data,
       image_data: item.image_data || null,
       image_filename: item.image_filename || null,
       image_content_type: item.image_content_type || null,
@@ -712,6 +712,9 @@ const handleImageDrop = (e) => {
         item._id === selectedEquipment._id ? updatedEquipment : item
       )
     );
+    if (!updatedEquipment.image_data) {
+      loadEquipmentImage(selectedEquipment._id);
+    }
     
     alert('Image uploaded successfully!');
     
@@ -1061,9 +1064,22 @@ const printQRCode = () => {
   }, 250);
 };
 
+  const loadEquipmentImage = async (equipmentId) => {
+    const imageData = await EquipmentAPI.fetchEquipmentImage(equipmentId);
+    if (!imageData) return;
+    setEquipmentData(prevData =>
+      prevData.map(item => item._id === equipmentId ? { ...item, image_data: imageData } : item)
+    );
+    setSelectedEquipment(prev => prev && prev._id === equipmentId ? { ...prev, image_data: imageData } : prev);
+  };
+
   const handleEquipmentClick = (equipment) => {
     setSelectedEquipment(equipment);
     setIsEquipmentOverviewOpen(true);
+    // Images are stored as blobs and fetched on demand
+    if (equipment.has_image && !equipment.image_data) {
+      loadEquipmentImage(equipment._id);
+    }
   };
 
   const handleCloseEquipmentOverview = () => {
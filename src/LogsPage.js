@@ -11,16 +11,22 @@ function LogsPage() {
   const [userOptions, setUserOptions] = useState(['ALL USERS']);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Get auth token from localStorage
   const getAuthToken = () => {
     return localStorage.getItem('authToken') || localStorage.getItem('adminToken');
   };
 
-  // Fetch logs from API
-  const fetchLogs = async () => {
+  // Fetch logs from API (append loads the next page of older entries)
+  const fetchLogs = async (append = false) => {
     try {
-      setLoading(true);
+      if (append) {
+        setLoadingMore(true);
+      } else {
+        setLoading(true);
+      }
       setError(null);
       
       const token = getAuthToken();
@@ -34,6 +40,7 @@ function LogsPage() {
       if (dateTo) params.append('date_to', dateTo);
       if (selectedUser && selectedUser !== 'ALL USERS') params.append('username', selectedUser);
       if (searchTerm) params.append('search', searchTerm);
+      if (append && nextCursor) params.append('after', nextCursor);
 
       const response = await fetch(`${process.env.REACT_APP_API_URL}/api/logs?${params.toString()}`, {
         method: 'GET',
@@ -56,7 +63,8 @@ function LogsPage() {
       const data = await response.json();
       
       if (data.success) {
-        setLogsData(data.data || []);
+        setLogsData(prevLogs => append ? [...prevLogs, ...(data.data || [])] : (data.data || []));
+        setNextCursor(data.next_cursor || null);
         
         if (data.usernames) {
           setUserOptions(data.usernames);
@@ -68,9 +76,13 @@ function LogsPage() {
     } catch (err) {
       console.error('Error fetching logs:', err);
       setError(err.message);
-      setLogsData([]);
+      if (!append) {
+        setLogsData([]);
+        setNextCursor(null);
+      }
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -103,24 +115,20 @@ function LogsPage() {
         throw new Error('Failed to export logs');
       }
 
-      const data = await response.json();
+      // The CSV is streamed; read it as a file and download it
+      const blob = await response.blob();
+      const disposition = response.headers.get('Content-Disposition') || '';
+      const match = disposition.match(/filename="?([^"]+)"?/);
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = match ? match[1] : 'meams_logs.csv';
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
+      window.URL.revokeObjectURL(url);
       
-      if (data.success) {
-        // Create and download CSV file
-        const blob = new Blob([data.csv_data], { type: 'text/csv' });
-        const url = window.URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = data.filename || 'meams_logs.csv';
-        document.body.appendChild(a);
-        a.click();
-        document.body.removeChild(a);
-        window.URL.revokeObjectURL(url);
-        
-        console.log('Logs exported successfully');
-      } else {
-        throw new Error(data.message || 'Export failed');
-      }
+      console.log('Logs exported successfully');
 
     } catch (err) {
       console.error('Error exporting logs:', err);
@@ -350,6 +358,17 @@ function LogsPage() {
                 )}
               </tbody>
             </table>
+            {nextCursor && (
+              <div className="load-more-container" style={{ textAlign: 'center', margin: '16px 0' }}>
+                <button
+                  className="refresh-button"
+                  onClick={() => fetchLogs(true)}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load older entries'}
+                </button>
+              </div>
+            )}
           </div>
         </>
       )}
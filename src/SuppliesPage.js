@@ -185,7 +185,7 @@ function SuppliesPage() {
         location: supply.location || '',
         status: supply.status || 'Normal',
         date: supply.date || '',
-        has_image: supply.image_data ? true : false,
+        has_image: supply.has_image ?? !!supply.image_data,
         image_data: supply.image_data || null,
         transactionHistory: supply.transactionHistory || []
       };
@@ -606,6 +606,7 @@ const handleCloseStockCard = () => {
     
     if (selectedItem && selectedItem._id === supplyId) {
       setSelectedItem(prev => ({ ...prev, has_image: true }));
+      loadItemImage(supplyId);
     }
     
     alert('Image uploaded successfully!');
@@ -703,7 +704,7 @@ const handleCloseStockCard = () => {
       location: newItem.location,
       status: calculatedStatus,
       date: newItem.date,
-      has_image: !!savedSupply.image_data,
+      has_image: savedSupply.has_image ?? !!savedSupply.image_data,
       image_data: savedSupply.image_data,
       documents: savedSupply.documents || [],
       transactionHistory: savedSupply.transactionHistory || []
@@ -884,9 +885,22 @@ const pluralizeUnit = (quantity, unit) => {
     }
   };
 
+  const loadItemImage = async (supplyId) => {
+    const imageData = await SuppliesAPI.fetchSupplyImage(supplyId);
+    if (!imageData) return;
+    setSuppliesData(prevData =>
+      prevData.map(item => item._id === supplyId ? { ...item, image_data: imageData } : item)
+    );
+    setSelectedItem(prev => prev && prev._id === supplyId ? { ...prev, image_data: imageData } : prev);
+  };
+
   const handleItemClick = (item) => {
     setSelectedItem(item);
     setIsItemOverviewOpen(true);
+    // Images are stored as blobs and fetched on demand
+    if (item.has_image && !item.image_data) {
+      loadItemImage(item._id);
+    }
   };
 
   const handleCloseItemOverview = () => {
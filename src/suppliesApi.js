@@ -198,6 +198,23 @@ const SuppliesAPI = {
     }
   },
 
+  // Fetch an item image from the blob store as a data: URL
+  async fetchSupplyImage(supplyId) {
+    const token = getAuthToken();
+    const response = await fetch(`${API_BASE_URL}/api/supplies/${supplyId}/image`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    if (!response.ok) return null;
+
+    const blob = await response.blob();
+    return new Promise((resolve) => {
+      const reader = new FileReader();
+      reader.onloadend = () => resolve(reader.result);
+      reader.onerror = () => resolve(null);
+      reader.readAsDataURL(blob);
+    });
+  },
+
   // Get supply image URL (if needed)
   getSupplyImageUrl(supplyId) {
     const token = getAuthToken();